@@ -1,6 +1,7 @@
+import click
 from flask import Flask
 from flask_compress import Compress
-from models import db, User, Role
+from models import db, User, Role, Clergy
 from routes.auth import auth_bp
 from routes.clergy import clergy_bp
 from routes.main import main_bp
@@ -10,14 +11,20 @@ from routes.main_api import main_api_bp
 from routes.editor_v2 import editor
 from migrations import run_database_migration, initialize_roles_and_permissions
 import os
+import time
 from dotenv import load_dotenv
 from utils import getContrastColor, getBorderStyle, from_json
 from routes.wiki import wiki_bp
 from routes.comments import comments_bp
+from routes.storage import storage_bp
 from flask_migrate import Migrate
 from sqlalchemy import inspect
 from urllib.parse import urlparse, urlunparse
-from services.backblaze_config import init_backblaze_config
+from services.storage import init_storage
+from services.db_stats import init_db_stats
+from services.wiki_render import init_wiki_render
+from services.wiki_search import init_wiki_search
+from services.image_variants import init_image_variants
 
 load_dotenv()
 
@@ -36,8 +43,9 @@ def fix_database_url(url):
         url = url.replace('postgres://', 'postgresql://', 1)
 
     parsed = urlparse(url)
+    hostname = parsed.hostname or ''
 
-    if 'onrender.com' in parsed.hostname or 'render.com' in parsed.hostname:
+    if 'onrender.com' in hostname or 'render.com' in hostname:
         if parsed.query:
             query = parsed.query + '&sslmode=require'
         else:
@@ -64,13 +72,29 @@ app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
     'pool_pre_ping': True,
     'pool_recycle': 300,
-    'connect_args': {
+}
+# psycopg2-only options; SQLite is used for local benchmarks (see benchmarks/)
+if fixed_database_url.startswith('postgresql'):
+    app.config['SQLALCHEMY_ENGINE_OPTIONS']['connect_args'] = {
         'connect_timeout': 10,
         'application_name': 'ecclesiastical_lineage'
     }
-}
+
+# Editor v2 statusbar: use pg_class row estimates instead of exact counts when set.
+app.config['STATUSBAR_USE_COUNT_ESTIMATES'] = os.environ.get('STATUSBAR_USE_COUNT_ESTIMATES', '').lower() in ('true', '1', 'yes')
+
+# Local storage backend: hand file serving to the front-end server (Apache / lighttpd)
+app.config['USE_X_SENDFILE'] = os.environ.get('STORAGE_USE_X_SENDFILE', '').lower() in ('true', '1', 'yes')
+
+# Per-request SQL profiling (/debug/perf, slow-query and N+1 logging); off unless enabled.
+# SQL_SERVER_TIMING additionally sends a Server-Timing header on every profiled response.
+app.config['SQL_PROFILING_ENABLED'] = os.environ.get('SQL_PROFILING_ENABLED', '').lower() in ('true', '1', 'yes')
+app.config['SQL_SERVER_TIMING'] = os.environ.get('SQL_SERVER_TIMING', '').lower() in ('true', '1', 'yes')
+app.config['SQL_SLOW_QUERY_MS'] = float(os.environ.get('SQL_SLOW_QUERY_MS', '200'))
+app.config['SQL_N_PLUS_ONE_THRESHOLD'] = int(os.environ.get('SQL_N_PLUS_ONE_THRESHOLD', '10'))
 
 db.init_app(app)
+init_db_stats(app)
 
 migrate = Migrate(app, db)
 
@@ -151,6 +175,10 @@ def ensure_admin_user():
 
 
 ensure_database_schema()
+init_wiki_render(app)
+init_wiki_search(app)
+# Before anything starts threads: the variant workers are forked from this process
+init_image_variants()
 
 app.register_blueprint(auth_bp)
 app.register_blueprint(clergy_bp)
@@ -161,6 +189,7 @@ app.register_blueprint(main_api_bp)
 app.register_blueprint(editor)
 app.register_blueprint(wiki_bp)
 app.register_blueprint(comments_bp)
+app.register_blueprint(storage_bp)
 
 app.jinja_env.globals['getContrastColor'] = getContrastColor
 app.jinja_env.globals['getBorderStyle'] = getBorderStyle
@@ -175,6 +204,82 @@ def add_cache_headers(response):
     return response
 
 
+@app.cli.command('gen-lineage')
+@click.option('--clergy', default=10000, show_default=True, help='Number of synthetic clergy to insert.')
+@click.option('--seed', default=0, show_default=True, help='Random seed; same seed gives the same graph.')
+@click.option('--yes', is_flag=True, help='Do not ask for confirmation when clergy already exist.')
+def gen_lineage_command(clergy, seed, yes):
+    """Insert a synthetic lineage dataset for load testing and benchmarks."""
+    from services.synthetic_lineage import generate_lineage
+
+    existing = db.session.query(db.func.count(Clergy.id)).scalar()
+    if existing and not yes:
+        click.confirm(f'{existing} clergy already exist; append {clergy} synthetic clergy?', abort=True)
+
+    start = time.perf_counter()
+    counts = generate_lineage(clergy, seed=seed)
+    click.echo(f'Inserted in {time.perf_counter() - start:.1f}s:')
+    for table, count in counts.items():
+        click.echo(f'  {table}: {count}')
+
+
+@app.cli.command('wiki-backfill-links')
+def wiki_backfill_links_command():
+    """Rebuild the wiki link graph (wiki_links) from every page body."""
+    from services.wiki_links import backfill_wiki_links
+
+    start = time.perf_counter()
+    pages, links = backfill_wiki_links()
+    click.echo(f'Indexed {links} links from {pages} wiki pages in {time.perf_counter() - start:.1f}s')
+
+
+@app.cli.command('wiki-backfill-search')
+def wiki_backfill_search_command():
+    """Recompute the full-text search vector of every wiki page (PostgreSQL)."""
+    from services.wiki_search import backfill_search_vectors
+
+    start = time.perf_counter()
+    pages = backfill_search_vectors()
+    click.echo(f'Indexed {pages} wiki pages for search in {time.perf_counter() - start:.1f}s')
+
+
+@app.cli.command('geocode-purge-cache')
+def geocode_purge_cache_command():
+    """Delete expired rows from the geocoding cache."""
+    from services.geocoding import purge_expired_geocodes
+
+    click.echo(f'Removed {purge_expired_geocodes()} expired geocoding results')
+
+
+@app.cli.command('geocode-locations')
+@click.option('--batch-size', default=100, show_default=True, help='Locations read and saved per batch.')
+@click.option('--workers', default=4, show_default=True, help='Concurrent geocoding requests.')
+@click.option('--rate', type=float, default=None, help='Remote requests per second (default GEOCODING_BATCH_RATE or 1; 0 = unlimited).')
+@click.option('--limit', type=int, default=None, help='Stop after this many locations.')
+@click.option('--backend', default=None, help='Override GEOCODING_BACKEND for this run, e.g. gazetteer.')
+def geocode_locations_command(batch_size, workers, rate, limit, backend):
+    """Fill in coordinates for active locations that have none. Safe to rerun; it resumes where it stopped."""
+    from services.geocoding import GeocodingService, create_backends, geocoding_service
+    from services.location_geocoding import count_missing_locations, geocode_missing_locations
+
+    service = GeocodingService(create_backends(backend)) if backend else geocoding_service
+    if not service.is_configured():
+        raise click.ClickException('No geocoding backend configured (set OPENCAGE_API_KEY or --backend gazetteer)')
+
+    click.echo(f'{count_missing_locations()} locations without coordinates; using {", ".join(service.backend_names)}')
+    start = time.perf_counter()
+    stats = geocode_missing_locations(
+        service=service, batch_size=batch_size, workers=workers, rate=rate, limit=limit,
+        progress=lambda s: click.echo(f"  {s['processed']} processed, {s['geocoded']} geocoded"),
+    )
+    click.echo(
+        f"Geocoded {stats['geocoded']} of {stats['processed']} locations in {time.perf_counter() - start:.1f}s "
+        f"({stats['not_found']} not found, {stats['coarse']} country-level only, {stats['failed']} failed, "
+        f"{stats['no_address']} without address; "
+        f"{stats['cached']} from cache)"
+    )
+
+
 with app.app_context():
     auto_migrate = os.environ.get('AUTO_MIGRATE_ON_STARTUP', '').lower() in ('true', '1', 'yes')
 
@@ -192,11 +297,11 @@ with app.app_context():
             "Automatic migrations disabled on startup (use 'flask db upgrade' or set AUTO_MIGRATE_ON_STARTUP=true)"
         )
 
-    app.logger.info("Initializing Backblaze B2")
-    if init_backblaze_config():
-        app.logger.info("Backblaze B2 initialized successfully")
+    app.logger.info("Initializing image storage")
+    if init_storage():
+        app.logger.info("Image storage initialized successfully")
     else:
-        app.logger.warning("Backblaze B2 initialization failed - image uploads will not work")
+        app.logger.warning("Image storage initialization failed - image uploads will not work")
 
     # Ensure admin user exists
     ensure_admin_user()
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for lineage graph building and flattening on synthetic datasets.
+
+Times (wall clock, plus SQL statement counts):
+
+- ``_lineage_nodes_links``       load clergy and build nodes/links
+- ``_flat_hierarchy_rows``       flatten nodes/links into lineage-table rows
+- ``compute_cascade_impact``     validity cascade from the largest root
+- ``_build_descendants_tree``    Editor v2 descendants tree from the largest root
+- ``get_lineage_data``           /clergy/lineage-data request incl. JSON serialization
+
+Results are printed (and optionally written) as JSON so runs can be compared
+over time. The dataset is generated once per (size, seed) and reused.
+
+Run from project root:
+
+    python -m benchmarks.bench_lineage --clergy 10000 --seed 1
+    python -m benchmarks.bench_lineage --clergy 50000 --output bench_50k.json --compare bench_50k_old.json
+    python -m benchmarks.bench_lineage --database-url postgresql://localhost:5432/lineage_bench --clergy 200000
+
+Without --database-url a SQLite file in the system temp directory is used.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--clergy', type=int, default=10000, help='synthetic clergy count (default 10000)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--database-url', help='defaults to a SQLite file in the temp directory')
+    parser.add_argument('--regenerate', action='store_true', help='insert a fresh dataset even if clergy exist')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per benchmark (default 3)')
+    parser.add_argument('--only', action='append', help='run only the named benchmark(s)')
+    parser.add_argument('--output', help='write JSON results to this path')
+    parser.add_argument('--compare', help='previous JSON results to print deltas against')
+    return parser.parse_args(argv)
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return None
+
+
+class _QueryCounter:
+    """Counts cursor executions on the app engine while active."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, *args, **kwargs):
+        self.count += 1
+
+    def __enter__(self):
+        from sqlalchemy import event
+        self.count = 0
+        event.listen(self.engine, 'after_cursor_execute', self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        from sqlalchemy import event
+        event.remove(self.engine, 'after_cursor_execute', self._on_execute)
+
+
+def _time(fn, repeat, engine):
+    """Run fn() `repeat` times; return timing summary and last result."""
+    durations = []
+    queries = 0
+    result = None
+    for _ in range(repeat):
+        with _QueryCounter(engine) as counter:
+            start = time.perf_counter()
+            result = fn()
+            durations.append(time.perf_counter() - start)
+        queries = counter.count
+    return {
+        'runs': repeat,
+        'min_s': round(min(durations), 4),
+        'median_s': round(statistics.median(durations), 4),
+        'max_s': round(max(durations), 4),
+        'queries': queries,
+    }, result
+
+
+def _largest_root(nodes, links):
+    """Root (no incoming ordination/consecration) with the most direct children."""
+    targets = {l['target'] for l in links if l.get('type') in ('ordination', 'consecration')}
+    fan_out = {}
+    for link in links:
+        fan_out[link['source']] = fan_out.get(link['source'], 0) + 1
+    roots = [n['id'] for n in nodes if n['id'] not in targets]
+    return max(roots, key=lambda rid: fan_out.get(rid, 0)) if roots else None
+
+
+def run(args):
+    from app import app
+    from models import db, Clergy
+    from routes.main import _lineage_nodes_links, _flat_hierarchy_rows
+    from routes.editor_v2 import _build_descendants_tree, MAX_LINEAGE_DEPTH, MAX_LINEAGE_NODES
+    from services.validation_cascade import compute_cascade_impact
+    from services.synthetic_lineage import generate_lineage
+
+    results = {}
+    with app.app_context():
+        engine = db.engine
+        existing = Clergy.query.count()
+        if existing == 0 or args.regenerate:
+            start = time.perf_counter()
+            counts = generate_lineage(args.clergy, seed=args.seed)
+            print(f'Generated dataset {counts} in {time.perf_counter() - start:.1f}s', file=sys.stderr)
+
+        with app.test_request_context():
+            nodes, links, _ = _lineage_nodes_links()
+        root_id = _largest_root(nodes, links)
+
+        def lineage_nodes_links():
+            with app.test_request_context():
+                return _lineage_nodes_links()
+
+        benchmarks = {
+            '_lineage_nodes_links': lineage_nodes_links,
+            '_flat_hierarchy_rows': lambda: _flat_hierarchy_rows(nodes, links),
+            'compute_cascade_impact': lambda: compute_cascade_impact(root_id),
+            '_build_descendants_tree': lambda: _build_descendants_tree(
+                root_id, 0, MAX_LINEAGE_DEPTH, MAX_LINEAGE_NODES, [0]
+            ),
+        }
+
+        def lineage_data_request():
+            with app.test_client() as client:
+                response = client.get('/clergy/lineage-data')
+                return len(response.get_data())
+
+        benchmarks['get_lineage_data'] = lineage_data_request
+
+        for name, fn in benchmarks.items():
+            if args.only and name not in args.only:
+                continue
+            db.session.expunge_all()
+            summary, result = _time(fn, args.repeat, engine)
+            if name == 'get_lineage_data':
+                summary['response_bytes'] = result
+            elif isinstance(result, (list, tuple)):
+                summary['result_len'] = len(result)
+            results[name] = summary
+            print(f'{name}: median {summary["median_s"]}s, {summary["queries"]} queries', file=sys.stderr)
+
+        meta = {
+            'timestamp': datetime.utcnow().isoformat() + 'Z',
+            'git_revision': _git_revision(),
+            'python': platform.python_version(),
+            'dialect': engine.dialect.name,
+            'clergy': len(nodes),
+            'links': len(links),
+            'seed': args.seed,
+            'largest_root_id': root_id,
+        }
+    return {'meta': meta, 'results': results}
+
+
+def _print_comparison(current, previous):
+    print('\nbenchmark                   previous    current    change', file=sys.stderr)
+    for name, summary in current['results'].items():
+        old = previous.get('results', {}).get(name)
+        if not old or not old.get('median_s'):
+            continue
+        change = (summary['median_s'] - old['median_s']) / old['median_s'] * 100
+        print(
+            f'{name:<26} {old["median_s"]:>9.4f}s {summary["median_s"]:>9.4f}s {change:>+8.1f}%',
+            file=sys.stderr,
+        )
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    else:
+        path = os.path.join(tempfile.gettempdir(), f'lineage_bench_{args.clergy}_{args.seed}.sqlite')
+        os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+    os.environ.setdefault('SECRET_KEY', 'benchmark')
+
+    report = run(args)
+    payload = json.dumps(report, indent=2)
+    print(payload)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(payload + '\n')
+    if args.compare:
+        with open(args.compare) as f:
+            _print_comparison(report, json.load(f))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
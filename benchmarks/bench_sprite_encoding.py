@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Benchmark sprite atlas encoders: encode time, output bytes and fidelity.
+
+Each atlas is encoded with every pipeline and reports the median encode
+time, the encoded size and the PSNR against the unencoded atlas. The
+``legacy`` pipeline is the previous SMOOTH filter + 128-color palette
+round-trip + JPEG q90, kept as the baseline.
+
+Atlases:
+
+- ``shard@1x`` / ``shard@2x``  one full sprite shard (SPRITE_SHARD_TILES tiles,
+  16 per row) at 48px and 96px tiles, as published by create_sprite_sheet
+- ``legacy_sheet``             the old single sheet for --clergy tiles (20 per row)
+
+Tiles are synthetic portraits unless ``--sprite`` points at real atlases,
+e.g. the lossless PNG copies under SPRITE_CACHE_DIR.
+
+Run from project root:
+
+    python -m benchmarks.bench_sprite_encoding
+    python -m benchmarks.bench_sprite_encoding --clergy 5000 --output bench_sprites.json
+    python -m benchmarks.bench_sprite_encoding --sprite /var/tmp/ecclesiastical_lineage_sprites/clergy_sprite_*_s0@1x.png
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+from io import BytesIO
+
+from PIL import Image, ImageChops, ImageDraw, ImageFilter, ImageStat
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.sprite_encoding import encode_sprite, is_format_available  # noqa: E402
+
+THUMBNAIL_SIZE = 48
+
+
+def _legacy_encode(sprite):
+    sprite = sprite.filter(ImageFilter.SMOOTH)
+    sprite = sprite.convert('P', palette=Image.ADAPTIVE, colors=128)
+    sprite = sprite.convert('RGB')
+    output = BytesIO()
+    sprite.save(output, 'JPEG', quality=90, optimize=True, progressive=True, subsampling='4:4:4')
+    return output.getvalue()
+
+
+# name -> (format, encoder)
+PIPELINES = {
+    'legacy': ('jpeg', _legacy_encode),
+    'jpeg_q90': ('jpeg', lambda sprite: encode_sprite(sprite, 'jpeg', quality=90)),
+    'jpeg_q80': ('jpeg', lambda sprite: encode_sprite(sprite, 'jpeg', quality=80)),
+    'webp_q85': ('webp', lambda sprite: encode_sprite(sprite, 'webp', quality=85)),
+    'webp_q75': ('webp', lambda sprite: encode_sprite(sprite, 'webp', quality=75)),
+    'avif_q60': ('avif', lambda sprite: encode_sprite(sprite, 'avif', quality=60)),
+    'png': ('png', lambda sprite: encode_sprite(sprite, 'png')),
+    'png_256': ('png', lambda sprite: encode_sprite(sprite, 'png', png_colors=256)),
+}
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--clergy', type=int, default=3000, help='tiles in the legacy single sheet (default 3000)')
+    parser.add_argument('--shard-tiles', type=int, default=256, help='tiles per shard (default 256)')
+    parser.add_argument('--sprite', action='append', help='benchmark this atlas image instead of synthetic ones')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per encode (default 3)')
+    parser.add_argument('--only', action='append', choices=sorted(PIPELINES), help='run only the named pipeline(s)')
+    parser.add_argument('--output', help='write JSON results to this path')
+    return parser.parse_args(argv)
+
+
+def _portrait_tile(rng, size):
+    """A photo-like tile: shaded background, head and shoulders, sensor noise"""
+    background = tuple(rng.randint(60, 220) for _ in range(3))
+    skin = (rng.randint(170, 235), rng.randint(120, 190), rng.randint(90, 160))
+    vestment = rng.choice([(20, 20, 25), (120, 20, 30), (200, 200, 205), (80, 20, 90)])
+    tile = Image.linear_gradient('L').resize((size, size)).convert('RGB')
+    tile = Image.blend(Image.new('RGB', (size, size), background), tile, 0.35)
+    draw = ImageDraw.Draw(tile)
+    draw.ellipse([size * 0.12, size * 0.62, size * 0.88, size * 1.3], fill=vestment)
+    draw.ellipse([size * 0.3, size * 0.18, size * 0.7, size * 0.66], fill=skin)
+    noise = Image.effect_noise((size, size), rng.randint(8, 20)).convert('RGB')
+    return Image.blend(tile, noise, 0.12).filter(ImageFilter.GaussianBlur(size / 96))
+
+
+def _atlas(rng, tiles, per_row, tile_size):
+    rows = (tiles + per_row - 1) // per_row
+    atlas = Image.new('RGB', (per_row * tile_size, rows * tile_size), (255, 255, 255))
+    for index in range(tiles):
+        atlas.paste(_portrait_tile(rng, tile_size), ((index % per_row) * tile_size, (index // per_row) * tile_size))
+    return atlas
+
+
+def _psnr(reference, encoded_bytes):
+    with Image.open(BytesIO(encoded_bytes)) as decoded:
+        difference = ImageChops.difference(reference, decoded.convert('RGB'))
+    mse = sum(ImageStat.Stat(difference).sum2) / (reference.width * reference.height * 3)
+    return round(10 * math.log10(255 ** 2 / mse), 2) if mse else None
+
+
+def _atlases(args):
+    if args.sprite:
+        atlases = {}
+        for path in args.sprite:
+            with Image.open(path) as image:
+                atlases[os.path.basename(path)] = image.convert('RGB')
+        return atlases
+    rng = random.Random(args.seed)
+    return {
+        'shard@1x': _atlas(rng, args.shard_tiles, 16, THUMBNAIL_SIZE),
+        'shard@2x': _atlas(rng, args.shard_tiles, 16, THUMBNAIL_SIZE * 2),
+        'legacy_sheet': _atlas(rng, args.clergy, 20, THUMBNAIL_SIZE),
+    }
+
+
+def run(args):
+    pipelines = {name: PIPELINES[name] for name in (args.only or PIPELINES)}
+    results = {}
+    for atlas_name, atlas in _atlases(args).items():
+        raw_bytes = atlas.width * atlas.height * 3
+        print(f'\n{atlas_name} ({atlas.width}x{atlas.height}, {raw_bytes} raw bytes)', file=sys.stderr)
+        print(f'  {"pipeline":<10} {"median_s":>9} {"bytes":>10} {"vs legacy":>10} {"psnr_db":>8}', file=sys.stderr)
+        results[atlas_name] = {}
+        for name, (image_format, encode) in pipelines.items():
+            if not is_format_available(image_format):
+                results[atlas_name][name] = {'skipped': f'{image_format} not supported by this Pillow build'}
+                print(f'  {name:<10} skipped ({image_format} not supported)', file=sys.stderr)
+                continue
+            durations = []
+            try:
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    data = encode(atlas)
+                    durations.append(time.perf_counter() - start)
+            except Exception as e:  # e.g. WebP is limited to 16383px per side
+                results[atlas_name][name] = {'error': str(e)}
+                print(f'  {name:<10} error: {e}', file=sys.stderr)
+                continue
+            summary = {
+                'format': image_format,
+                'runs': args.repeat,
+                'min_s': round(min(durations), 4),
+                'median_s': round(statistics.median(durations), 4),
+                'bytes': len(data),
+                'psnr_db': _psnr(atlas, data),
+            }
+            results[atlas_name][name] = summary
+            legacy = results[atlas_name].get('legacy', {}).get('bytes')
+            ratio = f'{len(data) / legacy:.2f}x' if legacy else '-'
+            print(
+                f'  {name:<10} {summary["median_s"]:>9.4f} {summary["bytes"]:>10} {ratio:>10} {summary["psnr_db"] or "inf":>8}',
+                file=sys.stderr,
+            )
+    meta = {
+        'timestamp': datetime.utcnow().isoformat() + 'Z',
+        'python': platform.python_version(),
+        'pillow': Image.__version__,
+        'seed': args.seed,
+        'synthetic': not args.sprite,
+    }
+    return {'meta': meta, 'results': results}
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    report = run(args)
+    payload = json.dumps(report, indent=2)
+    print(payload)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(payload + '\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
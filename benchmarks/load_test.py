@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+Load generator for the public read endpoints, with latency percentile reports.
+
+Each scenario is a weighted mix of requests against ``/``,
+``/clergy/lineage-data``, ``/api/chapel-locations``, ``/wiki/*`` and
+``/api/wiki/lineage/*``. A fixed number of client threads issue requests
+back to back (closed loop) for ``--duration`` seconds or ``--requests``
+total, after ``--warmup`` unrecorded requests.
+
+Two runners:
+
+- in-process (default): Flask test client against a synthetic SQLite/Postgres
+  dataset, generated on first use like benchmarks/bench_lineage.py. Measures
+  application cost without a web server; all threads share one process.
+- HTTP (``--base-url``): real requests against a running server, e.g. the
+  production setup (2 sync workers, 30s timeout) loaded with
+  ``flask gen-lineage``:
+
+      gunicorn -c gunicorn.conf.py app:app
+      python -m benchmarks.load_test --base-url http://localhost:10000 --scenario mixed --concurrency 8
+
+Run from project root:
+
+    python -m benchmarks.load_test --list
+    python -m benchmarks.load_test --clergy 10000 --scenario mixed --duration 30
+    python -m benchmarks.load_test --scenario wiki_lineage --requests 500 --output load_wiki.json
+
+When the server sends a Server-Timing ``db`` metric (start it with
+SQL_PROFILING_ENABLED=true SQL_SERVER_TIMING=true), DB time and query counts
+are reported per request type as well.
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from urllib.parse import quote, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# name -> (description, [(weight, label, path template)])
+# Templates may use {clergy_id} and {slug}; values are sampled per request.
+SCENARIOS = {
+    'home': (
+        'Lineage table home page',
+        [(1, 'home', '/')],
+    ),
+    'lineage_data': (
+        'Full graph JSON for the visualization',
+        [(1, 'lineage_data', '/clergy/lineage-data')],
+    ),
+    'chapel_locations': (
+        'Chapel map locations',
+        [(1, 'chapel_locations', '/api/chapel-locations')],
+    ),
+    'wiki': (
+        'Wiki shell, page content and page list',
+        [
+            (2, 'wiki_shell', '/wiki/{slug}'),
+            (5, 'wiki_page', '/api/wiki/page/{slug}'),
+            (1, 'wiki_pages', '/api/wiki/pages'),
+            (1, 'wiki_backlinks', '/api/wiki/backlinks/{slug}'),
+        ],
+    ),
+    'wiki_lineage': (
+        'Per-clergy lineage subsets embedded in wiki articles',
+        [
+            (2, 'wiki_lineage', '/api/wiki/lineage/{clergy_id}'),
+            (1, 'wiki_lineage_rows', '/api/wiki/lineage/{clergy_id}/table-rows'),
+        ],
+    ),
+    'mixed': (
+        'Approximate public traffic mix across all of the above',
+        [
+            (2, 'home', '/'),
+            (1, 'lineage_data', '/clergy/lineage-data'),
+            (1, 'chapel_locations', '/api/chapel-locations'),
+            (2, 'wiki_shell', '/wiki/{slug}'),
+            (6, 'wiki_page', '/api/wiki/page/{slug}'),
+            (1, 'wiki_pages', '/api/wiki/pages'),
+            (4, 'wiki_lineage', '/api/wiki/lineage/{clergy_id}'),
+            (2, 'wiki_lineage_rows', '/api/wiki/lineage/{clergy_id}/table-rows'),
+        ],
+    ),
+}
+
+PERCENTILES = (50, 90, 95, 99)
+_SERVER_TIMING_DB = re.compile(r'db;dur=([\d.]+)(?:;desc="(\d+) queries")?')
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--scenario', default='mixed', choices=sorted(SCENARIOS))
+    parser.add_argument('--list', action='store_true', help='list scenarios and exit')
+    parser.add_argument('--base-url', help='target a running server instead of the in-process test client')
+    parser.add_argument('--concurrency', type=int, default=2, help='client threads (default 2, one per gunicorn worker)')
+    parser.add_argument('--duration', type=float, default=20.0, help='seconds to run (default 20)')
+    parser.add_argument('--requests', type=int, help='stop after this many recorded requests instead of --duration')
+    parser.add_argument('--warmup', type=int, default=10, help='unrecorded requests before measuring (default 10)')
+    parser.add_argument('--timeout', type=float, default=30.0, help='per-request timeout for --base-url (default 30)')
+    parser.add_argument('--seed', type=int, default=1, help='dataset and request-mix seed')
+    parser.add_argument('--clergy', type=int, default=10000, help='synthetic clergy count for the in-process runner')
+    parser.add_argument('--database-url', help='in-process runner database (default: SQLite file in temp directory)')
+    parser.add_argument('--output', help='write JSON report to this path')
+    return parser.parse_args(argv)
+
+
+class _TestClientRunner:
+    """Flask test client; one client per thread."""
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def get(self, path):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.get(path)
+        return response.status_code, len(response.get_data()), response.headers.get('Server-Timing')
+
+
+class _HttpRunner:
+    """Keep-alive HTTP connection per thread, reconnecting after errors."""
+
+    def __init__(self, base_url, timeout):
+        parsed = urlparse(base_url)
+        self.https = parsed.scheme == 'https'
+        self.netloc = parsed.netloc
+        self.prefix = parsed.path.rstrip('/')
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            cls = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+            conn = self._local.conn = cls(self.netloc, timeout=self.timeout)
+        return conn
+
+    def get(self, path):
+        conn = self._connection()
+        try:
+            conn.request('GET', self.prefix + path, headers={'Accept-Encoding': 'gzip'})
+            response = conn.getresponse()
+            body = response.read()
+        except Exception:
+            conn.close()
+            self._local.conn = None
+            raise
+        if response.getheader('Connection', '').lower() == 'close':
+            conn.close()
+            self._local.conn = None
+        return response.status, len(body), response.getheader('Server-Timing')
+
+
+def _get_json(runner, path):
+    if isinstance(runner, _TestClientRunner):
+        with runner.app.test_client() as client:
+            return client.get(path).get_json()
+    conn = runner._connection()
+    conn.request('GET', runner.prefix + path)
+    return json.loads(conn.getresponse().read())
+
+
+def _sample_params(runner):
+    """Clergy IDs and wiki slugs to substitute into path templates."""
+    clergy = _get_json(runner, '/api/wiki/all-clergy') or []
+    pages = _get_json(runner, '/api/wiki/pages') or []
+    clergy_ids = [c['id'] for c in clergy]
+    slugs = [p['title'] for p in pages if p.get('title') and p.get('is_visible') and not p.get('is_deleted')]
+    if not clergy_ids:
+        raise SystemExit('No clergy found; generate data first (flask gen-lineage).')
+    return clergy_ids, slugs or [clergy[0]['name']]
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class _Recorder:
+    """Thread-safe per-label samples."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = {}
+
+    def add(self, label, elapsed_ms, status, nbytes, server_timing):
+        db_ms = queries = None
+        if server_timing:
+            match = _SERVER_TIMING_DB.search(server_timing)
+            if match:
+                db_ms = float(match.group(1))
+                queries = int(match.group(2)) if match.group(2) else None
+        with self.lock:
+            self.samples.setdefault(label, []).append((elapsed_ms, status, nbytes, db_ms, queries))
+
+
+def _summarize(samples, wall_s):
+    latencies = sorted(s[0] for s in samples)
+    errors = sum(1 for s in samples if s[1] is None or s[1] >= 400)
+    db_times = [s[3] for s in samples if s[3] is not None]
+    query_counts = [s[4] for s in samples if s[4] is not None]
+    summary = {
+        'requests': len(samples),
+        'errors': errors,
+        'rps': round(len(samples) / wall_s, 2) if wall_s else None,
+        'mean_ms': round(sum(latencies) / len(latencies), 2) if latencies else None,
+        'max_ms': round(latencies[-1], 2) if latencies else None,
+        'avg_bytes': int(sum(s[2] for s in samples) / len(samples)) if samples else 0,
+    }
+    for pct in PERCENTILES:
+        value = _percentile(latencies, pct)
+        summary[f'p{pct}_ms'] = round(value, 2) if value is not None else None
+    if db_times:
+        summary['avg_db_ms'] = round(sum(db_times) / len(db_times), 2)
+    if query_counts:
+        summary['avg_queries'] = round(sum(query_counts) / len(query_counts), 1)
+    return summary
+
+
+def run_scenario(runner, scenario, concurrency, duration=None, total_requests=None, warmup=0, seed=1):
+    """Drive ``runner`` with the scenario's request mix; return the report dict."""
+    _, mix = SCENARIOS[scenario]
+    weights = [w for w, _, _ in mix]
+    clergy_ids, slugs = _sample_params(runner)
+    recorder = _Recorder()
+    counter_lock = threading.Lock()
+    remaining = {'warmup': warmup, 'record': total_requests}
+    stop = threading.Event()
+
+    def next_request(rng):
+        _, label, template = rng.choices(mix, weights=weights)[0]
+        path = template.format(
+            clergy_id=rng.choice(clergy_ids),
+            slug=quote(rng.choice(slugs), safe=''),
+        )
+        return label, path
+
+    def take_ticket(phase):
+        """Claim one request from the phase budget (None = unlimited)."""
+        with counter_lock:
+            if remaining[phase] is None:
+                return True
+            if remaining[phase] <= 0:
+                return False
+            remaining[phase] -= 1
+            return True
+
+    def worker(index, phase):
+        rng = random.Random(seed * 1000 + index + (0 if phase == 'record' else 500))
+        while not stop.is_set() and take_ticket(phase):
+            label, path = next_request(rng)
+            start = time.perf_counter()
+            try:
+                status, nbytes, server_timing = runner.get(path)
+            except Exception:
+                status, nbytes, server_timing = None, 0, None
+            if phase == 'record':
+                recorder.add(label, (time.perf_counter() - start) * 1000.0, status, nbytes, server_timing)
+
+    if warmup > 0:
+        threads = [threading.Thread(target=worker, args=(i, 'warmup'), daemon=True) for i in range(concurrency)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    threads = [threading.Thread(target=worker, args=(i, 'record'), daemon=True) for i in range(concurrency)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    if total_requests is None:
+        time.sleep(duration)
+        stop.set()
+    for t in threads:
+        t.join()
+    wall_s = time.perf_counter() - started
+
+    all_samples = [s for samples in recorder.samples.values() for s in samples]
+    return {
+        'scenario': scenario,
+        'concurrency': concurrency,
+        'wall_s': round(wall_s, 2),
+        'total': _summarize(all_samples, wall_s),
+        'by_request': {
+            label: _summarize(samples, wall_s) for label, samples in sorted(recorder.samples.items())
+        },
+    }
+
+
+def _print_report(report):
+    print(
+        f'\n{report["scenario"]}: {report["concurrency"]} threads, {report["wall_s"]}s',
+        file=sys.stderr,
+    )
+    header = f'{"request":<20} {"n":>6} {"err":>4} {"rps":>8} ' + ' '.join(
+        f'{"p" + str(p):>8}' for p in PERCENTILES
+    ) + f' {"max":>8} {"db ms":>7} {"queries":>7}'
+    print(header, file=sys.stderr)
+    rows = list(report['by_request'].items()) + [('TOTAL', report['total'])]
+    for label, s in rows:
+        line = f'{label:<20} {s["requests"]:>6} {s["errors"]:>4} {s["rps"] or 0:>8.1f} '
+        line += ' '.join(f'{s[f"p{p}_ms"] or 0:>8.1f}' for p in PERCENTILES)
+        line += f' {s["max_ms"] or 0:>8.1f} {s.get("avg_db_ms", ""):>7} {s.get("avg_queries", ""):>7}'
+        print(line, file=sys.stderr)
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    if args.list:
+        for name, (description, mix) in sorted(SCENARIOS.items()):
+            print(f'{name:<18} {description}')
+            for weight, label, template in mix:
+                print(f'    {weight:>2} x {label:<20} {template}')
+        return 0
+
+    meta = {
+        'timestamp': datetime.utcnow().isoformat() + 'Z',
+        'python': platform.python_version(),
+        'seed': args.seed,
+    }
+    if args.base_url:
+        runner = _HttpRunner(args.base_url, args.timeout)
+        meta['target'] = args.base_url
+    else:
+        if args.database_url:
+            os.environ['DATABASE_URL'] = args.database_url
+        else:
+            path = os.path.join(tempfile.gettempdir(), f'lineage_bench_{args.clergy}_{args.seed}.sqlite')
+            os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+        os.environ.setdefault('SECRET_KEY', 'loadtest')
+        from app import app
+        from models import Clergy
+        from services.synthetic_lineage import generate_lineage
+
+        with app.app_context():
+            if Clergy.query.count() == 0:
+                counts = generate_lineage(args.clergy, seed=args.seed)
+                print(f'Generated dataset {counts}', file=sys.stderr)
+        runner = _TestClientRunner(app)
+        meta['target'] = 'test_client ' + os.environ['DATABASE_URL']
+
+    report = run_scenario(
+        runner,
+        args.scenario,
+        concurrency=args.concurrency,
+        duration=args.duration,
+        total_requests=args.requests,
+        warmup=args.warmup,
+        seed=args.seed,
+    )
+    report['meta'] = meta
+    _print_report(report)
+    payload = json.dumps(report, indent=2)
+    print(payload)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(payload + '\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
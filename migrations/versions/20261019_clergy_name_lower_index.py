@@ -0,0 +1,25 @@
+"""Add lower(name) index on clergy for case-insensitive name lookups
+
+Revision ID: 20261019_clergy_name_lower_index
+Revises: 20261019_lineage_clergy_indexes
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+
+
+revision = '20261019_clergy_name_lower_index'
+down_revision = '20261019_lineage_clergy_indexes'
+branch_labels = None
+depends_on = None
+
+
+# Raw SQL with IF [NOT] EXISTS: SQLite's inspector does not reflect expression indexes
+
+
+def upgrade():
+    op.execute('CREATE INDEX IF NOT EXISTS ix_clergy_name_lower ON clergy (lower(name))')
+
+
+def downgrade():
+    op.execute('DROP INDEX IF EXISTS ix_clergy_name_lower')
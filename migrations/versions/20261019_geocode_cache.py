@@ -0,0 +1,42 @@
+"""Add geocode_cache table
+
+Revision ID: 20261019_geocode_cache
+Revises: 20261019_wiki_page_updated_at_index
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '20261019_geocode_cache'
+down_revision = '20261019_wiki_page_updated_at_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    if 'geocode_cache' not in inspector.get_table_names():
+        op.create_table(
+            'geocode_cache',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('kind', sa.String(length=10), nullable=False),
+            sa.Column('query_key', sa.String(length=255), nullable=False),
+            sa.Column('backend', sa.String(length=20), nullable=False),
+            sa.Column('result', sa.Text(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.Column('expires_at', sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('kind', 'query_key', name='uq_geocode_cache_query')
+        )
+        op.create_index('ix_geocode_cache_expires_at', 'geocode_cache', ['expires_at'])
+
+
+def downgrade():
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    if 'geocode_cache' in inspector.get_table_names():
+        op.drop_index('ix_geocode_cache_expires_at', table_name='geocode_cache')
+        op.drop_table('geocode_cache')
@@ -0,0 +1,36 @@
+"""Index ordination.clergy_id and consecration.clergy_id for ancestor walks
+
+Revision ID: 20261019_lineage_clergy_indexes
+Revises: 20261019_wiki_search_vector
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '20261019_lineage_clergy_indexes'
+down_revision = '20261019_wiki_search_vector'
+branch_labels = None
+depends_on = None
+
+INDEXES = (
+    ('ix_ordination_clergy_id', 'ordination'),
+    ('ix_consecration_clergy_id', 'consecration'),
+)
+
+
+def upgrade():
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    for name, table in INDEXES:
+        if name not in [i['name'] for i in inspector.get_indexes(table)]:
+            op.create_index(name, table, ['clergy_id'])
+
+
+def downgrade():
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    for name, table in INDEXES:
+        if name in [i['name'] for i in inspector.get_indexes(table)]:
+            op.drop_index(name, table_name=table)
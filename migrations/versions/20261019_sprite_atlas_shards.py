@@ -0,0 +1,56 @@
+"""Add shard and scale columns for sharded sprite atlases
+
+Revision ID: 20261019_sprite_atlas_shards
+Revises: 20261019_sprite_sheet_jobs
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '20261019_sprite_atlas_shards'
+down_revision = '20261019_sprite_sheet_jobs'
+branch_labels = None
+depends_on = None
+
+
+SPRITE_SHEET_COLUMNS = [
+    sa.Column('atlas_id', sa.Integer(), nullable=True),
+    sa.Column('shard_index', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('scale', sa.Integer(), nullable=False, server_default='1'),
+    sa.Column('image_format', sa.String(length=10), nullable=False, server_default='jpeg'),
+    sa.Column('shard_capacity', sa.Integer(), nullable=True),
+]
+
+
+def upgrade():
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    sheet_columns = [c['name'] for c in inspector.get_columns('sprite_sheets')]
+    for column in SPRITE_SHEET_COLUMNS:
+        if column.name not in sheet_columns:
+            op.add_column('sprite_sheets', column)
+    if 'ix_sprite_sheets_atlas_id' not in [i['name'] for i in inspector.get_indexes('sprite_sheets')]:
+        op.create_index('ix_sprite_sheets_atlas_id', 'sprite_sheets', ['atlas_id'])
+
+    position_columns = [c['name'] for c in inspector.get_columns('clergy_sprite_positions')]
+    if 'shard_index' not in position_columns:
+        op.add_column(
+            'clergy_sprite_positions',
+            sa.Column('shard_index', sa.Integer(), nullable=False, server_default='0')
+        )
+
+
+def downgrade():
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    position_columns = [c['name'] for c in inspector.get_columns('clergy_sprite_positions')]
+    if 'shard_index' in position_columns:
+        op.drop_column('clergy_sprite_positions', 'shard_index')
+    if 'ix_sprite_sheets_atlas_id' in [i['name'] for i in inspector.get_indexes('sprite_sheets')]:
+        op.drop_index('ix_sprite_sheets_atlas_id', table_name='sprite_sheets')
+    sheet_columns = [c['name'] for c in inspector.get_columns('sprite_sheets')]
+    for column in reversed(SPRITE_SHEET_COLUMNS):
+        if column.name in sheet_columns:
+            op.drop_column('sprite_sheets', column.name)
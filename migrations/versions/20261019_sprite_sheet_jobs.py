@@ -0,0 +1,55 @@
+"""Add sprite_sheet_jobs and sprite_sheet_requests tables
+
+Revision ID: 20261019_sprite_sheet_jobs
+Revises: 20260313_refine_tag_system
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '20261019_sprite_sheet_jobs'
+down_revision = '20260313_refine_tag_system'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    tables = inspector.get_table_names()
+    if 'sprite_sheet_jobs' not in tables:
+        op.create_table(
+            'sprite_sheet_jobs',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('status', sa.String(length=20), nullable=False, server_default='idle'),
+            sa.Column('debounce_until', sa.DateTime(), nullable=True),
+            sa.Column('lease_owner', sa.String(length=200), nullable=True),
+            sa.Column('lease_expires_at', sa.DateTime(), nullable=True),
+            sa.Column('claimed_request_id', sa.Integer(), nullable=True),
+            sa.Column('started_at', sa.DateTime(), nullable=True),
+            sa.Column('completed_at', sa.DateTime(), nullable=True),
+            sa.Column('sprite_sheet_id', sa.Integer(), nullable=True),
+            sa.Column('error', sa.Text(), nullable=True),
+            sa.ForeignKeyConstraint(['sprite_sheet_id'], ['sprite_sheets.id']),
+            sa.PrimaryKeyConstraint('id')
+        )
+    if 'sprite_sheet_requests' not in tables:
+        op.create_table(
+            'sprite_sheet_requests',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('clergy_id', sa.Integer(), nullable=True),
+            sa.Column('requested_at', sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint('id')
+        )
+
+
+def downgrade():
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    tables = inspector.get_table_names()
+    if 'sprite_sheet_requests' in tables:
+        op.drop_table('sprite_sheet_requests')
+    if 'sprite_sheet_jobs' in tables:
+        op.drop_table('sprite_sheet_jobs')
@@ -0,0 +1,37 @@
+"""Add position_slots blob and retired_at to sprite_sheets
+
+Revision ID: 20261019_sprite_sheet_retention
+Revises: 20261019_sprite_atlas_shards
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '20261019_sprite_sheet_retention'
+down_revision = '20261019_sprite_atlas_shards'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    columns = [c['name'] for c in inspector.get_columns('sprite_sheets')]
+    if 'position_slots' not in columns:
+        op.add_column('sprite_sheets', sa.Column('position_slots', sa.Text(), nullable=True))
+    if 'retired_at' not in columns:
+        op.add_column('sprite_sheets', sa.Column('retired_at', sa.DateTime(), nullable=True))
+        # Sheets already replaced start their grace period now
+        op.execute("UPDATE sprite_sheets SET retired_at = CURRENT_TIMESTAMP WHERE is_current IS NOT TRUE")
+
+
+def downgrade():
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    columns = [c['name'] for c in inspector.get_columns('sprite_sheets')]
+    if 'retired_at' in columns:
+        op.drop_column('sprite_sheets', 'retired_at')
+    if 'position_slots' in columns:
+        op.drop_column('sprite_sheets', 'position_slots')
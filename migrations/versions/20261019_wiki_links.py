@@ -0,0 +1,38 @@
+"""Add wiki_links table
+
+Revision ID: 20261019_wiki_links
+Revises: 20261019_sprite_sheet_retention
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '20261019_wiki_links'
+down_revision = '20261019_sprite_sheet_retention'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    if 'wiki_links' not in inspector.get_table_names():
+        op.create_table(
+            'wiki_links',
+            sa.Column('source_page_id', sa.Integer(), nullable=False),
+            sa.Column('target_slug', sa.String(length=200), nullable=False),
+            sa.ForeignKeyConstraint(['source_page_id'], ['wiki_page.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('source_page_id', 'target_slug')
+        )
+        op.create_index('ix_wiki_links_target_slug', 'wiki_links', ['target_slug'])
+    # Existing pages are indexed with `flask wiki-backfill-links`
+
+
+def downgrade():
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    if 'wiki_links' in inspector.get_table_names():
+        op.drop_index('ix_wiki_links_target_slug', table_name='wiki_links')
+        op.drop_table('wiki_links')
@@ -0,0 +1,38 @@
+"""Make wiki_page.updated_at NOT NULL and index (updated_at, id) for paginated listings
+
+Revision ID: 20261019_wiki_page_updated_at_index
+Revises: 20261019_wiki_revisions
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '20261019_wiki_page_updated_at_index'
+down_revision = '20261019_wiki_revisions'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    conn = op.get_bind()
+    # Keyset pages compare updated_at, so a NULL would drop the page from every listing page
+    op.execute('UPDATE wiki_page SET updated_at = CURRENT_TIMESTAMP WHERE updated_at IS NULL')
+    with op.batch_alter_table('wiki_page') as batch_op:
+        batch_op.alter_column('updated_at', existing_type=sa.DateTime(), nullable=False)
+
+    inspector = sa.inspect(conn)
+    indexes = [i['name'] for i in inspector.get_indexes('wiki_page')]
+    if 'ix_wiki_page_updated_at' not in indexes:
+        op.create_index('ix_wiki_page_updated_at', 'wiki_page', ['updated_at', 'id'])
+
+
+def downgrade():
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    indexes = [i['name'] for i in inspector.get_indexes('wiki_page')]
+    if 'ix_wiki_page_updated_at' in indexes:
+        op.drop_index('ix_wiki_page_updated_at', table_name='wiki_page')
+    with op.batch_alter_table('wiki_page') as batch_op:
+        batch_op.alter_column('updated_at', existing_type=sa.DateTime(), nullable=True)
@@ -0,0 +1,51 @@
+"""Add wiki_rendered_pages and wiki_graph_version tables
+
+Revision ID: 20261019_wiki_rendered_pages
+Revises: 20261019_wiki_links
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '20261019_wiki_rendered_pages'
+down_revision = '20261019_wiki_links'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    tables = inspector.get_table_names()
+    if 'wiki_rendered_pages' not in tables:
+        op.create_table(
+            'wiki_rendered_pages',
+            sa.Column('page_id', sa.Integer(), nullable=False),
+            sa.Column('audience', sa.String(length=10), nullable=False),
+            sa.Column('edit_count', sa.Integer(), nullable=False),
+            sa.Column('graph_version', sa.Integer(), nullable=False),
+            sa.Column('html', sa.Text(), nullable=False),
+            sa.Column('rendered_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['page_id'], ['wiki_page.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('page_id', 'audience')
+        )
+    if 'wiki_graph_version' not in tables:
+        op.create_table(
+            'wiki_graph_version',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('version', sa.Integer(), nullable=False, server_default='0'),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.execute("INSERT INTO wiki_graph_version (id, version) VALUES (1, 0)")
+
+
+def downgrade():
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    tables = inspector.get_table_names()
+    if 'wiki_graph_version' in tables:
+        op.drop_table('wiki_graph_version')
+    if 'wiki_rendered_pages' in tables:
+        op.drop_table('wiki_rendered_pages')
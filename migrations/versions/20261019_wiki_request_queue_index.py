@@ -0,0 +1,26 @@
+"""Add queue-order index on wiki_article_requests
+
+Revision ID: 20261019_wiki_request_queue_index
+Revises: 20261019_clergy_name_lower_index
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+
+
+revision = '20261019_wiki_request_queue_index'
+down_revision = '20261019_clergy_name_lower_index'
+branch_labels = None
+depends_on = None
+
+
+# Raw SQL with IF [NOT] EXISTS: SQLite's inspector does not reflect DESC index columns
+def upgrade():
+    op.execute(
+        'CREATE INDEX IF NOT EXISTS ix_wiki_article_requests_queue ON wiki_article_requests '
+        '(is_handled, request_count DESC, last_requested_at DESC, id DESC)'
+    )
+
+
+def downgrade():
+    op.execute('DROP INDEX IF EXISTS ix_wiki_article_requests_queue')
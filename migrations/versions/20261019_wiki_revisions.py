@@ -0,0 +1,46 @@
+"""Add wiki_revisions table
+
+Revision ID: 20261019_wiki_revisions
+Revises: 20261019_wiki_request_queue_index
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '20261019_wiki_revisions'
+down_revision = '20261019_wiki_request_queue_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    if 'wiki_revisions' not in inspector.get_table_names():
+        op.create_table(
+            'wiki_revisions',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('page_id', sa.Integer(), nullable=False),
+            sa.Column('revision_number', sa.Integer(), nullable=False),
+            sa.Column('base_revision', sa.Integer(), nullable=False),
+            sa.Column('title', sa.String(length=200), nullable=True),
+            sa.Column('data', sa.LargeBinary(), nullable=False),
+            sa.Column('content_hash', sa.String(length=40), nullable=False),
+            sa.Column('content_length', sa.Integer(), nullable=False),
+            sa.Column('editor_id', sa.Integer(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(['page_id'], ['wiki_page.id'], ondelete='CASCADE'),
+            sa.ForeignKeyConstraint(['editor_id'], ['user.id']),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('page_id', 'revision_number', name='uq_wiki_revision_page_number')
+        )
+    # Pages get their current text as revision 1 on their next save
+
+
+def downgrade():
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    if 'wiki_revisions' in inspector.get_table_names():
+        op.drop_table('wiki_revisions')
@@ -0,0 +1,48 @@
+"""Add search_vector tsvector column and GIN index to wiki_page
+
+Revision ID: 20261019_wiki_search_vector
+Revises: 20261019_wiki_rendered_pages
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = '20261019_wiki_search_vector'
+down_revision = '20261019_wiki_rendered_pages'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    columns = [c['name'] for c in inspector.get_columns('wiki_page')]
+    if conn.dialect.name != 'postgresql':
+        # Unused placeholder so the model's column exists; search falls back to an in-process index
+        if 'search_vector' not in columns:
+            op.add_column('wiki_page', sa.Column('search_vector', sa.Text(), nullable=True))
+        return
+    if 'search_vector' not in columns:
+        op.add_column('wiki_page', sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+        op.execute(
+            "UPDATE wiki_page SET search_vector = "
+            "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(markdown, '')), 'B')"
+        )
+    indexes = [i['name'] for i in inspector.get_indexes('wiki_page')]
+    if 'ix_wiki_page_search_vector' not in indexes:
+        op.create_index('ix_wiki_page_search_vector', 'wiki_page', ['search_vector'], postgresql_using='gin')
+
+
+def downgrade():
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    indexes = [i['name'] for i in inspector.get_indexes('wiki_page')]
+    if 'ix_wiki_page_search_vector' in indexes:
+        op.drop_index('ix_wiki_page_search_vector', table_name='wiki_page')
+    columns = [c['name'] for c in inspector.get_columns('wiki_page')]
+    if 'search_vector' in columns:
+        op.drop_column('wiki_page', 'search_vector')
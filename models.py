@@ -1,4 +1,5 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from datetime import datetime
 import json
 
@@ -118,6 +119,9 @@ class Clergy(db.Model):
     deleted_at = db.Column(db.DateTime, nullable=True)
     exclude_from_visualization = db.Column(db.Boolean, default=False, nullable=False)
 
+    # Case-insensitive name lookups (wiki shortcodes, by-name API)
+    __table_args__ = (db.Index('ix_clergy_name_lower', db.func.lower(name)),)
+
     # Relationships
     statuses = db.relationship('Status', secondary='clergy_statuses', backref='clergy_members')
     tags = db.relationship('Tag', secondary='clergy_tags', back_populates='clergy')
@@ -303,7 +307,7 @@ class Tag(db.Model):
 
 class Ordination(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    clergy_id = db.Column(db.Integer, db.ForeignKey('clergy.id'), nullable=False)
+    clergy_id = db.Column(db.Integer, db.ForeignKey('clergy.id'), nullable=False, index=True)
     date = db.Column(db.Date, nullable=True)
     year = db.Column(db.Integer, nullable=True)
     ordaining_bishop_id = db.Column(db.Integer, db.ForeignKey('clergy.id'), nullable=True)
@@ -337,7 +341,7 @@ class Ordination(db.Model):
 
 class Consecration(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    clergy_id = db.Column(db.Integer, db.ForeignKey('clergy.id'), nullable=False)
+    clergy_id = db.Column(db.Integer, db.ForeignKey('clergy.id'), nullable=False, index=True)
     date = db.Column(db.Date, nullable=True)
     year = db.Column(db.Integer, nullable=True)
     consecrator_id = db.Column(db.Integer, db.ForeignKey('clergy.id'), nullable=True)
@@ -449,16 +453,25 @@ class SpriteSheet(db.Model):
     num_images = db.Column(db.Integer, nullable=False)  # Number of images in sprite sheet
     is_current = db.Column(db.Boolean, default=True)  # Mark the current/latest sprite sheet
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Sharded atlases: one row per (shard, scale) image; atlas_id is the shard 0 / 1x row
+    atlas_id = db.Column(db.Integer, nullable=True, index=True)  # NULL for legacy single-image sheets
+    shard_index = db.Column(db.Integer, nullable=False, default=0)
+    scale = db.Column(db.Integer, nullable=False, default=1)  # 1x or 2x pixel density
+    image_format = db.Column(db.String(10), nullable=False, default='jpeg')
+    shard_capacity = db.Column(db.Integer, nullable=True)  # Tiles per shard
+    # Atlas root only: compact JSON [clergy_id, slot, clergy_id, slot, ...] replacing per-clergy position rows
+    position_slots = db.Column(db.Text, nullable=True)
+    retired_at = db.Column(db.DateTime, nullable=True)  # When it stopped being current; pruned after a grace period
     
     # Relationships
     positions = db.relationship('ClergySpritePosition', backref='sprite_sheet', cascade='all, delete-orphan')
     
     def __repr__(self):
-        return f'<SpriteSheet {self.id} - {self.num_images} images - {"CURRENT" if self.is_current else "OLD"}>'
+        return f'<SpriteSheet {self.id} - shard {self.shard_index}@{self.scale}x - {self.num_images} images - {"CURRENT" if self.is_current else "OLD"}>'
 
 
 class ClergySpritePosition(db.Model):
-    """Track each clergy member's position in a sprite sheet"""
+    """Track each clergy member's position in a legacy sprite sheet (atlases use SpriteSheet.position_slots)"""
     __tablename__ = 'clergy_sprite_positions'
     
     id = db.Column(db.Integer, primary_key=True)
@@ -466,6 +479,7 @@ class ClergySpritePosition(db.Model):
     sprite_sheet_id = db.Column(db.Integer, db.ForeignKey('sprite_sheets.id'), nullable=False)
     x_position = db.Column(db.Integer, nullable=False)  # X coordinate in pixels
     y_position = db.Column(db.Integer, nullable=False)  # Y coordinate in pixels
+    shard_index = db.Column(db.Integer, nullable=False, default=0)  # Atlas shard holding the tile
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationships
@@ -475,7 +489,38 @@ class ClergySpritePosition(db.Model):
     __table_args__ = (db.UniqueConstraint('clergy_id', 'sprite_sheet_id', name='_clergy_sprite_uc'),)
     
     def __repr__(self):
-        return f'<ClergySpritePosition clergy_id={self.clergy_id} sprite_sheet_id={self.sprite_sheet_id} pos=({self.x_position},{self.y_position})>'
+        return f'<ClergySpritePosition clergy_id={self.clergy_id} sprite_sheet_id={self.sprite_sheet_id} pos=({self.x_position},{self.y_position}) shard={self.shard_index}>'
+
+
+class SpriteSheetJob(db.Model):
+    """Single-row lease and status for sprite sheet regeneration, shared by all workers"""
+    __tablename__ = 'sprite_sheet_jobs'
+
+    id = db.Column(db.Integer, primary_key=True)  # Always 1
+    status = db.Column(db.String(20), nullable=False, default='idle')  # idle, pending, in_progress, completed, error
+    debounce_until = db.Column(db.DateTime, nullable=True)  # Earliest start while edits keep arriving
+    lease_owner = db.Column(db.String(200), nullable=True)  # host:pid of the worker running the rebuild
+    lease_expires_at = db.Column(db.DateTime, nullable=True)
+    claimed_request_id = db.Column(db.Integer, nullable=True)  # Requests up to this id are being processed
+    started_at = db.Column(db.DateTime, nullable=True)
+    completed_at = db.Column(db.DateTime, nullable=True)
+    sprite_sheet_id = db.Column(db.Integer, db.ForeignKey('sprite_sheets.id'), nullable=True)
+    error = db.Column(db.Text, nullable=True)
+
+    def __repr__(self):
+        return f'<SpriteSheetJob {self.status} lease={self.lease_owner}>'
+
+
+class SpriteSheetRequest(db.Model):
+    """Pending sprite regeneration request; coalesced and deleted once processed"""
+    __tablename__ = 'sprite_sheet_requests'
+
+    id = db.Column(db.Integer, primary_key=True)
+    clergy_id = db.Column(db.Integer, nullable=True)  # NULL requests a full rebuild
+    requested_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<SpriteSheetRequest {self.id} clergy_id={self.clergy_id}>'
 
 class AuditLog(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -498,13 +543,20 @@ class WikiPage(db.Model):
     title = db.Column(db.String(200), nullable=True) # Optional title, especially if linked to clergy
     clergy_id = db.Column(db.Integer, db.ForeignKey('clergy.id'), nullable=True)
     markdown = db.Column(db.Text, nullable=True) # The actual content
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
     edit_count = db.Column(db.Integer, default=0)
     is_visible = db.Column(db.Boolean, default=True)
     category = db.Column(db.String(100), nullable=True)
     is_deleted = db.Column(db.Boolean, default=False)
     author_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
     last_editor_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
+    # Weighted title + markdown tsvector, maintained by services.wiki_search (PostgreSQL only)
+    search_vector = db.deferred(db.Column(db.Text().with_variant(TSVECTOR(), 'postgresql'), nullable=True))
+
+    __table_args__ = (
+        db.Index('ix_wiki_page_search_vector', 'search_vector', postgresql_using='gin'),
+        db.Index('ix_wiki_page_updated_at', 'updated_at', 'id'),  # Listings, newest first (services.wiki_pages)
+    )
 
     # Relationships
     clergy = db.relationship('Clergy', backref='wiki_page')
@@ -515,6 +567,73 @@ class WikiPage(db.Model):
         return f'<WikiPage {self.title or self.id}>'
 
 
+class WikiLink(db.Model):
+    """One [[target]] link from a wiki page body, kept in sync on save"""
+    __tablename__ = 'wiki_links'
+
+    source_page_id = db.Column(db.Integer, db.ForeignKey('wiki_page.id', ondelete='CASCADE'), primary_key=True)
+    target_slug = db.Column(db.String(200), primary_key=True, index=True)
+
+    source_page = db.relationship('WikiPage', backref=db.backref('outgoing_links', cascade='all, delete-orphan'))
+
+    def __repr__(self):
+        return f'<WikiLink {self.source_page_id} -> {self.target_slug}>'
+
+
+class WikiRevision(db.Model):
+    """One saved version of a wiki page: a compressed snapshot or a delta (see services.wiki_revisions)"""
+    __tablename__ = 'wiki_revisions'
+
+    id = db.Column(db.Integer, primary_key=True)
+    page_id = db.Column(db.Integer, db.ForeignKey('wiki_page.id', ondelete='CASCADE'), nullable=False)
+    revision_number = db.Column(db.Integer, nullable=False)  # 1, 2, ... per page
+    base_revision = db.Column(db.Integer, nullable=False)  # Snapshot this delta chains from; == revision_number for snapshots
+    title = db.Column(db.String(200), nullable=True)
+    data = db.deferred(db.Column(db.LargeBinary, nullable=False))  # zlib-compressed markdown or delta
+    content_hash = db.Column(db.String(40), nullable=False)  # sha1 of the full markdown
+    content_length = db.Column(db.Integer, nullable=False)
+    editor_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (db.UniqueConstraint('page_id', 'revision_number', name='uq_wiki_revision_page_number'),)
+
+    page = db.relationship('WikiPage', backref=db.backref('revisions', lazy='dynamic', cascade='all, delete-orphan'))
+    editor = db.relationship('User', backref='wiki_revisions')
+
+    @property
+    def is_snapshot(self):
+        return self.revision_number == self.base_revision
+
+    def __repr__(self):
+        return f'<WikiRevision page={self.page_id} r{self.revision_number}>'
+
+
+class WikiRenderedPage(db.Model):
+    """Server-rendered HTML of a wiki page, valid for one edit_count and wiki graph version"""
+    __tablename__ = 'wiki_rendered_pages'
+
+    page_id = db.Column(db.Integer, db.ForeignKey('wiki_page.id', ondelete='CASCADE'), primary_key=True)
+    audience = db.Column(db.String(10), primary_key=True)  # public or editor (which pages count as existing)
+    edit_count = db.Column(db.Integer, nullable=False)
+    graph_version = db.Column(db.Integer, nullable=False)
+    html = db.Column(db.Text, nullable=False)
+    rendered_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<WikiRenderedPage {self.page_id} {self.audience} v{self.graph_version}>'
+
+
+class WikiGraphVersion(db.Model):
+    """Single-row counter bumped when pages appear, disappear or clergy data changes"""
+    __tablename__ = 'wiki_graph_version'
+
+    id = db.Column(db.Integer, primary_key=True)  # Always 1
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<WikiGraphVersion {self.version}>'
+
+
 class WikiArticleRequest(db.Model):
     __tablename__ = 'wiki_article_requests'
 
@@ -526,6 +645,14 @@ class WikiArticleRequest(db.Model):
     is_handled = db.Column(db.Boolean, default=False, nullable=False)
     handled_at = db.Column(db.DateTime, nullable=True)
 
+    # Queue order used by services.wiki_requests (position counts and keyset pages)
+    __table_args__ = (
+        db.Index(
+            'ix_wiki_article_requests_queue',
+            is_handled, request_count.desc(), last_requested_at.desc(), id.desc(),
+        ),
+    )
+
     clergy = db.relationship('Clergy', backref='wiki_article_requests')
 
     def __repr__(self):
@@ -540,3 +667,21 @@ class VisualizationSettings(db.Model):
 
     def __repr__(self):
         return f'<VisualizationSettings {self.setting_key}>'
+
+
+class GeocodeCache(db.Model):
+    """Cached geocoding answer for a normalized address or rounded coordinates (see services.geocoding)"""
+    __tablename__ = 'geocode_cache'
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(10), nullable=False)  # forward or reverse
+    query_key = db.Column(db.String(255), nullable=False)
+    backend = db.Column(db.String(20), nullable=False)
+    result = db.Column(db.Text, nullable=True)  # JSON; NULL caches "not found"
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    __table_args__ = (db.UniqueConstraint('kind', 'query_key', name='uq_geocode_cache_query'),)
+
+    def __repr__(self):
+        return f'<GeocodeCache {self.kind} {self.query_key!r}>'
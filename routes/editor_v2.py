@@ -1,8 +1,6 @@
 """Editor SPA: HTMX panels. Blueprint `editor` at /editor; templates/static under editor_v2/."""
 from flask import Blueprint, render_template, request, session, jsonify, current_app
 from sqlalchemy.orm import joinedload
-from sqlalchemy import text
-from datetime import datetime
 
 from models import (
     Clergy,
@@ -18,6 +16,9 @@ from models import (
     db,
 )
 from services import clergy as clergy_service
+from services import db_stats
+from services.wiki_links import sync_page_links
+from services.wiki_revisions import record_revision
 from services.clergy import _slugify_tag_label, _RESERVED_SYSTEM_TAG_NAMES
 from routes.editor_form_fields import FormFields
 from utils import require_permission
@@ -818,7 +819,12 @@ def panel_right():
 @editor.route('/panel/statusbar')
 @require_permission('edit_clergy')
 def panel_statusbar():
-    """Statusbar snippet for HTMX swap."""
+    """Statusbar snippet for HTMX swap.
+
+    Polled continuously, so it must stay cheap: liveness is a throttled
+    SELECT 1, counts come from a cached snapshot and latency from the rolling
+    window of real queries (services.db_stats).
+    """
     user = User.query.get(session['user_id']) if 'user_id' in session else None
 
     db_status = {
@@ -830,22 +836,22 @@ def panel_statusbar():
     }
 
     try:
-        start_time = datetime.now()
-        db.session.execute(text('SELECT 1'))
-        db.session.commit()
-        response_time_ms = (datetime.now() - start_time).total_seconds() * 1000
-
-        clergy_count = Clergy.query.filter(Clergy.is_deleted != True).count()  # noqa: E712
-        ordination_count = Ordination.query.count()
-        consecration_count = Consecration.query.count()
-        events_count = ordination_count + consecration_count
+        db_stats.check_database_alive()
+        counts = db_stats.get_stats_snapshot(
+            use_estimates=bool(current_app.config.get('STATUSBAR_USE_COUNT_ESTIMATES'))
+        )
+        latency = db_stats.get_latency_summary()
+        clergy_count = counts['clergy_count']
+        events_count = counts['events_count']
 
         db_status.update(
             {
                 'status': 'connected',
-                'response_time_ms': response_time_ms,
+                'response_time_ms': latency['p50_ms'],
+                'response_time_p95_ms': latency['p95_ms'],
                 'clergy_count': clergy_count,
                 'events_count': events_count,
+                'is_estimate': counts['is_estimate'],
                 'details': f'{clergy_count} clergy, {events_count} events',
             }
         )
@@ -918,7 +924,8 @@ def api_wiki_save_for_clergy():
     else:
         is_visible = str(is_visible_raw).strip().lower() in ('1', 'true', 'yes', 'on')
 
-    page = WikiPage.query.filter_by(clergy_id=clergy.id).first()
+    # Row lock: a concurrent save of the same page waits, then numbers its revision after ours
+    page = WikiPage.query.filter_by(clergy_id=clergy.id).with_for_update().first()
     if page:
         page.title = clergy.name
         page.markdown = content
@@ -938,6 +945,8 @@ def api_wiki_save_for_clergy():
         db.session.add(page)
         wiki_saved = 'created'
 
+    record_revision(page, session.get('user_id'))
+    sync_page_links(page)
     db.session.commit()
     return jsonify({'success': True, 'wiki_saved': wiki_saved, 'page_id': page.id})
 
@@ -1,6 +1,7 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify, current_app
-from utils import require_permission, log_audit_event
+from utils import require_permission, require_permission_api, log_audit_event
 from models import db, Organization, Location
+from services.location_geocoding import count_missing_locations, get_job_status, start_background_job
 
 locations_bp = Blueprint('locations', __name__)
 
@@ -57,6 +58,27 @@ def api_chapel_locations():
         return jsonify({'success': False, 'error': str(e), 'nodes': [], 'count': 0}), 500
 
 
+@locations_bp.route('/api/locations/geocode-missing', methods=['GET'])
+@require_permission_api('manage_metadata')
+def geocode_missing_status():
+    """Status of this worker's background geocoding job and how many locations still lack coordinates"""
+    return jsonify({'success': True, 'missing': count_missing_locations(), 'job': get_job_status()})
+
+
+@locations_bp.route('/api/locations/geocode-missing', methods=['POST'])
+@require_permission_api('manage_metadata')
+def geocode_missing_start():
+    """Start geocoding every active location without coordinates in the background"""
+    if not start_background_job():
+        return jsonify({'success': False, 'error': 'Geocoding job already running', 'job': get_job_status()}), 409
+    log_audit_event(
+        action='update',
+        entity_type='location',
+        details='Started batch geocoding of locations without coordinates'
+    )
+    return jsonify({'success': True, 'job': get_job_status()}), 202
+
+
 @locations_bp.route('/locations')
 @require_permission('manage_metadata')
 def locations_list():
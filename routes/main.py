@@ -1,6 +1,7 @@
 from flask import Blueprint, render_template, request, session, jsonify, current_app, g
 from models import Clergy, User, db, Organization, Rank, Ordination, Consecration
 from constants import GREEN_COLOR, BLACK_COLOR
+from utils import require_permission
 import json
 import base64
 
@@ -741,6 +742,31 @@ def debug_lineage_coverage():
         return jsonify({'error': 'failed', 'message': str(e)}), 500
 
 
+@main_bp.route('/debug/perf')
+@require_permission('manage_users')
+def debug_perf():
+    """Per-request SQL profiles recorded by services.db_stats (this worker only).
+
+    Add ?format=json for the raw payload.
+    """
+    from services import db_stats
+
+    payload = {
+        'profiling_enabled': bool(current_app.config.get('SQL_PROFILING_ENABLED')),
+        'latency': db_stats.get_latency_summary(),
+        'endpoints': db_stats.get_endpoint_summary(),
+        'recent_requests': db_stats.get_recent_request_profiles(),
+        'thresholds': {
+            'slow_query_ms': current_app.config.get('SQL_SLOW_QUERY_MS', db_stats.DEFAULT_SLOW_QUERY_MS),
+            'n_plus_one': current_app.config.get('SQL_N_PLUS_ONE_THRESHOLD', db_stats.DEFAULT_N_PLUS_ONE_THRESHOLD),
+        },
+    }
+    if request.args.get('format') == 'json':
+        return jsonify(payload)
+    user = User.query.get(session['user_id'])
+    return render_template('debug_perf.html', user=user, **payload)
+
+
 @main_bp.route('/favicon.ico')
 def favicon():
     return '', 204
@@ -157,6 +157,20 @@ def api_organizations():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@main_api_bp.route('/api/sprite-sheet')
+def api_sprite_sheet():
+    """Current sprite atlas: shard URLs per scale and {clergy_id: [x, y, shard]} positions"""
+    try:
+        from services.image_upload import get_image_upload_service
+        atlas = get_image_upload_service().describe_sprite_atlas()
+        if atlas is None:
+            return jsonify({'success': False, 'error': 'No sprite sheet available'}), 404
+        return jsonify(atlas)
+    except Exception as e:
+        current_app.logger.error(f"Error getting sprite sheet data: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
 @main_api_bp.route('/proxy-image')
 def proxy_image():
     image_url = request.args.get('url')
@@ -229,7 +243,8 @@ def reverse_geocode():
 def geocoding_status():
     return jsonify({
         'configured': geocoding_service.is_configured(),
-        'service': 'OpenCage' if geocoding_service.is_configured() else None
+        'service': 'OpenCage' if 'opencage' in geocoding_service.backend_names else None,
+        'backends': geocoding_service.backend_names
     })
 
 
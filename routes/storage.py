@@ -0,0 +1,19 @@
+"""Serve objects from the local storage backend (STORAGE_BACKEND=local)."""
+from flask import Blueprint, abort
+from services.storage import get_storage
+
+storage_bp = Blueprint('storage', __name__, url_prefix='/storage')
+
+
+@storage_bp.route('/<path:object_key>')
+def serve_object(object_key):
+    try:
+        storage = get_storage()
+    except Exception:
+        abort(404)
+    if not storage.serves_locally:
+        abort(404)
+    response = storage.send(object_key)
+    if response is None:
+        abort(404)
+    return response
@@ -1,16 +1,29 @@
 from flask import Blueprint, render_template, request, jsonify, session, current_app
 from sqlalchemy.orm import joinedload
 from services.image_upload import get_image_upload_service
-from models import db, WikiPage, WikiArticleRequest, User, Clergy, Ordination, Consecration, Organization, Rank
-from constants import GREEN_COLOR, BLACK_COLOR
+from services.wiki_lineage import get_ancestor_subset
+from services.wiki_links import sync_page_links, get_backlink_pages, get_orphan_pages, get_most_linked
+from services.wiki_revisions import record_revision, get_revision_content, diff_revisions
+from services.wiki_pages import list_page_summaries, list_dashboard_pages
+from services.wiki_requests import list_pending_requests, queue_position
+from services.wiki_search import search_pages
+from services.wiki_render import (
+    get_rendered_html, get_graph_version, load_clergy_summaries, find_clergy_id_by_name,
+    GraphVersionCache, AUDIENCE_EDITOR, AUDIENCE_PUBLIC,
+)
+from models import db, WikiPage, WikiRevision, WikiArticleRequest, User, Clergy, Ordination, Consecration, Organization, Rank
 from datetime import datetime
-from sqlalchemy import or_
 import json
 import base64
+import hashlib
 
 wiki_bp = Blueprint('wiki', __name__)
 
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+MAX_SUMMARY_IDS = 1000
+DASHBOARD_PAGE_SIZE = 100
+
+_profile_cache = GraphVersionCache(2048)  # clergy_id -> profile payload (None if not found)
 
 @wiki_bp.route('/wiki')
 def wiki():
@@ -24,31 +37,54 @@ def wiki_page(slug):
 def dashboard():
     if 'user_id' not in session:
         return render_template('auth/login.html', next='/wiki/dashboard')
-    
-    pages = WikiPage.query.order_by(WikiPage.updated_at.desc()).all()
-    return render_template('wiki_dashboard.html', pages=pages)
+
+    cursor = request.args.get('cursor')
+    try:
+        pages, next_cursor = list_dashboard_pages(DASHBOARD_PAGE_SIZE, cursor)
+    except ValueError:
+        cursor = None  # Malformed cursor: show the newest page
+        pages, next_cursor = list_dashboard_pages(DASHBOARD_PAGE_SIZE)
+    total = db.session.query(db.func.count(WikiPage.id)).scalar()
+    return render_template(
+        'wiki_dashboard.html',
+        pages=pages,
+        total=total,
+        next_cursor=next_cursor,
+        is_first_page=not cursor,
+    )
 
 # API Routes
 
 @wiki_bp.route('/api/wiki/pages', methods=['GET'])
 def get_pages():
-    """Get a list of all wiki pages."""
-    query = WikiPage.query
-    
+    """
+    List wiki pages (title and flags only), most recently updated first.
+
+    Optional keyset pagination: ?limit=N (max 500) and ?cursor= from the
+    previous response's X-Next-Cursor header. Without a limit every page is listed.
+    """
     # If not logged in, filter out invisible and deleted
-    if 'user_id' not in session:
-        query = query.filter_by(is_visible=True).filter_by(is_deleted=False)
-    
     # If logged in, we return EVERYTHING so the frontend can decide what to show based on mode
     # (The requirement is: admins see everything in edit mode)
-        
-    pages = query.all()
-    # Return objects with metadata
-    return jsonify([{
+    limit = request.args.get('limit', type=int)
+    if limit is not None:
+        limit = min(max(limit, 1), 500)
+    try:
+        pages, next_cursor = list_page_summaries(
+            include_hidden='user_id' in session, limit=limit, cursor=request.args.get('cursor'),
+        )
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
+
+    response = jsonify([{
         'title': p.title,
         'is_visible': p.is_visible,
-        'is_deleted': p.is_deleted
+        'is_deleted': p.is_deleted,
+        'updated_at': p.updated_at.isoformat() if p.updated_at else None,
     } for p in pages])
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
 
 def _no_page_payload():
     """Payload for missing or invisible wiki page (200, not 404)."""
@@ -72,6 +108,7 @@ def get_page(slug):
             'id': page.id,
             'title': page.title,
             'content': page.markdown,
+            'html': get_rendered_html(page, AUDIENCE_EDITOR if is_editor else AUDIENCE_PUBLIC) if page.markdown else None,
             'updated_at': page.updated_at.isoformat() if page.updated_at else None,
             'editor': page.last_editor.username if page.last_editor else None,
             'clergy_id': page.clergy_id,
@@ -139,12 +176,13 @@ def save_page():
             return jsonify({'error': 'Invalid clergy ID'}), 400
 
     # Check if page exists by title OR by clergy_id
+    # Row lock: a concurrent save of the same page waits, then numbers its revision after ours
     page = None
     if clergy_id:
-        page = WikiPage.query.filter_by(clergy_id=clergy_id).first()
+        page = WikiPage.query.filter_by(clergy_id=clergy_id).with_for_update().first()
     
     if not page:
-        page = WikiPage.query.filter_by(title=slug).first()
+        page = WikiPage.query.filter_by(title=slug).with_for_update().first()
     
     if page:
         page.title = slug # Update title just in case
@@ -172,7 +210,9 @@ def save_page():
             author_id=author_id
         )
         db.session.add(page)
-    
+
+    record_revision(page, user_id)
+    sync_page_links(page)
     db.session.commit()
     
     return jsonify({'success': True, 'title': page.title})
@@ -197,62 +237,135 @@ def restore_page(page_id):
     db.session.commit()
     return jsonify({'success': True})
 
-def _clergy_to_summary(clergy):
-    ords = [o for o in clergy.ordinations if not o.is_invalid]
-    cons = [c for c in clergy.consecrations if not c.is_invalid]
+def _revalidated_json(etag, build):
+    """
+    JSON response that clients revalidate with If-None-Match on every use.
+    build() returns the payload (None for 404) and only runs when the client's
+    copy is stale. Without an etag (graph version unavailable) it always builds.
+    """
+    if etag and request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    else:
+        payload = build()
+        if payload is None:
+            return jsonify({'error': 'Not found'}), 404
+        response = jsonify(payload)
+    if etag:
+        response.set_etag(etag)
+    response.headers['Cache-Control'] = 'public, no-cache'
+    return response
+
+
+def _graph_etag(kind, key, graph_version):
+    if graph_version is None:
+        return None
+    digest = hashlib.sha1(str(key).encode('utf-8')).hexdigest()[:16]
+    return f'{kind}-{graph_version}-{digest}'
+
+
+def _page_for_history(page_id):
+    """Page whose history the current user may read, or None (same visibility as get_page)."""
+    page = db.session.get(WikiPage, page_id)
+    if page is None:
+        return None
+    if 'user_id' not in session and (not page.is_visible or page.is_deleted):
+        return None
+    return page
+
+
+def _revision_payload(revision):
     return {
-        'id': clergy.id,
-        'name': clergy.name,
-        'rank': clergy.rank or '',
-        'organization': clergy.organization or '',
-        'date_of_birth': clergy.date_of_birth.isoformat() if clergy.date_of_birth else None,
-        'date_of_death': clergy.date_of_death.isoformat() if clergy.date_of_death else None,
-        'ordinations': [{'display_date': o.display_date, 'ordaining_bishop_name': o.ordaining_bishop.name if o.ordaining_bishop else ''} for o in ords],
-        'consecrations': [{'display_date': c.display_date, 'consecrator_name': c.consecrator.name if c.consecrator else ''} for c in cons],
+        'revision': revision.revision_number,
+        'title': revision.title,
+        'created_at': revision.created_at.isoformat() if revision.created_at else None,
+        'editor': revision.editor.username if revision.editor else None,
+        'length': revision.content_length,
     }
 
 
-@wiki_bp.route('/api/wiki/clergy/summaries', methods=['GET'])
+@wiki_bp.route('/api/wiki/page/<int:page_id>/revisions', methods=['GET'])
+def list_page_revisions(page_id):
+    """Revision history of a page, newest first."""
+    page = _page_for_history(page_id)
+    if page is None:
+        return jsonify({'error': 'Not found'}), 404
+    revisions = (
+        page.revisions
+        .options(joinedload(WikiRevision.editor))
+        .order_by(WikiRevision.revision_number.desc())
+        .all()
+    )
+    return jsonify([_revision_payload(r) for r in revisions])
+
+
+@wiki_bp.route('/api/wiki/page/<int:page_id>/revisions/<int:number>', methods=['GET'])
+def get_page_revision(page_id, number):
+    """Markdown of one revision."""
+    if _page_for_history(page_id) is None:
+        return jsonify({'error': 'Not found'}), 404
+    revision, content = get_revision_content(page_id, number)
+    if revision is None:
+        return jsonify({'error': 'Revision not found'}), 404
+    return jsonify(dict(_revision_payload(revision), content=content))
+
+
+@wiki_bp.route('/api/wiki/page/<int:page_id>/diff', methods=['GET'])
+def diff_page_revisions(page_id):
+    """Unified diff between two revisions. Query: ?from=N&to=M"""
+    if _page_for_history(page_id) is None:
+        return jsonify({'error': 'Not found'}), 404
+    from_number = request.args.get('from', type=int)
+    to_number = request.args.get('to', type=int)
+    if from_number is None or to_number is None:
+        return jsonify({'error': 'from and to revision numbers are required'}), 400
+    diff = diff_revisions(page_id, from_number, to_number)
+    if diff is None:
+        return jsonify({'error': 'Revision not found'}), 404
+    return jsonify({'from': from_number, 'to': to_number, 'diff': diff})
+
+
+@wiki_bp.route('/api/wiki/clergy/summaries', methods=['GET', 'POST'])
 def get_clergy_summaries_batch():
-    """Batch fetch clergy summaries. Query: ?ids=1,2,3"""
-    ids_param = request.args.get('ids', '')
-    if not ids_param:
-        return jsonify({})
+    """Batch fetch clergy summaries. GET ?ids=1,2,3 or POST {"ids": [1, 2, 3]} for long lists."""
     try:
-        ids = [int(x.strip()) for x in ids_param.split(',') if x.strip()]
-    except ValueError:
+        if request.method == 'POST':
+            raw_ids = (request.get_json(silent=True) or {}).get('ids') or []
+            ids = {int(x) for x in raw_ids}
+        else:
+            ids = {int(x.strip()) for x in request.args.get('ids', '').split(',') if x.strip()}
+    except (TypeError, ValueError):
         return jsonify({'error': 'Invalid ids'}), 400
+    if len(ids) > MAX_SUMMARY_IDS:
+        return jsonify({'error': f'At most {MAX_SUMMARY_IDS} ids per request'}), 400
     if not ids:
         return jsonify({})
-    clergy_list = Clergy.query.options(
-        joinedload(Clergy.ordinations).joinedload(Ordination.ordaining_bishop),
-        joinedload(Clergy.consecrations).joinedload(Consecration.consecrator),
-    ).filter(Clergy.id.in_(ids), Clergy.is_deleted == False).all()
-    return jsonify({c.id: _clergy_to_summary(c) for c in clergy_list})
+    graph_version = get_graph_version()
+    if request.method == 'POST':
+        return jsonify(load_clergy_summaries(ids, graph_version))
+    etag = _graph_etag('summaries', sorted(ids), graph_version)
+    return _revalidated_json(etag, lambda: load_clergy_summaries(ids, graph_version))
 
 
 @wiki_bp.route('/api/wiki/clergy/<int:clergy_id>/summary', methods=['GET'])
 def get_clergy_summary(clergy_id):
     """Return summary for clergy shortcode: id, name, rank, org, dates, ordinations, consecrations."""
-    clergy = Clergy.query.options(
-        joinedload(Clergy.ordinations).joinedload(Ordination.ordaining_bishop),
-        joinedload(Clergy.consecrations).joinedload(Consecration.consecrator),
-    ).filter_by(id=clergy_id, is_deleted=False).first()
-    if not clergy:
-        return jsonify({'error': 'Not found'}), 404
-    return jsonify(_clergy_to_summary(clergy))
+    graph_version = get_graph_version()
+    etag = _graph_etag('summary', clergy_id, graph_version)
+    return _revalidated_json(etag, lambda: load_clergy_summaries([clergy_id], graph_version).get(clergy_id))
 
 
 @wiki_bp.route('/api/wiki/clergy/by-name/<path:name>', methods=['GET'])
 def get_clergy_by_name(name):
-    """Lookup clergy by name (first match). Returns summary JSON or 404."""
-    clergy = Clergy.query.options(
-        joinedload(Clergy.ordinations).joinedload(Ordination.ordaining_bishop),
-        joinedload(Clergy.consecrations).joinedload(Consecration.consecrator),
-    ).filter(Clergy.name.ilike(name), Clergy.is_deleted == False).first()
-    if not clergy:
-        return jsonify({'error': 'Not found'}), 404
-    return jsonify(_clergy_to_summary(clergy))
+    """Lookup clergy by name (first match, case-insensitive). Returns summary JSON or 404."""
+    graph_version = get_graph_version()
+
+    def build():
+        clergy_id = find_clergy_id_by_name(name, graph_version)
+        if clergy_id is None:
+            return None
+        return load_clergy_summaries([clergy_id], graph_version).get(clergy_id)
+
+    return _revalidated_json(_graph_etag('by-name', name.lower(), graph_version), build)
 
 
 def _is_bishop(clergy):
@@ -263,69 +376,27 @@ def _is_bishop(clergy):
     return rank and rank.is_bishop
 
 
-def _get_lineage_subset(clergy_id):
+def _get_lineage_subset(clergy):
     """
-    Traverse ordination (if priest) and consecration chain upward from clergy.
+    Ordination (if priest) and consecration chain upward from clergy.
     Returns (node_ids_set, links_list) where links have source/target/type/date/color.
     """
-    clergy = Clergy.query.options(
+    return get_ancestor_subset(clergy.id, bool(_is_bishop(clergy)))
+
+
+def _lineage_subset_nodes(node_ids):
+    """Lineage nodes for the subset's clergy, loaded in one query."""
+    clergy_list = Clergy.query.options(
         joinedload(Clergy.ordinations).joinedload(Ordination.ordaining_bishop),
         joinedload(Clergy.consecrations).joinedload(Consecration.consecrator),
     ).filter(
-        Clergy.id == clergy_id,
+        Clergy.id.in_(node_ids),
         Clergy.is_deleted == False,
         Clergy.exclude_from_visualization != True,
-    ).first()
-    if not clergy:
-        return set(), []
-
-    node_ids = {clergy_id}
-    links = []
-    visited = set()
-
-    def add_node(c):
-        if c and c.id and c.id not in visited:
-            node_ids.add(c.id)
-
-    def traverse_consecration_chain(cid):
-        if cid in visited:
-            return
-        visited.add(cid)
-        c = Clergy.query.options(
-            joinedload(Clergy.consecrations).joinedload(Consecration.consecrator),
-        ).filter(
-            Clergy.id == cid,
-            Clergy.is_deleted == False,
-            Clergy.exclude_from_visualization != True,
-        ).first()
-        if not c:
-            return
-        pc = c.get_primary_consecration()
-        if not pc or not pc.consecrator:
-            return
-        add_node(pc.consecrator)
-        links.append({
-            'source': pc.consecrator.id, 'target': cid, 'type': 'consecration',
-            'date': pc.display_date, 'color': GREEN_COLOR,
-        })
-        traverse_consecration_chain(pc.consecrator.id)
-
-    is_bishop = _is_bishop(clergy)
-    if is_bishop:
-        traverse_consecration_chain(clergy_id)
-    else:
-        # Priest: find ordaining bishop, add ordination link, then traverse consecration chain
-        po = clergy.get_primary_ordination()
-        if po and po.ordaining_bishop:
-            ob = po.ordaining_bishop
-            add_node(ob)
-            links.append({
-                'source': ob.id, 'target': clergy_id, 'type': 'ordination',
-                'date': po.display_date, 'color': BLACK_COLOR,
-            })
-            traverse_consecration_chain(ob.id)
-
-    return node_ids, links
+    ).all()
+    organizations = {o.name: o.color for o in Organization.query.all()}
+    ranks = {r.name: r.color for r in Rank.query.all()}
+    return [_clergy_to_lineage_node(c, organizations, ranks) for c in clergy_list]
 
 
 def _clergy_to_lineage_node(clergy, organizations, ranks):
@@ -454,9 +525,8 @@ def _clergy_to_profile(clergy, clergy_id_to_wiki_slug):
     return payload
 
 
-@wiki_bp.route('/api/wiki/clergy/<int:clergy_id>/profile', methods=['GET'])
-def get_clergy_profile(clergy_id):
-    """Full profile for clergy aside: image, dates, ordinations, consecrations, ordained/consecrated (if bishop)."""
+def _load_clergy_profile(clergy_id):
+    """Profile payload for the clergy aside, or None if not found."""
     clergy = Clergy.query.options(
         joinedload(Clergy.ordinations).joinedload(Ordination.ordaining_bishop),
         joinedload(Clergy.consecrations).joinedload(Consecration.consecrator),
@@ -465,7 +535,7 @@ def get_clergy_profile(clergy_id):
         joinedload(Clergy.tags),
     ).filter_by(id=clergy_id, is_deleted=False).first()
     if not clergy:
-        return jsonify({'error': 'Not found'}), 404
+        return None
 
     ids = {clergy.id}
     for o in clergy.ordinations:
@@ -486,7 +556,22 @@ def get_clergy_profile(clergy_id):
     ).with_entities(WikiPage.clergy_id, WikiPage.title).all()
     clergy_id_to_wiki_slug = {r.clergy_id: r.title for r in slug_rows if r.clergy_id}
 
-    return jsonify(_clergy_to_profile(clergy, clergy_id_to_wiki_slug))
+    return _clergy_to_profile(clergy, clergy_id_to_wiki_slug)
+
+
+@wiki_bp.route('/api/wiki/clergy/<int:clergy_id>/profile', methods=['GET'])
+def get_clergy_profile(clergy_id):
+    """Full profile for clergy aside: image, dates, ordinations, consecrations, ordained/consecrated (if bishop)."""
+    graph_version = get_graph_version()
+
+    def build():
+        profile = _profile_cache.get(clergy_id, graph_version)
+        if profile is GraphVersionCache.MISSING:
+            profile = _load_clergy_profile(clergy_id)
+            _profile_cache.set(clergy_id, graph_version, profile)
+        return profile
+
+    return _revalidated_json(_graph_etag('profile', clergy_id, graph_version), build)
 
 
 @wiki_bp.route('/api/wiki/lineage/<int:clergy_id>/table-rows', methods=['GET'])
@@ -505,19 +590,8 @@ def get_lineage_subset_table_rows(clergy_id):
     if not clergy:
         return jsonify({'error': 'Not found'}), 404
 
-    node_ids, links = _get_lineage_subset(clergy_id)
-    clergy_list = Clergy.query.options(
-        joinedload(Clergy.ordinations).joinedload(Ordination.ordaining_bishop),
-        joinedload(Clergy.consecrations).joinedload(Consecration.consecrator),
-    ).filter(
-        Clergy.id.in_(node_ids),
-        Clergy.is_deleted == False,
-        Clergy.exclude_from_visualization != True,
-    ).all()
-
-    organizations = {o.name: o.color for o in Organization.query.all()}
-    ranks = {r.name: r.color for r in Rank.query.all()}
-    nodes = [_clergy_to_lineage_node(c, organizations, ranks) for c in clergy_list]
+    node_ids, links = _get_lineage_subset(clergy)
+    nodes = _lineage_subset_nodes(node_ids)
     # In the subset, roots are nodes with no incoming ordination/consecration link
     targets = {link['target'] for link in links if link.get('type') in ('ordination', 'consecration')}
     for n in nodes:
@@ -542,48 +616,61 @@ def get_lineage_subset(identifier):
             Clergy.exclude_from_visualization != True,
         ).first()
     except ValueError:
-        clergy = Clergy.query.filter(
-            Clergy.name.ilike(identifier),
-            Clergy.is_deleted == False,
-            Clergy.exclude_from_visualization != True,
-        ).first()
+        clergy_id = find_clergy_id_by_name(identifier)
+        if clergy_id is not None:
+            clergy = Clergy.query.filter(
+                Clergy.id == clergy_id,
+                Clergy.exclude_from_visualization != True,
+            ).first()
     if not clergy:
         return jsonify({'error': 'Not found'}), 404
 
-    node_ids, links = _get_lineage_subset(clergy.id)
-    clergy_list = Clergy.query.options(
-        joinedload(Clergy.ordinations).joinedload(Ordination.ordaining_bishop),
-        joinedload(Clergy.consecrations).joinedload(Consecration.consecrator),
-    ).filter(
-        Clergy.id.in_(node_ids),
-        Clergy.is_deleted == False,
-        Clergy.exclude_from_visualization != True,
-    ).all()
-
-    organizations = {o.name: o.color for o in Organization.query.all()}
-    ranks = {r.name: r.color for r in Rank.query.all()}
-    nodes = [_clergy_to_lineage_node(c, organizations, ranks) for c in clergy_list]
+    node_ids, links = _get_lineage_subset(clergy)
+    nodes = _lineage_subset_nodes(node_ids)
     return jsonify({'nodes': nodes, 'links': links})
 
 
+@wiki_bp.route('/api/wiki/search', methods=['GET'])
+def search_wiki():
+    """Ranked full-text search over page titles and bodies, with highlighted snippets."""
+    query = request.args.get('q', '').strip()
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', 20, type=int), 1), 100)
+    found = search_pages(query, page=page, per_page=per_page, include_hidden='user_id' in session)
+    return jsonify({
+        'query': query,
+        'page': page,
+        'per_page': per_page,
+        'total': found['total'],
+        'results': [
+            {'title': r['title'], 'slug': r['title'], 'snippet': r['snippet'], 'rank': r['rank']}
+            for r in found['results']
+        ],
+    })
+
+
 @wiki_bp.route('/api/wiki/backlinks/<path:slug>', methods=['GET'])
 def get_backlinks(slug):
     """Pages that link to this page via [[slug]] or [[slug|...]]."""
-    query = WikiPage.query.filter_by(is_deleted=False)
-    if 'user_id' not in session:
-        query = query.filter_by(is_visible=True)
-    # Escape LIKE special chars: % and _ (use \ as escape char)
-    safe = slug.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
-    pattern1 = f'%[[{safe}]]%'
-    pattern2 = f'%[[{safe}|%'
-    query = query.filter(or_(
-        WikiPage.markdown.ilike(pattern1, escape='\\'),
-        WikiPage.markdown.ilike(pattern2, escape='\\')
-    ))
-    pages = query.all()
+    pages = get_backlink_pages(slug, include_hidden='user_id' in session)
+    return jsonify([{'title': p.title, 'slug': p.title} for p in pages])
+
+
+@wiki_bp.route('/api/wiki/reports/orphans', methods=['GET'])
+def get_orphans_report():
+    """Pages that no other page links to."""
+    pages = get_orphan_pages(include_hidden='user_id' in session)
     return jsonify([{'title': p.title, 'slug': p.title} for p in pages])
 
 
+@wiki_bp.route('/api/wiki/reports/most-linked', methods=['GET'])
+def get_most_linked_report():
+    """Most linked-to slugs, including links to pages that don't exist yet."""
+    limit = min(max(request.args.get('limit', 50, type=int), 1), 500)
+    rows = get_most_linked(limit=limit, include_hidden='user_id' in session)
+    return jsonify([{'slug': slug, 'links': count, 'exists': exists} for slug, count, exists in rows])
+
+
 def _allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
@@ -657,25 +744,22 @@ def create_wiki_article_request():
 
 @wiki_bp.route('/api/wiki/requests', methods=['GET'])
 def list_wiki_article_requests():
-    """List pending wiki article requests for editors, ordered by demand then recency."""
+    """
+    List pending wiki article requests for editors, ordered by demand then recency.
+
+    Query: ?limit=N (default 50, max 200) and ?cursor= from the previous
+    response's X-Next-Cursor header, as for /api/wiki/pages.
+    """
     if 'user_id' not in session:
         return jsonify({'error': 'Unauthorized'}), 401
 
-    rows = (
-        WikiArticleRequest.query
-        .join(Clergy, WikiArticleRequest.clergy_id == Clergy.id)
-        .filter(
-            WikiArticleRequest.is_handled == False,  # noqa: E712
-            Clergy.is_deleted == False,  # noqa: E712
-        )
-        .order_by(
-            WikiArticleRequest.request_count.desc(),
-            WikiArticleRequest.last_requested_at.desc(),
-        )
-        .all()
-    )
+    limit = min(max(request.args.get('limit', 50, type=int), 1), 200)
+    try:
+        rows, next_cursor = list_pending_requests(limit, request.args.get('cursor'))
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
 
-    return jsonify([
+    response = jsonify([
         {
             'clergy_id': r.clergy_id,
             'clergy_name': r.clergy.name if r.clergy else None,
@@ -684,6 +768,9 @@ def list_wiki_article_requests():
         }
         for r in rows
     ])
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
 
 
 @wiki_bp.route('/api/wiki/requests/status', methods=['GET'])
@@ -714,31 +801,10 @@ def get_wiki_article_request_status():
             'last_requested_at': None,
         })
 
-    # Compute queue position using the same ordering as list_wiki_article_requests
-    rows = (
-        WikiArticleRequest.query
-        .join(Clergy, WikiArticleRequest.clergy_id == Clergy.id)
-        .filter(
-            WikiArticleRequest.is_handled == False,  # noqa: E712
-            Clergy.is_deleted == False,  # noqa: E712
-        )
-        .order_by(
-            WikiArticleRequest.request_count.desc(),
-            WikiArticleRequest.last_requested_at.desc(),
-        )
-        .all()
-    )
-
-    queue_position = None
-    for idx, row in enumerate(rows, start=1):
-        if row.clergy_id == clergy_id:
-            queue_position = idx
-            break
-
     return jsonify({
         'clergy_id': clergy_id,
         'demand': req.request_count,
-        'queue_position': queue_position,
+        'queue_position': queue_position(req),
         'last_requested_at': req.last_requested_at.isoformat() if req.last_requested_at else None,
     })
 
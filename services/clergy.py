@@ -3,14 +3,10 @@ from models import db, Clergy, Rank, Organization, User, ClergyComment, Ordinati
 from utils import log_audit_event
 from datetime import datetime
 import json
-import threading
 from .image_upload import get_image_upload_service
+from . import sprite_scheduler
 from services.validation_cascade import compute_system_tags_for_clergy, merge_user_and_system_tags
 
-# Background task status tracking
-_sprite_sheet_status = {}
-_sprite_sheet_lock = threading.Lock()
-
 
 _RESERVED_SYSTEM_TAG_NAMES = {
     'invalid_priest', 'invalid_bishop',
@@ -136,7 +132,7 @@ def _regenerate_sprite_sheet():
     """Helper function to regenerate the sprite sheet after clergy changes"""
     try:
         image_upload_service = get_image_upload_service()
-        if not image_upload_service.backblaze_configured:
+        if not image_upload_service.storage_configured:
             return
 
         all_clergy = Clergy.query.filter(Clergy.is_deleted != True).all()
@@ -153,60 +149,12 @@ def _regenerate_sprite_sheet():
         current_app.logger.exception("Error in sprite sheet regeneration")
 
 def _regenerate_sprite_sheet_background(clergy_id=None):
-    """Regenerate sprite sheet in background thread"""
-    app = current_app._get_current_object()
-
-    def background_task():
-        try:
-            with app.app_context():
-                with _sprite_sheet_lock:
-                    _sprite_sheet_status['status'] = 'in_progress'
-                    _sprite_sheet_status['clergy_id'] = clergy_id
-                    _sprite_sheet_status['started_at'] = datetime.utcnow().isoformat()
-
-                image_upload_service = get_image_upload_service()
-                if not image_upload_service.backblaze_configured:
-                    with _sprite_sheet_lock:
-                        _sprite_sheet_status['status'] = 'error'
-                        _sprite_sheet_status['error'] = 'Backblaze B2 not configured'
-                    return
-
-                all_clergy = Clergy.query.filter(Clergy.is_deleted != True).all()
-                if not all_clergy:
-                    with _sprite_sheet_lock:
-                        _sprite_sheet_status['status'] = 'error'
-                        _sprite_sheet_status['error'] = 'No clergy found'
-                    return
-
-                result = image_upload_service.create_sprite_sheet(all_clergy)
-                
-                if result['success']:
-                    with _sprite_sheet_lock:
-                        _sprite_sheet_status['status'] = 'completed'
-                        _sprite_sheet_status['sprite_sheet_id'] = result.get('sprite_sheet_id')
-                        _sprite_sheet_status['url'] = result.get('url')
-                        _sprite_sheet_status['mapping'] = result.get('mapping', {})
-                        _sprite_sheet_status['completed_at'] = datetime.utcnow().isoformat()
-                    current_app.logger.info("Sprite sheet regenerated in background: %s", result['url'])
-                else:
-                    with _sprite_sheet_lock:
-                        _sprite_sheet_status['status'] = 'error'
-                        _sprite_sheet_status['error'] = result.get('error', 'Unknown error')
-                    current_app.logger.warning("Failed to regenerate sprite sheet: %s", result.get('error', 'Unknown error'))
-        except Exception as e:
-            with _sprite_sheet_lock:
-                _sprite_sheet_status['status'] = 'error'
-                _sprite_sheet_status['error'] = str(e)
-            current_app.logger.exception("Error in background sprite sheet regeneration")
-
-    thread = threading.Thread(target=background_task, daemon=True)
-    thread.start()
-    return True
+    """Queue a debounced, coalesced sprite sheet update (see services.sprite_scheduler)"""
+    return sprite_scheduler.request_regeneration(clergy_id)
 
 def get_sprite_sheet_status():
-    """Get current sprite sheet generation status"""
-    with _sprite_sheet_lock:
-        return _sprite_sheet_status.copy()
+    """Get current sprite sheet generation status (shared across workers)"""
+    return sprite_scheduler.get_status()
 
 def set_clergy_display_name(clergy):
     """Set the display name for a clergy member based on their rank and papal name."""
@@ -265,19 +213,11 @@ def create_clergy_from_form(form):
                 image_data = json.loads(image_data_json)
                 original_url = image_data.get('original')
                 if not original_url:
-                    try:
-                        response = image_upload_service.s3_client.list_objects_v2(
-                            Bucket=image_upload_service.bucket_name,
-                            Prefix=f"clergy/{clergy.id}/"
-                        )
-                        for obj in response.get('Contents', []):
-                            key = obj['Key']
-                            if 'original_' in key and 'lineage_' not in key and 'detail_' not in key:
-                                    original_url = image_upload_service.config.get_public_url(key)
-                                    image_data['original'] = original_url
-                                    break
-                    except Exception as e:
-                        current_app.logger.debug("Could not find original in storage: %s", e)
+                    # Resolve from the recorded object keys rather than listing the bucket
+                    clergy.image_data = json.dumps(image_data)
+                    original_url = image_upload_service.find_original_url(clergy)
+                    if original_url:
+                        image_data['original'] = original_url
 
                 if original_url:
                     clergy.image_url = original_url
@@ -808,23 +748,10 @@ def edit_clergy_handler(clergy_id):
                                 image_data = json.loads(image_data_json)
                                 original_url = image_data.get('original')
                                 if not original_url:
-                                    if clergy.image_url and 'original_' in clergy.image_url:
-                                        original_url = clergy.image_url
+                                    # Resolve from the stored row's object keys rather than listing the bucket
+                                    original_url = image_upload_service.find_original_url(clergy)
+                                    if original_url:
                                         image_data['original'] = original_url
-                                    else:
-                                        try:
-                                            response = image_upload_service.s3_client.list_objects_v2(
-                                                Bucket=image_upload_service.bucket_name,
-                                                Prefix=f"clergy/{clergy.id}/"
-                                            )
-                                            for obj in response.get('Contents', []):
-                                                key = obj['Key']
-                                                if 'original_' in key and 'lineage_' not in key and 'detail_' not in key:
-                                                    original_url = image_upload_service.config.get_public_url(key)
-                                                    image_data['original'] = original_url
-                                                    break
-                                        except Exception as e:
-                                            current_app.logger.debug("Could not find original in storage: %s", e)
 
                                 if original_url:
                                     clergy.image_url = original_url
@@ -0,0 +1,327 @@
+"""
+Database statistics and per-request query instrumentation.
+
+- Query latency comes from a rolling window of real cursor execution times
+  recorded by SQLAlchemy engine events. Liveness still needs a probe (the
+  window would keep reporting old timings after the database goes away), so
+  check_database_alive() runs SELECT 1 at most once per
+  LIVENESS_PROBE_INTERVAL_SECONDS per worker.
+- Row counts come from a cached snapshot. ORM flushes touching clergy or
+  events mark it stale; otherwise it is refreshed after a TTL (the TTL also
+  bounds staleness across gunicorn workers, which each hold their own copy).
+  On PostgreSQL, counts can optionally use pg_class.reltuples estimates.
+- Per request (only with SQL_PROFILING_ENABLED): query count, total DB time
+  and slowest statements, shown on /debug/perf and, with SQL_SERVER_TIMING,
+  sent as a Server-Timing header. Statements repeated past
+  SQL_N_PLUS_ONE_THRESHOLD within one request are logged as likely N+1 patterns.
+"""
+import re
+import threading
+import time
+from collections import Counter, deque
+
+from flask import current_app, g, has_app_context, request
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from models import db, Clergy, Ordination, Consecration
+
+LATENCY_WINDOW_SIZE = 1000
+STATS_SNAPSHOT_TTL_SECONDS = 60
+
+_COUNTED_MODELS = (Clergy, Ordination, Consecration)
+
+_query_latencies_ms = deque(maxlen=LATENCY_WINDOW_SIZE)
+_latency_lock = threading.Lock()
+
+LIVENESS_PROBE_INTERVAL_SECONDS = 5
+_liveness = {'checked_at': None, 'error': None}
+_liveness_lock = threading.Lock()
+
+_stats_snapshot = {'stale': True, 'generation': 0, 'refreshed_at': 0.0, 'counts': None}
+_stats_lock = threading.Lock()
+
+# Per-process ring buffer of recent request profiles for /debug/perf.
+RECENT_REQUESTS_SIZE = 200
+_recent_requests = deque(maxlen=RECENT_REQUESTS_SIZE)
+_recent_lock = threading.Lock()
+
+DEFAULT_SLOW_QUERY_MS = 200
+DEFAULT_N_PLUS_ONE_THRESHOLD = 10
+SLOWEST_STATEMENTS_KEPT = 5
+
+_PARAM_RE = re.compile(r"%\(\w+\)s|\?|(?<![:\w]):\w+|\$\d+")
+_PARAM_LIST_RE = re.compile(r"\?(?:\s*,\s*\?)+")
+_WS_RE = re.compile(r"\s+")
+
+_listeners_installed = False
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('db_stats_query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('db_stats_query_start')
+    if not starts:
+        return
+    elapsed_ms = (time.perf_counter() - starts.pop()) * 1000
+    with _latency_lock:
+        _query_latencies_ms.append(elapsed_ms)
+    # Background threads run with an app context but no request profile.
+    profile = g.get('db_profile') if has_app_context() else None
+    if profile is not None:
+        _record_request_query(profile, statement, elapsed_ms)
+
+
+def normalize_statement(statement):
+    """Collapse whitespace and bind parameters so repeated queries compare equal."""
+    normalized = _PARAM_RE.sub('?', statement or '')
+    normalized = _PARAM_LIST_RE.sub('?, ...', normalized)
+    return _WS_RE.sub(' ', normalized).strip()
+
+
+def _record_request_query(profile, statement, elapsed_ms):
+    profile['query_count'] += 1
+    profile['db_ms'] += elapsed_ms
+    profile['statements'][normalize_statement(statement)] += 1
+    slowest = profile['slowest']
+    if len(slowest) < SLOWEST_STATEMENTS_KEPT or elapsed_ms > slowest[-1][0]:
+        slowest.append((elapsed_ms, statement))
+        slowest.sort(key=lambda item: item[0], reverse=True)
+        del slowest[SLOWEST_STATEMENTS_KEPT:]
+    slow_ms = profile['slow_query_ms']
+    if slow_ms and elapsed_ms >= slow_ms:
+        current_app.logger.warning(
+            "Slow query (%.1fms) during %s %s: %s",
+            elapsed_ms, request.method, request.path, _WS_RE.sub(' ', statement)[:500],
+        )
+
+
+def _start_request_profile():
+    if not current_app.config.get('SQL_PROFILING_ENABLED', False):
+        return
+    g.db_profile = {
+        'started': time.perf_counter(),
+        'query_count': 0,
+        'db_ms': 0.0,
+        'statements': Counter(),
+        'slowest': [],
+        'slow_query_ms': current_app.config.get('SQL_SLOW_QUERY_MS', DEFAULT_SLOW_QUERY_MS),
+    }
+
+
+def _finish_request_profile(response):
+    profile = g.pop('db_profile', None)
+    if profile is None:
+        return response
+    total_ms = (time.perf_counter() - profile['started']) * 1000
+
+    threshold = current_app.config.get('SQL_N_PLUS_ONE_THRESHOLD', DEFAULT_N_PLUS_ONE_THRESHOLD)
+    repeated = [
+        (count, stmt) for stmt, count in profile['statements'].most_common(SLOWEST_STATEMENTS_KEPT)
+        if threshold and count >= threshold
+    ]
+    for count, stmt in repeated:
+        current_app.logger.warning(
+            "Possible N+1: statement ran %d times during %s %s: %s",
+            count, request.method, request.path, stmt[:500],
+        )
+
+    if current_app.config.get('SQL_SERVER_TIMING', False):
+        response.headers.add(
+            'Server-Timing',
+            'db;dur=%.1f;desc="%d queries"' % (profile['db_ms'], profile['query_count']),
+        )
+
+    with _recent_lock:
+        _recent_requests.append({
+            'method': request.method,
+            'path': request.path,
+            'endpoint': request.endpoint,
+            'status': response.status_code,
+            'query_count': profile['query_count'],
+            'db_ms': round(profile['db_ms'], 2),
+            'total_ms': round(total_ms, 2),
+            'slowest': [
+                {'ms': round(ms, 2), 'statement': _WS_RE.sub(' ', stmt)[:1000]}
+                for ms, stmt in profile['slowest']
+            ],
+            'repeated': [{'count': count, 'statement': stmt[:1000]} for count, stmt in repeated],
+            'at': time.time(),
+        })
+    return response
+
+
+def get_recent_request_profiles():
+    """Most recent request profiles first (this worker only)."""
+    with _recent_lock:
+        return list(reversed(_recent_requests))
+
+
+def get_endpoint_summary():
+    """Aggregate recent request profiles per endpoint, heaviest DB time first."""
+    by_endpoint = {}
+    for item in get_recent_request_profiles():
+        key = item['endpoint'] or item['path']
+        agg = by_endpoint.setdefault(key, {
+            'endpoint': key, 'requests': 0, 'queries': 0, 'max_queries': 0,
+            'db_ms': 0.0, 'total_ms': 0.0,
+        })
+        agg['requests'] += 1
+        agg['queries'] += item['query_count']
+        agg['max_queries'] = max(agg['max_queries'], item['query_count'])
+        agg['db_ms'] += item['db_ms']
+        agg['total_ms'] += item['total_ms']
+    rows = []
+    for agg in by_endpoint.values():
+        n = agg['requests']
+        rows.append({
+            'endpoint': agg['endpoint'],
+            'requests': n,
+            'avg_queries': round(agg['queries'] / n, 1),
+            'max_queries': agg['max_queries'],
+            'avg_db_ms': round(agg['db_ms'] / n, 2),
+            'avg_total_ms': round(agg['total_ms'] / n, 2),
+        })
+    rows.sort(key=lambda r: r['avg_db_ms'] * r['requests'], reverse=True)
+    return rows
+
+
+def _after_flush(session, flush_context):
+    """Mark the count snapshot stale when a flush touches counted tables."""
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, _COUNTED_MODELS):
+            invalidate_stats_snapshot()
+            return
+
+
+def _after_bulk_delete(delete_context):
+    invalidate_stats_snapshot()
+
+
+def init_db_stats(app):
+    """Install engine/session listeners and request hooks (call once at app startup)."""
+    global _listeners_installed
+    app.before_request(_start_request_profile)
+    app.after_request(_finish_request_profile)
+    if _listeners_installed:
+        return
+    with app.app_context():
+        engine = db.engine
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    event.listen(Session, 'after_flush', _after_flush)
+    event.listen(Session, 'after_bulk_delete', _after_bulk_delete)
+    _listeners_installed = True
+
+
+def invalidate_stats_snapshot():
+    """Force the next get_stats_snapshot() call to recompute counts."""
+    with _stats_lock:
+        _stats_snapshot['stale'] = True
+        _stats_snapshot['generation'] += 1
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    idx = min(len(sorted_values) - 1, int(round((pct / 100.0) * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+def get_latency_summary():
+    """Return {'samples', 'p50_ms', 'p95_ms', 'max_ms'} over the rolling window."""
+    with _latency_lock:
+        values = sorted(_query_latencies_ms)
+    return {
+        'samples': len(values),
+        'p50_ms': _percentile(values, 50),
+        'p95_ms': _percentile(values, 95),
+        'max_ms': values[-1] if values else None,
+    }
+
+
+def check_database_alive():
+    """Raise if the database is unreachable.
+
+    Probes with SELECT 1 at most once per LIVENESS_PROBE_INTERVAL_SECONDS;
+    in between, the last probe's failure (if any) is raised again.
+    """
+    now = time.monotonic()
+    with _liveness_lock:
+        checked_at = _liveness['checked_at']
+        if checked_at is not None and now - checked_at < LIVENESS_PROBE_INTERVAL_SECONDS:
+            if _liveness['error'] is not None:
+                raise _liveness['error']
+            return
+        _liveness['checked_at'] = now  # Concurrent polls reuse this probe's result
+    try:
+        db.session.execute(text('SELECT 1'))
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        with _liveness_lock:
+            _liveness['error'] = e
+        raise
+    with _liveness_lock:
+        _liveness['error'] = None
+
+
+def _estimated_counts():
+    """Planner row estimates from pg_class; no table scans. None if never analyzed."""
+    rows = db.session.execute(
+        text(
+            "SELECT relname, reltuples::bigint FROM pg_class "
+            "WHERE relkind = 'r' AND relname IN ('clergy', 'ordination', 'consecration')"
+        )
+    ).fetchall()
+    by_name = {name: int(n or 0) for name, n in rows}
+    if len(by_name) < 3 or any(n < 0 for n in by_name.values()):
+        return None
+    return {
+        'clergy_count': by_name.get('clergy', 0),
+        'events_count': by_name.get('ordination', 0) + by_name.get('consecration', 0),
+        'is_estimate': True,
+    }
+
+
+def _exact_counts():
+    clergy_count = Clergy.query.filter(Clergy.is_deleted != True).count()  # noqa: E712
+    events_count = Ordination.query.count() + Consecration.query.count()
+    return {
+        'clergy_count': clergy_count,
+        'events_count': events_count,
+        'is_estimate': False,
+    }
+
+
+def get_stats_snapshot(use_estimates=False):
+    """Return cached {'clergy_count', 'events_count', 'is_estimate'}.
+
+    Recomputes only when the snapshot is stale or older than the TTL. Estimates
+    are used only on PostgreSQL; other dialects always get exact counts.
+    """
+    now = time.monotonic()
+    with _stats_lock:
+        fresh = (
+            not _stats_snapshot['stale']
+            and _stats_snapshot['counts'] is not None
+            and now - _stats_snapshot['refreshed_at'] < STATS_SNAPSHOT_TTL_SECONDS
+        )
+        if fresh:
+            return dict(_stats_snapshot['counts'])
+        generation = _stats_snapshot['generation']
+
+    counts = None
+    if use_estimates and db.engine.dialect.name == 'postgresql':
+        counts = _estimated_counts()
+    if counts is None:
+        counts = _exact_counts()
+
+    with _stats_lock:
+        _stats_snapshot['counts'] = counts
+        _stats_snapshot['refreshed_at'] = now
+        # A write that landed while we were counting keeps the snapshot stale.
+        _stats_snapshot['stale'] = _stats_snapshot['generation'] != generation
+    return dict(counts)
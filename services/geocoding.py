@@ -1,133 +1,430 @@
 """
 Geocoding Service
-Provides coordinate lookup from addresses using OpenCage API
+Provides coordinate lookup from addresses (and addresses from coordinates)
+
+Lookups go through one or more backends, tried in the order given by
+GEOCODING_BACKEND (comma-separated):
+
+- ``opencage`` (default): the OpenCage API, needs OPENCAGE_API_KEY
+- ``gazetteer``: an offline country/city table loaded from a local CSV
+  (GEOCODING_GAZETTEER_PATH, default data/gazetteer.csv) with columns
+  city,state,country,country_code,latitude,longitude,population; rows with
+  an empty city are country centroids
+
+Results, including "not found", are cached in the ``geocode_cache`` table,
+keyed by the normalized address or by coordinates rounded to
+REVERSE_KEY_DECIMALS places, for GEOCODING_CACHE_TTL_DAYS (misses and
+country-level answers for a day). Backend errors such as timeouts are not
+cached. Backends never touch the database, so query_backends() can run in
+worker threads (see services.location_geocoding).
 """
 
-import requests
-import os
-from typing import Dict, Optional, Tuple
+import csv
+import hashlib
+import json
 import logging
+import math
+import os
+import re
+import threading
+import unicodedata
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+import requests
 from dotenv import load_dotenv
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_GAZETTEER_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'gazetteer.csv'
+)
+DEFAULT_CACHE_TTL_DAYS = 90
+MISS_CACHE_TTL = timedelta(days=1)
+REVERSE_KEY_DECIMALS = 4  # About 11 m
+MAX_KEY_LENGTH = 255  # GeocodeCache.query_key
+CACHE_CHUNK_SIZE = 500  # Keys per IN (...) when reading the cache in bulk
+COARSE_CONFIDENCE = 1  # Country-level answers; later backends get a chance to be more precise
+
+
+class GeocodingError(Exception):
+    """A backend could not answer (network, quota, bad response); not cached"""
+
+
+def normalize_address(address: str) -> str:
+    """Case-folded address with collapsed whitespace and tidy commas"""
+    address = re.sub(r'\s+', ' ', address.strip().casefold())
+    return re.sub(r'\s*,\s*', ', ', address).strip(', ')
+
+
+def forward_key(address: str) -> str:
+    """geocode_cache key for an address"""
+    key = normalize_address(address)
+    if len(key) > MAX_KEY_LENGTH:
+        key = 'sha1:' + hashlib.sha1(key.encode('utf-8')).hexdigest()
+    return key
+
+
+def reverse_key(latitude: float, longitude: float) -> str:
+    """geocode_cache key for coordinates"""
+    return f"{round(latitude, REVERSE_KEY_DECIMALS)},{round(longitude, REVERSE_KEY_DECIMALS)}"
+
+
+def _fold(value: str) -> str:
+    """Case- and accent-insensitive form for gazetteer matching"""
+    decomposed = unicodedata.normalize('NFKD', value.casefold())
+    return ' '.join(''.join(c for c in decomposed if not unicodedata.combining(c)).replace('.', ' ').split())
+
+
+class OpenCageBackend:
+    """OpenCage geocoding API"""
+
+    name = 'opencage'
+    rate_limited = True  # Batch jobs pace calls to stay within the API quota
+
+    def __init__(self, api_key: Optional[str], timeout: float = 10):
+        self.api_key = api_key
+        self.timeout = timeout
+        self.base_url = 'https://api.opencagedata.com/geocode/v1/json'
+
+    def is_configured(self) -> bool:
+        return bool(self.api_key)
+
+    def _first_result(self, query: str) -> Optional[Dict]:
+        params = {
+            'q': query,
+            'key': self.api_key,
+            'limit': 1,
+            'no_annotations': 1
+        }
+        try:
+            response = requests.get(self.base_url, params=params, timeout=self.timeout)
+            response.raise_for_status()
+            data = response.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            raise GeocodingError(f"OpenCage request failed: {e}") from e
+        results = data.get('results') or []
+        return results[0] if results else None
+
+    @staticmethod
+    def _components(result: Dict) -> Dict:
+        components = result.get('components', {})
+        return {
+            'formatted_address': result.get('formatted'),
+            'city': components.get('city') or components.get('town') or components.get('village'),
+            'state': components.get('state'),
+            'country': components.get('country'),
+            'postcode': components.get('postcode'),
+            'confidence': result.get('confidence', 0)
+        }
+
+    def geocode(self, address: str) -> Optional[Dict]:
+        result = self._first_result(address)
+        if not result:
+            return None
+        geometry = result.get('geometry', {})
+        return dict(latitude=geometry.get('lat'), longitude=geometry.get('lng'), **self._components(result))
+
+    def reverse(self, latitude: float, longitude: float) -> Optional[Dict]:
+        result = self._first_result(f"{latitude},{longitude}")
+        return self._components(result) if result else None
+
+
+class GazetteerBackend:
+    """Offline lookups against a local country/city CSV, loaded on first use"""
+
+    name = 'gazetteer'
+    rate_limited = False
+
+    CITY_CONFIDENCE = 5  # OpenCage scale: 10 is most precise
+    COUNTRY_CONFIDENCE = COARSE_CONFIDENCE
+    MAX_REVERSE_KM = 50
+    COUNTRY_ALIASES = {
+        'usa': 'US', 'us': 'US', 'u s a': 'US', 'united states of america': 'US',
+        'uk': 'GB', 'great britain': 'GB', 'england': 'GB', 'scotland': 'GB', 'wales': 'GB',
+        'holy see': 'VA', 'vatican': 'VA',
+    }
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._loaded = False
+        self.countries = {}  # country_code -> row
+        self.country_codes = {}  # folded name / code / alias -> country_code
+        self.cities = {}  # folded city name -> [rows]
+        self.grid = {}  # (floor(lat), floor(lng)) -> [city rows]
+
+    def is_configured(self) -> bool:
+        return os.path.isfile(self.path)
+
+    def _load(self):
+        with self._lock:
+            if self._loaded:
+                return
+            with open(self.path, newline='', encoding='utf-8') as f:
+                for raw in csv.DictReader(f):
+                    row = {
+                        'city': (raw.get('city') or '').strip() or None,
+                        'state': (raw.get('state') or '').strip() or None,
+                        'country': raw['country'].strip(),
+                        'country_code': raw['country_code'].strip().upper(),
+                        'latitude': float(raw['latitude']),
+                        'longitude': float(raw['longitude']),
+                        'population': int(raw.get('population') or 0),
+                    }
+                    if row['city'] is None:
+                        self.countries[row['country_code']] = row
+                        self.country_codes[_fold(row['country'])] = row['country_code']
+                        self.country_codes[row['country_code'].lower()] = row['country_code']
+                    else:
+                        self.cities.setdefault(_fold(row['city']), []).append(row)
+                        cell = (math.floor(row['latitude']), math.floor(row['longitude']))
+                        self.grid.setdefault(cell, []).append(row)
+            for alias, code in self.COUNTRY_ALIASES.items():
+                self.country_codes.setdefault(alias, code)
+            self._loaded = True
+            logger.info("Loaded gazetteer %s: %d countries, %d city names", self.path, len(self.countries), len(self.cities))
+
+    def _result(self, row: Dict, confidence: int, with_coordinates: bool) -> Dict:
+        parts = [row['city'], row['state'] if row['state'] != row['city'] else None, row['country']]
+        result = {
+            'formatted_address': ', '.join(p for p in parts if p),
+            'city': row['city'],
+            'state': row['state'],
+            'country': row['country'],
+            'postcode': None,
+            'confidence': confidence,
+        }
+        if with_coordinates:
+            result = dict(latitude=row['latitude'], longitude=row['longitude'], **result)
+        return result
+
+    def geocode(self, address: str) -> Optional[Dict]:
+        self._load()
+        parts = [_fold(p) for p in address.split(',') if p.strip()]
+        country_code = self.country_codes.get(parts[-1]) if parts else None
+        if country_code:
+            parts = parts[:-1]
+        for part in parts:
+            candidates = self.cities.get(part, [])
+            if country_code:
+                candidates = [c for c in candidates if c['country_code'] == country_code]
+            if candidates:
+                best = max(candidates, key=lambda c: c['population'])
+                return self._result(best, self.CITY_CONFIDENCE, with_coordinates=True)
+        if country_code and country_code in self.countries:
+            return self._result(self.countries[country_code], self.COUNTRY_CONFIDENCE, with_coordinates=True)
+        return None
+
+    def reverse(self, latitude: float, longitude: float) -> Optional[Dict]:
+        self._load()
+        cell_lat, cell_lng = math.floor(latitude), math.floor(longitude)
+        best, best_km = None, self.MAX_REVERSE_KM
+        for d_lat in (-1, 0, 1):
+            for d_lng in (-1, 0, 1):
+                for row in self.grid.get((cell_lat + d_lat, cell_lng + d_lng), ()):
+                    km = _haversine_km(latitude, longitude, row['latitude'], row['longitude'])
+                    if km <= best_km:
+                        best, best_km = row, km
+        return self._result(best, self.CITY_CONFIDENCE, with_coordinates=False) if best else None
+
+
+def _haversine_km(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 6371.0 * 2 * math.asin(math.sqrt(a))
+
+
+def create_backends(spec=None):
+    """Backends named in spec (default GEOCODING_BACKEND), comma-separated in lookup order"""
+    backends = []
+    for name in (spec or os.getenv('GEOCODING_BACKEND', 'opencage')).split(','):
+        name = name.strip().lower()
+        if name == 'opencage':
+            backends.append(OpenCageBackend(os.getenv('OPENCAGE_API_KEY')))
+        elif name == 'gazetteer':
+            backends.append(GazetteerBackend(os.getenv('GEOCODING_GAZETTEER_PATH', DEFAULT_GAZETTEER_PATH)))
+        elif name:
+            logger.warning(f"Ignoring unknown geocoding backend: {name}")
+    return backends
+
+
 class GeocodingService:
-    def __init__(self):
+    def __init__(self, backends=None, cache_ttl: Optional[timedelta] = None):
         # Load environment variables if not already loaded
         load_dotenv()
-        self.api_key = os.getenv('OPENCAGE_API_KEY')
-        self.base_url = 'https://api.opencagedata.com/geocode/v1/json'
-        
+        self.backends = create_backends() if backends is None else backends
+        if cache_ttl is None:
+            cache_ttl = timedelta(days=int(os.getenv('GEOCODING_CACHE_TTL_DAYS', DEFAULT_CACHE_TTL_DAYS)))
+        self.cache_ttl = cache_ttl
+
+    @property
+    def backend_names(self):
+        return [b.name for b in self.backends if b.is_configured()]
+
+    def query_backends(self, call):
+        """
+        Ask the backends in order, without touching the cache or database
+
+        Args:
+            call: function(backend) -> result dict or None; may raise GeocodingError
+
+        Returns:
+            tuple: (result or None, name of the answering backend or None if
+                   every backend failed, whether any backend failed)
+        """
+        best, answered_by, failed = None, None, False
+        for backend in self.backends:
+            if not backend.is_configured():
+                continue
+            try:
+                result = call(backend)
+            except GeocodingError as e:
+                logger.error(f"Geocoding via {backend.name} failed: {e}")
+                failed = True
+                continue
+            if answered_by is None or (result and not best):
+                best, answered_by = result, backend.name
+            if result and result.get('confidence', 0) > COARSE_CONFIDENCE:
+                best, answered_by = result, backend.name
+                break
+        return best, answered_by, failed
+
+    def cache_entry(self, key, result, answered_by, failed):
+        """(key, backend, result, ttl) to cache for a query_backends answer, or None to not cache it"""
+        if answered_by is None:
+            return None
+        if result and (not failed or result.get('confidence', 0) > COARSE_CONFIDENCE):
+            return key, answered_by, result, self.cache_ttl
+        if result or not failed:
+            # Misses and coarse answers are retried sooner; after a backend error they may be improvable
+            return key, answered_by, result, MISS_CACHE_TTL
+        return None
+
+    def _lookup(self, kind: str, key: str, call) -> Optional[Dict]:
+        """Cached result for key, or the first backend answer (cached, including misses)"""
+        hits = cached_results(kind, [key])
+        if key in hits:
+            return hits[key]
+        result, answered_by, failed = self.query_backends(call)
+        entry = self.cache_entry(key, result, answered_by, failed)
+        if entry:
+            store_results(kind, [entry])
+        return result
+
     def geocode_address(self, address: str) -> Optional[Dict]:
         """
         Get coordinates for an address
-        
+
         Args:
             address (str): The address to geocode
-            
+
         Returns:
             Optional[Dict]: Dictionary with lat, lng, and formatted_address, or None if failed
         """
-        if not self.api_key:
-            logger.warning("OpenCage API key not configured")
+        if not self.is_configured():
+            logger.warning("No geocoding backend configured")
             return None
-            
+
         if not address or not address.strip():
             return None
-            
-        try:
-            params = {
-                'q': address.strip(),
-                'key': self.api_key,
-                'limit': 1,
-                'no_annotations': 1
-            }
-            
-            response = requests.get(self.base_url, params=params, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            if data.get('results') and len(data['results']) > 0:
-                result = data['results'][0]
-                geometry = result.get('geometry', {})
-                components = result.get('components', {})
-                
-                return {
-                    'latitude': geometry.get('lat'),
-                    'longitude': geometry.get('lng'),
-                    'formatted_address': result.get('formatted'),
-                    'city': components.get('city') or components.get('town') or components.get('village'),
-                    'state': components.get('state'),
-                    'country': components.get('country'),
-                    'postcode': components.get('postcode'),
-                    'confidence': result.get('confidence', 0)
-                }
-            else:
-                logger.warning(f"No results found for address: {address}")
-                return None
-                
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Geocoding API request failed: {e}")
-            return None
-        except Exception as e:
-            logger.error(f"Geocoding failed: {e}")
-            return None
-    
+
+        result = self._lookup('forward', forward_key(address), lambda b: b.geocode(address.strip()))
+        if result is None:
+            logger.warning(f"No results found for address: {address}")
+        return result
+
     def reverse_geocode(self, latitude: float, longitude: float) -> Optional[Dict]:
         """
         Get address from coordinates
-        
+
         Args:
             latitude (float): Latitude coordinate
             longitude (float): Longitude coordinate
-            
+
         Returns:
             Optional[Dict]: Dictionary with formatted address and components, or None if failed
         """
-        if not self.api_key:
-            logger.warning("OpenCage API key not configured")
-            return None
-            
-        try:
-            params = {
-                'q': f"{latitude},{longitude}",
-                'key': self.api_key,
-                'limit': 1,
-                'no_annotations': 1
-            }
-            
-            response = requests.get(self.base_url, params=params, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            if data.get('results') and len(data['results']) > 0:
-                result = data['results'][0]
-                components = result.get('components', {})
-                
-                return {
-                    'formatted_address': result.get('formatted'),
-                    'city': components.get('city') or components.get('town') or components.get('village'),
-                    'state': components.get('state'),
-                    'country': components.get('country'),
-                    'postcode': components.get('postcode'),
-                    'confidence': result.get('confidence', 0)
-                }
-            else:
-                logger.warning(f"No results found for coordinates: {latitude}, {longitude}")
-                return None
-                
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Reverse geocoding API request failed: {e}")
+        if not self.is_configured():
+            logger.warning("No geocoding backend configured")
             return None
-        except Exception as e:
-            logger.error(f"Reverse geocoding failed: {e}")
-            return None
-    
+
+        result = self._lookup('reverse', reverse_key(latitude, longitude), lambda b: b.reverse(latitude, longitude))
+        if result is None:
+            logger.warning(f"No results found for coordinates: {latitude}, {longitude}")
+        return result
+
     def is_configured(self) -> bool:
         """Check if the geocoding service is properly configured"""
-        return bool(self.api_key)
+        return bool(self.backend_names)
+
+
+def cached_results(kind, keys):
+    """{key: result} for unexpired geocode_cache rows; a cached miss maps to None"""
+    from models import db, GeocodeCache
+    hits = {}
+    now = datetime.utcnow()
+    keys = list(keys)
+    try:
+        for start in range(0, len(keys), CACHE_CHUNK_SIZE):
+            rows = (
+                db.session.query(GeocodeCache.query_key, GeocodeCache.result)
+                .filter(
+                    GeocodeCache.kind == kind,
+                    GeocodeCache.query_key.in_(keys[start:start + CACHE_CHUNK_SIZE]),
+                    GeocodeCache.expires_at > now,
+                )
+                .all()
+            )
+            hits.update((key, json.loads(result) if result else None) for key, result in rows)
+    except (SQLAlchemyError, RuntimeError) as e:
+        # No app context or table yet: geocode uncached
+        logger.debug(f"Geocode cache unavailable: {e}")
+        if isinstance(e, SQLAlchemyError):
+            db.session.rollback()
+    return hits
+
+
+def store_results(kind, entries):
+    """Upsert (key, backend, result, ttl) entries into geocode_cache in one commit"""
+    from models import db, GeocodeCache
+    if not entries:
+        return
+    now = datetime.utcnow()
+    entries = {key: (backend, result, ttl) for key, backend, result, ttl in entries}
+    try:
+        existing = {
+            row.query_key: row
+            for row in GeocodeCache.query.filter(
+                GeocodeCache.kind == kind, GeocodeCache.query_key.in_(list(entries))
+            )
+        }
+        for key, (backend, result, ttl) in entries.items():
+            row = existing.get(key)
+            if row is None:
+                row = GeocodeCache(kind=kind, query_key=key)
+                db.session.add(row)
+            row.backend = backend
+            row.result = json.dumps(result) if result else None
+            row.created_at = now
+            row.expires_at = now + ttl
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()  # Another request cached one of the queries first
+    except (SQLAlchemyError, RuntimeError) as e:
+        logger.debug(f"Geocode cache unavailable: {e}")
+        if isinstance(e, SQLAlchemyError):
+            db.session.rollback()
+
+
+def purge_expired_geocodes():
+    """Delete expired cache rows; returns the number removed"""
+    from models import db, GeocodeCache
+    removed = GeocodeCache.query.filter(GeocodeCache.expires_at <= datetime.utcnow()).delete(synchronize_session=False)
+    db.session.commit()
+    return removed
+
 
 # Global instance
 geocoding_service = GeocodingService()
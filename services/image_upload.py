@@ -1,7 +1,8 @@
 """
 Image Upload Service for Backblaze B2 Cloud Storage
 
-This service handles uploading, resizing, and managing images in Backblaze B2.
+This service handles uploading, resizing, and managing images in Backblaze B2,
+or on local disk with STORAGE_BACKEND=local (see services/storage.py).
 It replaces the current base64 storage system with cloud storage.
 """
 
@@ -9,37 +10,38 @@ import os
 import uuid
 import base64
 import json
-import requests
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from io import BytesIO
-from PIL import Image, ImageFilter, ImageDraw
+from PIL import Image, ImageDraw
 from flask import current_app
 from botocore.exceptions import ClientError
-from datetime import datetime
-from .backblaze_config import get_backblaze_config
+from datetime import datetime, timedelta
+from .storage import get_storage
+from .thumbnail_fetcher import ThumbnailFetcher
+from .sprite_encoding import SPRITE_FORMATS, encode_sprite, is_format_available
+from .image_variants import render_variant, submit_variant
 
 
 class ImageUploadService:
-    """Service for handling image uploads to Backblaze B2"""
+    """Service for handling image uploads to the configured storage backend"""
     
     def __init__(self):
         try:
-            self.config = get_backblaze_config()
-            self.s3_client = self.config.s3_client
-            self.bucket_name = self.config.bucket_name
-            self.backblaze_configured = True
+            self.storage = get_storage()
+            self.storage_configured = True
             try:
-                current_app.logger.info("ImageUploadService initialized with Backblaze B2")
+                current_app.logger.info("ImageUploadService initialized with %s storage", self.storage.name)
             except RuntimeError:
                 pass  # No app context during init
         except Exception as e:
             try:
-                current_app.logger.warning("Backblaze B2 not configured: %s", e)
+                current_app.logger.warning("Image storage not configured: %s", e)
             except RuntimeError:
                 pass  # No app context during init
-            self.config = None
-            self.s3_client = None
-            self.bucket_name = None
-            self.backblaze_configured = False
+            self.storage = None
+            self.storage_configured = False
         
         # Image size configurations
         self.image_sizes = {
@@ -57,6 +59,48 @@ class ImageUploadService:
         
         # Maximum file size for original images (25MB)
         self.max_original_size = 25 * 1024 * 1024  # 25MB in bytes
+
+        # Resized variants above these sizes are re-encoded once at lower quality
+        self.variant_max_bytes = {
+            'lineage': 500 * 1024,
+            'detail': 1024 * 1024
+        }
+
+        # Lossless local copy of the current sprite sheet, patched by incremental updates
+        self.sprite_cache_dir = os.getenv(
+            'SPRITE_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'ecclesiastical_lineage_sprites')
+        )
+
+        # Concurrent thumbnail downloads for sprite builds (one pooled session per process)
+        self.thumbnail_fetcher = ThumbnailFetcher(
+            max_workers=int(os.getenv('SPRITE_FETCH_WORKERS', '16')),
+            per_host_limit=int(os.getenv('SPRITE_FETCH_PER_HOST', '8')),
+            retries=int(os.getenv('SPRITE_FETCH_RETRIES', '3')),
+            deadline_seconds=float(os.getenv('SPRITE_BUILD_DEADLINE_SECONDS', '120')),
+            cache_dir=os.path.join(self.sprite_cache_dir, 'tiles'),
+            cache_max_bytes=int(os.getenv('THUMBNAIL_CACHE_MAX_MB', '256')) * 1024 * 1024,
+            # Clergy uploads get unique object keys, so their content never changes
+            immutable_prefixes=(self.storage.public_url('clergy/'),) if self.storage else (),
+            # Local files are read straight from disk instead of over HTTP
+            local_reader=self.storage.read_url if self.storage and self.storage.serves_locally else None,
+        )
+
+        # Sprite atlas layout: fixed-size shards, each published at every scale
+        self.sprite_shard_tiles = int(os.getenv('SPRITE_SHARD_TILES', '256'))
+        self.sprite_scales = tuple(sorted(
+            {int(scale) for scale in os.getenv('SPRITE_SCALES', '1,2').split(',') if scale.strip()} | {1}
+        ))
+        self.sprite_format = os.getenv('SPRITE_FORMAT', 'webp').lower()
+        if not is_format_available(self.sprite_format):
+            try:
+                current_app.logger.warning("Sprite format %s unavailable, using jpeg", self.sprite_format)
+            except RuntimeError:
+                pass  # No app context during init
+            self.sprite_format = 'jpeg'
+        # Encoder settings: lossy quality (unset = per-format default), PNG palette size (0 = lossless)
+        sprite_quality = os.getenv('SPRITE_QUALITY')
+        self.sprite_quality = int(sprite_quality) if sprite_quality else None
+        self.sprite_png_colors = int(os.getenv('SPRITE_PNG_COLORS', '0'))
     
     def upload_image_from_base64(self, base64_data, clergy_id, image_type='original'):
         """
@@ -80,14 +124,9 @@ class ImageUploadService:
             file_extension = self._get_file_extension_from_base64(base64_data)
             object_key = self._generate_object_key(clergy_id, image_type, file_extension)
 
-            self.s3_client.put_object(
-                Bucket=self.bucket_name,
-                Key=object_key,
-                Body=image_data,
-                ContentType=self._get_content_type(file_extension)
-            )
+            self.storage.put(object_key, image_data, self._get_content_type(file_extension))
 
-            public_url = self.config.get_public_url(object_key)
+            public_url = self.storage.public_url(object_key)
             current_app.logger.info(f"Uploaded {image_type} image for clergy {clergy_id}: {public_url}")
             
             return public_url
@@ -142,14 +181,9 @@ class ImageUploadService:
             file_extension = self._get_file_extension_from_filename(filename)
             object_key = self._generate_object_key(clergy_id, 'original', file_extension)
 
-            self.s3_client.put_object(
-                Bucket=self.bucket_name,
-                Key=object_key,
-                Body=image_data,
-                ContentType=file_type
-            )
+            self.storage.put(object_key, image_data, file_type)
 
-            public_url = self.config.get_public_url(object_key)
+            public_url = self.storage.public_url(object_key)
             current_app.logger.info(f"Uploaded original image for clergy {clergy_id}: {public_url} ({file_size} bytes)")
             
             return {
@@ -159,6 +193,7 @@ class ImageUploadService:
                 'object_key': object_key,
                 'image_data': {
                     'original': public_url,
+                    'object_keys': {'original': object_key},
                     'metadata': {
                         'original_size': file_size,
                         'object_key': object_key,
@@ -193,19 +228,15 @@ class ImageUploadService:
             current_app.logger.info(f"original_object_key: {original_object_key}")
             current_app.logger.info(f"cropped_image_data length: {len(cropped_image_data) if cropped_image_data else 'None'}")
             current_app.logger.info(f"cropped_image_data starts with: {cropped_image_data[:50] if cropped_image_data else 'None'}")
-            current_app.logger.info(f"Backblaze configured: {self.backblaze_configured}")
+            current_app.logger.info(f"Storage configured: {self.storage_configured}")
 
-            if not self.backblaze_configured:
-                current_app.logger.error("Backblaze B2 not configured - cannot process images")
+            if not self.storage_configured:
+                current_app.logger.error("Image storage not configured - cannot process images")
                 return {
                     'success': False,
-                    'error': 'Image storage not configured. Please set up Backblaze B2 environment variables.'
+                    'error': 'Image storage not configured. Please set up Backblaze B2 environment variables or STORAGE_BACKEND=local.'
                 }
 
-            if original_object_key:
-                current_app.logger.info("Deleting previous cropped versions")
-                self._delete_previous_cropped_versions(clergy_id)
-
             current_app.logger.info("Decoding cropped image data")
             if cropped_image_data.startswith('data:'):
                 header, data = cropped_image_data.split(',', 1)
@@ -221,61 +252,33 @@ class ImageUploadService:
             image = Image.open(BytesIO(image_data))
             current_app.logger.info(f"Image opened successfully: {image.width}x{image.height}, mode: {image.mode}")
 
-            from models import Clergy
+            # Render variants in the background while storage is searched and cleaned up
+            variant_renders = {
+                size_type: submit_variant(
+                    image_data, self.image_sizes[size_type], self.quality_settings[size_type], self.variant_max_bytes[size_type]
+                )
+                for size_type in ('lineage', 'detail')
+            }
+
+            from models import Clergy, db
+            clergy = db.session.get(Clergy, clergy_id)
+            object_keys = self.get_image_object_keys(clergy) if clergy else {}
+
+            if original_object_key:
+                current_app.logger.info("Deleting previous cropped versions")
+                self._delete_previous_cropped_versions(clergy_id, object_keys)
+
             current_app.logger.info("Getting current image data to preserve original URL")
-            clergy = Clergy.query.get(clergy_id)
-            original_url = None
-            if clergy and clergy.image_data:
-                try:
-                    import json
-                    current_image_data = json.loads(clergy.image_data)
-                    original_url = current_image_data.get('original')
-                    current_app.logger.info(f"Found original URL in current data: {original_url}")
-                except (json.JSONDecodeError, AttributeError) as e:
-                    current_app.logger.warning(f"Could not parse current image data: {e}")
-            
-            if not original_url and clergy and clergy.image_url:
-                if 'original_' in clergy.image_url:
-                    original_url = clergy.image_url
-                    current_app.logger.info(f"Using clergy.image_url as original URL: {original_url}")
-                else:
-                    try:
-                        response = self.s3_client.list_objects_v2(
-                            Bucket=self.bucket_name,
-                            Prefix=f"clergy/{clergy_id}/"
-                        )
-                        for obj in response.get('Contents', []):
-                            key = obj['Key']
-                            if 'original_' in key and not 'lineage_' in key and not 'detail_' in key:
-                                original_url = self.config.get_public_url(key)
-                                current_app.logger.info(f"Found original image in storage: {original_url}")
-                                break
-                    except Exception as e:
-                        current_app.logger.warning(f"Could not search for original image in storage: {e}")
+            original_url = self.find_original_url(clergy) if clergy else None
+            original_key = object_keys.get('original') or self._object_key_from_url(original_url)
+            if not original_url and self._is_clergy_object_key(clergy_id, original_object_key):
+                original_key = original_object_key
+                original_url = self.storage.public_url(original_key)
+            if original_url:
+                current_app.logger.info(f"Found original URL: {original_url}")
 
             urls = {}
 
-            if not original_url:
-                current_app.logger.warning("No original URL found in image_data - searching storage")
-                try:
-                    response = self.s3_client.list_objects_v2(
-                        Bucket=self.bucket_name,
-                        Prefix=f"clergy/{clergy_id}/"
-                    )
-                    original_objects = []
-                    for obj in response.get('Contents', []):
-                        key = obj['Key']
-                        if 'original_' in key and 'lineage_' not in key and 'detail_' not in key:
-                            original_objects.append((obj['LastModified'], key))
-                    
-                    if original_objects:
-                        original_objects.sort(key=lambda x: x[0], reverse=True)
-                        most_recent_key = original_objects[0][1]
-                        original_url = self.config.get_public_url(most_recent_key)
-                        current_app.logger.info(f"Found original image in storage: {original_url}")
-                except Exception as e:
-                    current_app.logger.warning(f"Could not find original image in storage: {e}")
-
             if not original_url:
                 current_app.logger.warning("No original URL found - uploading cropped image as new original")
                 try:
@@ -283,14 +286,10 @@ class ImageUploadService:
                     image.save(output, format='JPEG', quality=95, optimize=True)
                     cropped_bytes = output.getvalue()
                     object_key = self._generate_object_key(clergy_id, 'original', '.jpg')
-                    self.s3_client.put_object(
-                        Bucket=self.bucket_name,
-                        Key=object_key,
-                        Body=cropped_bytes,
-                        ContentType='image/jpeg'
-                    )
+                    self.storage.put(object_key, cropped_bytes, 'image/jpeg')
                     
-                    original_url = self.config.get_public_url(object_key)
+                    original_url = self.storage.public_url(object_key)
+                    original_key = object_key
                     current_app.logger.info(f"Uploaded cropped image as new original: {original_url}")
                 except Exception as e:
                     current_app.logger.error(f"Failed to upload cropped image as original: {e}")
@@ -301,21 +300,14 @@ class ImageUploadService:
             else:
                 current_app.logger.error("CRITICAL: Failed to establish original URL - future edits may fail!")
 
-            current_app.logger.info("Creating lineage version")
-            lineage_url = self._create_resized_version(image, clergy_id, 'lineage', self.image_sizes['lineage'])
-            if lineage_url:
-                urls['lineage'] = lineage_url
-                current_app.logger.info(f"Lineage URL created: {lineage_url}")
-            else:
-                current_app.logger.error("Failed to create lineage version")
-
-            current_app.logger.info("Creating detail version")
-            detail_url = self._create_resized_version(image, clergy_id, 'detail', self.image_sizes['detail'])
-            if detail_url:
-                urls['detail'] = detail_url
-                current_app.logger.info(f"Detail URL created: {detail_url}")
-            else:
-                current_app.logger.error("Failed to create detail version")
+            current_app.logger.info("Uploading lineage and detail versions")
+            variant_keys = self._upload_variants(image_data, clergy_id, variant_renders)
+            for size_type in ('lineage', 'detail'):
+                if variant_keys.get(size_type):
+                    urls[size_type] = self.storage.public_url(variant_keys[size_type])
+                    current_app.logger.info(f"{size_type.capitalize()} URL created: {urls[size_type]}")
+                else:
+                    current_app.logger.error(f"Failed to create {size_type} version")
             
             if not urls:
                 current_app.logger.error("No URLs created")
@@ -324,7 +316,11 @@ class ImageUploadService:
                     'error': 'Failed to create any image versions'
                 }
 
-            from datetime import datetime
+            # Recorded so later crops and deletions need no bucket listing
+            urls['object_keys'] = dict(variant_keys)
+            if original_key:
+                urls['object_keys']['original'] = original_key
+
             urls['metadata'] = {
                 'original_size': len(image_data),
                 'cropped_dimensions': f"{image.width}x{image.height}",
@@ -350,92 +346,127 @@ class ImageUploadService:
                 'error': str(e)
             }
 
-    def _create_resized_version(self, image, clergy_id, size_type, target_size):
-        """Create a resized version of the image with optimized compression"""
-        try:
-            current_app.logger.info(f"Creating {size_type} version with target size {target_size}")
-
-            if not self.backblaze_configured:
-                current_app.logger.error("Backblaze B2 not configured - cannot create resized version")
-                return None
-
-            if image.mode in ('RGBA', 'LA', 'P'):
-                # Create a white background for transparent images
-                background = Image.new('RGB', image.size, (255, 255, 255))
-                if image.mode == 'P':
-                    image = image.convert('RGBA')
-                background.paste(image, mask=image.split()[-1] if image.mode == 'RGBA' else None)
-                image = background
-            elif image.mode != 'RGB':
-                image = image.convert('RGB')
+    def _upload_variants(self, image_data, clergy_id, variant_renders):
+        """
+        Upload rendered variants concurrently as each render finishes
 
-            resized_image = image.resize(target_size, Image.Resampling.LANCZOS)
-            current_app.logger.info(f"Image resized to {resized_image.width}x{resized_image.height}")
-            quality = self.quality_settings.get(size_type, 100)
-            output = BytesIO()
-            resized_image.save(
-                output, 
-                format='JPEG', 
-                quality=quality, 
-                optimize=True,
-                progressive=True
-            )
-            resized_data = output.getvalue()
-            current_app.logger.info(f"Resized image data size: {len(resized_data)} bytes (quality: {quality})")
-            max_size = 500 * 1024
-            if size_type == 'detail':
-                max_size = 1024 * 1024  # 1MB for detail images
-                
-            if len(resized_data) > max_size and quality > 60:
-                current_app.logger.info(f"Image too large ({len(resized_data)} bytes), reducing quality")
-                quality = max(60, quality - 15)
-                output = BytesIO()
-                resized_image.save(
-                    output, 
-                    format='JPEG', 
-                    quality=quality, 
-                    optimize=True,
-                    progressive=True
-                )
-                resized_data = output.getvalue()
-                current_app.logger.info(f"Reduced quality to {quality}, new size: {len(resized_data)} bytes")
-
-            object_key = self._generate_object_key(clergy_id, size_type, '.jpg')
-            current_app.logger.info(f"Generated object key: {object_key}")
-            current_app.logger.info(f"Uploading to Backblaze B2 bucket: {self.bucket_name}")
-            self.s3_client.put_object(
-                Bucket=self.bucket_name,
-                Key=object_key,
-                Body=resized_data,
-                ContentType='image/jpeg'
-            )
-            current_app.logger.info("Upload successful")
-            public_url = self.config.get_public_url(object_key)
-            current_app.logger.info(f"Generated public URL: {public_url}")
-            return public_url
-            
-        except Exception as e:
-            current_app.logger.error(f"Failed to create {size_type} version for clergy {clergy_id}: {e}")
-            import traceback
-            current_app.logger.error(f"Traceback: {traceback.format_exc()}")
+        Args:
+            image_data (bytes): Encoded source image (re-rendered inline if the pool died)
+            clergy_id (int): ID of the clergy member
+            variant_renders (dict): {size_type: Future from submit_variant}
+
+        Returns:
+            dict: {size_type: object key}; failed variants are missing
+        """
+        render_types = {future: size_type for size_type, future in variant_renders.items()}
+        object_keys = {}
+        with ThreadPoolExecutor(max_workers=len(variant_renders)) as uploads:
+            upload_futures = {}
+            for future in as_completed(render_types):
+                size_type = render_types[future]
+                try:
+                    try:
+                        resized_data, quality = future.result()
+                    except BrokenProcessPool:
+                        resized_data, quality = render_variant(
+                            image_data, self.image_sizes[size_type], self.quality_settings[size_type],
+                            self.variant_max_bytes[size_type]
+                        )
+                except Exception as e:
+                    current_app.logger.error(f"Failed to create {size_type} version for clergy {clergy_id}: {e}")
+                    continue
+                current_app.logger.info(f"Rendered {size_type} version: {len(resized_data)} bytes (quality: {quality})")
+                object_key = self._generate_object_key(clergy_id, size_type, '.jpg')
+                upload_futures[uploads.submit(
+                    self.storage.put, object_key, resized_data, 'image/jpeg'
+                )] = (size_type, object_key)
+            for future, (size_type, object_key) in upload_futures.items():
+                try:
+                    future.result()
+                    object_keys[size_type] = object_key
+                except Exception as e:
+                    current_app.logger.error(f"Failed to upload {size_type} version for clergy {clergy_id}: {e}")
+        return object_keys
+
+    def _object_key_from_url(self, url):
+        """Storage object key behind one of our public URLs, or None for other URLs"""
+        if not url or not self.storage:
             return None
+        prefix = self.storage.url_prefix()
+        return url[len(prefix):] or None if url.startswith(prefix) else None
+
+    @staticmethod
+    def _is_clergy_object_key(clergy_id, object_key):
+        return bool(object_key) and object_key.startswith(f"clergy/{clergy_id}/")
+
+    def get_image_object_keys(self, clergy):
+        """
+        Object keys of a clergy member's stored images, without listing the bucket
+
+        Uses image_data['object_keys'] (recorded by process_cropped_image and
+        upload_original_image) and falls back to deriving keys from the
+        recorded URLs for older rows. Keys outside clergy/<id>/ are ignored,
+        since image_data round-trips through the editor form.
+
+        Returns:
+            dict: {variant: object_key}, e.g. 'original', 'lineage', 'detail'
+        """
+        image_data = {}
+        if clergy.image_data:
+            try:
+                image_data = json.loads(clergy.image_data) or {}
+            except (json.JSONDecodeError, TypeError):
+                image_data = {}
+        if not isinstance(image_data, dict):
+            image_data = {}
+        recorded = image_data.get('object_keys')
+        object_keys = dict(recorded) if isinstance(recorded, dict) else {}
+        for variant in ('original', 'lineage', 'detail'):
+            if variant not in object_keys:
+                object_key = self._object_key_from_url(image_data.get(variant))
+                if object_key:
+                    object_keys[variant] = object_key
+        image_url_key = self._object_key_from_url(clergy.image_url)
+        if image_url_key and image_url_key not in object_keys.values():
+            object_keys['image_url'] = image_url_key
+        return {
+            variant: object_key for variant, object_key in object_keys.items()
+            if self._is_clergy_object_key(clergy.id, object_key)
+        }
+
+    def find_original_url(self, clergy):
+        """URL of the stored uncropped original for a clergy member, or None"""
+        original_url = None
+        if clergy.image_data:
+            try:
+                original_url = json.loads(clergy.image_data).get('original')
+            except (json.JSONDecodeError, AttributeError):
+                pass
+        if original_url and original_url.startswith('data:'):
+            original_url = None  # The editor keeps a local preview here until the form is saved
+        if not original_url:
+            original_key = self.get_image_object_keys(clergy).get('original')
+            if original_key:
+                original_url = self.storage.public_url(original_key)
+        if not original_url and clergy.image_url and 'original_' in clergy.image_url:
+            original_url = clergy.image_url
+        return original_url
 
-    def _delete_previous_cropped_versions(self, clergy_id):
+    def _delete_objects(self, object_keys):
+        """Delete object keys in storage batches; returns the number deleted"""
+        object_keys = list(object_keys)
+        errors = self.storage.delete_many(object_keys)
+        for object_key, message in errors:
+            current_app.logger.warning(f"Could not delete {object_key}: {message}")
+        return len(object_keys) - len(errors)
+
+    def _delete_previous_cropped_versions(self, clergy_id, object_keys):
         """Delete previous lineage and detail versions when editing"""
         try:
-            response = self.s3_client.list_objects_v2(
-                Bucket=self.bucket_name,
-                Prefix=f"clergy/{clergy_id}/"
-            )
-            for obj in response.get('Contents', []):
-                key = obj['Key']
-                if 'lineage_' in key or 'detail_' in key:
-                    self.s3_client.delete_object(
-                        Bucket=self.bucket_name,
-                        Key=key
-                    )
-                    current_app.logger.info(f"Deleted previous cropped version: {key}")
-                    
+            previous = [object_keys[variant] for variant in ('lineage', 'detail') if object_keys.get(variant)]
+            if previous:
+                self._delete_objects(previous)
+                current_app.logger.info(f"Deleted previous cropped versions: {previous}")
         except Exception as e:
             current_app.logger.error(f"Failed to delete previous cropped versions for clergy {clergy_id}: {e}")
     
@@ -457,13 +488,10 @@ class ImageUploadService:
             object_key = self._generate_object_key(clergy_id, image_type, file_extension)
             
             file_data.seek(0)
-            self.s3_client.put_object(
-                Bucket=self.bucket_name,
-                Key=object_key,
-                Body=file_data.read(),
-                ContentType=file_data.content_type or self._get_content_type(file_extension)
+            self.storage.put(
+                object_key, file_data.read(), file_data.content_type or self._get_content_type(file_extension)
             )
-            public_url = self.config.get_public_url(object_key)
+            public_url = self.storage.public_url(object_key)
             current_app.logger.info(f"Uploaded {image_type} image for clergy {clergy_id}: {public_url}")
             
             return public_url
@@ -534,13 +562,8 @@ class ImageUploadService:
             resized_image.save(output, format='JPEG', quality=85, optimize=True)
             resized_data = output.getvalue()
             object_key = self._generate_object_key(clergy_id, image_type, '.jpg')
-            self.s3_client.put_object(
-                Bucket=self.bucket_name,
-                Key=object_key,
-                Body=resized_data,
-                ContentType='image/jpeg'
-            )
-            public_url = self.config.get_public_url(object_key)
+            self.storage.put(object_key, resized_data, 'image/jpeg')
+            public_url = self.storage.public_url(object_key)
             current_app.logger.info(f"Uploaded resized {image_type} image for clergy {clergy_id}: {public_url}")
             
             return public_url
@@ -560,10 +583,10 @@ class ImageUploadService:
             bool: True if successful, False otherwise
         """
         try:
-            self.s3_client.delete_object(Bucket=self.bucket_name, Key=object_key)
+            self.storage.delete(object_key)
             current_app.logger.info(f"Deleted image: {object_key}")
             return True
-        except ClientError as e:
+        except (ClientError, OSError, ValueError) as e:
             current_app.logger.error(f"Failed to delete image {object_key}: {e}")
             return False
     
@@ -578,13 +601,12 @@ class ImageUploadService:
             bool: True if successful, False otherwise
         """
         try:
-            prefix = f"clergy/{clergy_id}/"
-            response = self.s3_client.list_objects_v2(Bucket=self.bucket_name, Prefix=prefix)
-            
-            if 'Contents' in response:
-                for obj in response['Contents']:
-                    self.delete_image(obj['Key'])
-                
+            from models import Clergy, db
+            clergy = db.session.get(Clergy, clergy_id)
+            object_keys = set(self.get_image_object_keys(clergy).values()) if clergy else set()
+
+            if object_keys:
+                self._delete_objects(object_keys)
                 current_app.logger.info(f"Deleted all images for clergy {clergy_id}")
                 return True
             else:
@@ -607,7 +629,7 @@ class ImageUploadService:
         Returns:
             str: Public URL of the uploaded image, or None if failed/not configured
         """
-        if not self.backblaze_configured:
+        if not self.storage_configured:
             return None
         if not file or not file.filename:
             return None
@@ -619,13 +641,8 @@ class ImageUploadService:
         content_type = file.content_type or self._get_content_type(f'.{ext}')
         try:
             file.seek(0)
-            self.s3_client.put_object(
-                Bucket=self.bucket_name,
-                Key=object_key,
-                Body=file.read(),
-                ContentType=content_type
-            )
-            public_url = self.config.get_public_url(object_key)
+            self.storage.put(object_key, file.read(), content_type)
+            public_url = self.storage.public_url(object_key)
             current_app.logger.info(f"Uploaded wiki image: {public_url}")
             return public_url
         except Exception as e:
@@ -704,49 +721,372 @@ class ImageUploadService:
         
         return img
     
-    def create_sprite_sheet(self, clergy_list, images_per_row=20, thumbnail_size=48):
+    def _get_thumbnail_url(self, clergy, prefer=('lineage', 'detail', 'original')):
+        """Best available image URL for a clergy member, or None
+
+        ``prefer`` orders the image_data variants to try; higher-density
+        sprite tiles prefer 'detail' since 'lineage' is only 64px.
         """
-        Create an optimized sprite sheet from clergy thumbnail images
-        
+        thumbnail_url = None
+        if clergy.image_data:
+            try:
+                image_data = json.loads(clergy.image_data)
+                thumbnail_url = next((image_data[key] for key in prefer if image_data.get(key)), None)
+            except (json.JSONDecodeError, AttributeError):
+                pass
+        if not thumbnail_url:
+            thumbnail_url = clergy.image_url
+        return thumbnail_url or None
+
+    def _encode_sprite(self, sprite, image_format='jpeg'):
+        """Encode a composed sprite sheet for upload with the configured quality settings"""
+        return encode_sprite(sprite, image_format, quality=self.sprite_quality, png_colors=self.sprite_png_colors)
+
+    def _upload_sprite(self, sprite_data, image_format='jpeg', suffix=''):
+        """Upload encoded sprite bytes under a fresh key; returns (object_key, public_url)"""
+        _, extension, content_type = SPRITE_FORMATS[image_format]
+        object_key = (
+            f"sprites/clergy_sprite_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}{suffix}.{extension}"
+        )
+        self.storage.put(object_key, sprite_data, content_type)
+        return object_key, self.storage.public_url(object_key)
+
+    def _publish_sprite(self, sprite, image_format, shard_index, scale):
+        """Encode, upload and locally cache one shard image; returns (object_key, url, encoded size)"""
+        sprite_data = self._encode_sprite(sprite, image_format)
+        object_key, sprite_url = self._upload_sprite(sprite_data, image_format, f'_s{shard_index}@{scale}x')
+        self._save_sprite_locally(sprite, object_key)
+        return object_key, sprite_url, len(sprite_data)
+
+    def _sprite_cache_path(self, object_key):
+        return os.path.join(self.sprite_cache_dir, os.path.basename(object_key).rsplit('.', 1)[0] + '.png')
+
+    def _save_sprite_locally(self, sprite, object_key):
+        """Keep the unencoded composite so later patches don't re-compress lossy output"""
+        try:
+            os.makedirs(self.sprite_cache_dir, exist_ok=True)
+            path = self._sprite_cache_path(object_key)
+            tmp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+            sprite.save(tmp_path, 'PNG')
+            os.replace(tmp_path, path)
+        except OSError as e:
+            current_app.logger.warning(f"Could not cache sprite sheet locally ({object_key}): {e}")
+
+    def _load_sprite_for_patching(self, sprite_sheet):
+        """Local copy of a published shard, falling back to downloading it"""
+        path = self._sprite_cache_path(sprite_sheet.object_key)
+        if os.path.exists(path):
+            with Image.open(path) as cached:
+                return cached.convert('RGB')
+        # Another worker published this sheet; its encoded copy is the best we have.
+        current_app.logger.info(f"No local copy of sprite sheet {sprite_sheet.id}; downloading {sprite_sheet.url}")
+        sprite_data = self.storage.read(sprite_sheet.object_key)
+        return Image.open(BytesIO(sprite_data)).convert('RGB')
+
+    def _fetch_sprite_tiles(self, clergy_list, thumbnail_size, scales):
+        """
+        Fetch sprite tiles for clergy at every scale
+
+        Returns:
+            tuple: ({scale: {clergy_id: PIL.Image}}, {clergy_id: error} for
+                   the 1x tiles, 1x fetch stats). Clergy without a 1x tile
+                   use the placeholder, so larger tiles are only fetched for
+                   those that have one.
+        """
+        items = []
+        for clergy in clergy_list:
+            thumbnail_url = self._get_thumbnail_url(clergy)
+            if thumbnail_url:
+                items.append((clergy.id, thumbnail_url))
+        tiles = {}
+        tiles[1], failures, stats = self.thumbnail_fetcher.fetch_many(items, thumbnail_size)
+        for scale in scales:
+            if scale == 1:
+                continue
+            large_items = []
+            for clergy in clergy_list:
+                if clergy.id in tiles[1]:
+                    large_items.append((clergy.id, self._get_thumbnail_url(clergy, prefer=('detail', 'lineage'))))
+            tiles[scale], _, _ = self.thumbnail_fetcher.fetch_many(large_items, thumbnail_size * scale)
+        return tiles, failures, stats
+
+    def _scaled_tile(self, tiles, clergy_id, scale, thumbnail_size):
+        """Tile at a scale, upscaling the 1x tile when no larger source could be fetched"""
+        tile = tiles.get(scale, {}).get(clergy_id)
+        if tile is None:
+            tile = tiles[1][clergy_id]
+            if scale != 1:
+                tile = tile.resize((thumbnail_size * scale, thumbnail_size * scale), Image.Resampling.LANCZOS)
+        return tile
+
+    @staticmethod
+    def _pack_position_slots(slots):
+        """{clergy_id: global slot} -> compact JSON [clergy_id, slot, ...] stored on the atlas root"""
+        flat = []
+        for clergy_id in sorted(slots):
+            flat.extend((clergy_id, slots[clergy_id]))
+        return json.dumps(flat, separators=(',', ':'))
+
+    @staticmethod
+    def _unpack_position_slots(packed):
+        flat = json.loads(packed) if packed else []
+        return dict(zip(flat[0::2], flat[1::2]))
+
+    @staticmethod
+    def _slot_position(slot, images_per_row, thumbnail_size, capacity):
+        """Global tile slot -> (x, y, shard) in 1x pixels; slot 0 is the placeholder"""
+        shard_index, local_slot = divmod(slot, capacity)
+        return (
+            (local_slot % images_per_row) * thumbnail_size,
+            (local_slot // images_per_row) * thumbnail_size,
+            shard_index
+        )
+
+    def _current_atlas_root(self):
+        """Shard 0 / 1x row of the current sprite atlas (or a legacy single-image sheet)"""
+        from models import SpriteSheet
+        return (
+            SpriteSheet.query.filter_by(is_current=True, shard_index=0, scale=1)
+            .order_by(SpriteSheet.id.desc())
+            .first()
+        )
+
+    def describe_sprite_atlas(self, root=None):
+        """
+        The current sprite atlas as served to the visualizations
+
+        Returns:
+            dict or None: 'mapping' is {clergy_id: (x, y, shard)} in 1x pixels;
+                          'shards' lists each shard's 1x width/height and its
+                          image URL per scale ({'1': url, '2': url}). 'url',
+                          'sprite_width' and 'sprite_height' describe shard 0
+                          at 1x for older clients. None when no sheet exists.
+        """
+        from models import SpriteSheet, ClergySpritePosition, db
+        if root is None:
+            root = self._current_atlas_root()
+        if root is None:
+            return None
+        rows = SpriteSheet.query.filter_by(atlas_id=root.id).all() if root.atlas_id else [root]
+        shards = {}
+        for row in rows:
+            shard = shards.setdefault(row.shard_index, {'shard': row.shard_index, 'urls': {}})
+            shard['urls'][str(row.scale)] = row.url
+            if row.scale == 1:
+                shard['width'] = row.sprite_width
+                shard['height'] = row.sprite_height
+        if root.position_slots is not None:
+            position_mapping = {
+                clergy_id: self._slot_position(slot, root.images_per_row, root.thumbnail_size, root.shard_capacity)
+                for clergy_id, slot in self._unpack_position_slots(root.position_slots).items()
+            }
+        else:
+            position_mapping = {
+                clergy_id: (x, y, shard_index)
+                for clergy_id, x, y, shard_index in db.session.query(
+                    ClergySpritePosition.clergy_id,
+                    ClergySpritePosition.x_position,
+                    ClergySpritePosition.y_position,
+                    ClergySpritePosition.shard_index,
+                ).filter(ClergySpritePosition.sprite_sheet_id == root.id)
+            }
+        return {
+            'success': True,
+            'url': root.url,
+            'mapping': position_mapping,
+            'shards': [shards[index] for index in sorted(shards)],
+            'format': root.image_format,
+            'object_key': root.object_key,
+            'sprite_width': root.sprite_width,
+            'sprite_height': root.sprite_height,
+            'thumbnail_size': root.thumbnail_size,
+            'images_per_row': root.images_per_row,
+            'shard_capacity': root.shard_capacity,
+            'num_images': len(position_mapping),
+            'sprite_sheet_id': root.id
+        }
+
+    def update_sprite_sheet(self, clergy_ids):
+        """
+        Incrementally update the current sprite atlas for changed clergy
+
+        Patches each clergy member's tile in place, or puts it in the first
+        free slot (growing the last shard by a row, or starting a new shard
+        when all are full), using the locally cached copies of the published
+        shards. Only shards that received a tile are re-encoded and uploaded,
+        at every scale; their SpriteSheet rows are re-pointed at the new
+        images, and each replaced image gets a retired row (outside the atlas)
+        so clients still holding the old atlas JSON can load it until
+        prune_sprite_sheets removes it. Slots of all other clergy are kept;
+        the atlas root's position_slots blob is rewritten in one UPDATE.
+
         Args:
-            clergy_list: List of Clergy objects with image_data or image_url
-            images_per_row (int): Number of thumbnails per row in sprite sheet
-            thumbnail_size (int): Size of each thumbnail in pixels
-            
+            clergy_ids (int or iterable of int): Added, edited or deleted clergy
+
         Returns:
-            dict: Contains 'success', 'url', 'error', 'mapping' keys
-                  mapping is a dict of {clergy_id: (x, y)} positions in sprite
+            dict: Same shape as create_sprite_sheet, plus 'incremental': True.
+                  Falls back to a full create_sprite_sheet when there is no
+                  current atlas (or only a legacy unsharded sheet) to patch.
         """
+        from models import Clergy, SpriteSheet, db
+        if isinstance(clergy_ids, int):
+            clergy_ids = [clergy_ids]
+        clergy_ids = set(clergy_ids)
         try:
-            if not self.backblaze_configured:
+            if not self.storage_configured:
                 return {
                     'success': False,
-                    'error': 'Backblaze B2 not configured'
+                    'error': 'Image storage not configured'
                 }
 
-            clergy_with_images = []
-            clergy_without_images = []
+            root = self._current_atlas_root()
+            if root is None or root.position_slots is None:
+                all_clergy = Clergy.query.filter(Clergy.is_deleted != True).all()
+                return self.create_sprite_sheet(all_clergy)
 
-            for clergy in clergy_list:
-                thumbnail_url = None
-                if clergy.image_data:
-                    try:
-                        image_data = json.loads(clergy.image_data)
-                        thumbnail_url = image_data.get('lineage', image_data.get('detail', image_data.get('original', '')))
-                        if thumbnail_url == '':
-                            thumbnail_url = None
-                    except (json.JSONDecodeError, AttributeError):
-                        pass
-
-                if not thumbnail_url:
-                    thumbnail_url = clergy.image_url if clergy.image_url else None
-                    if thumbnail_url == '':
-                        thumbnail_url = None
-
-                if thumbnail_url is None or thumbnail_url == '':
-                    clergy_without_images.append(clergy.id)
+            clergy_by_id = {c.id: c for c in Clergy.query.filter(Clergy.id.in_(clergy_ids))}
+            size = root.thumbnail_size
+            per_row = root.images_per_row
+            capacity = root.shard_capacity
+            image_format = root.image_format
+            sheets = {(s.shard_index, s.scale): s for s in SpriteSheet.query.filter_by(atlas_id=root.id)}
+            scales = sorted({scale for _, scale in sheets})
+
+            slots = self._unpack_position_slots(root.position_slots)
+            used_slots = {slot for clergy_id, slot in slots.items() if clergy_id not in clergy_ids and slot != 0}
+
+            changed_clergy = [
+                clergy_by_id[clergy_id] for clergy_id in sorted(clergy_ids)
+                if clergy_id in clergy_by_id and not clergy_by_id[clergy_id].is_deleted
+            ]
+            tiles, failures, _ = self._fetch_sprite_tiles(changed_clergy, size, scales)
+            for clergy_id, error in failures.items():
+                current_app.logger.warning(f"Failed to process thumbnail for clergy {clergy_id}: {error}")
+
+            images = {}  # (shard, scale) -> patched shard image
+
+            def shard_image(shard_index, scale, rows_needed):
+                key = (shard_index, scale)
+                if key not in images:
+                    sheet = sheets.get(key)
+                    images[key] = (
+                        self._load_sprite_for_patching(sheet) if sheet is not None
+                        else Image.new('RGB', (per_row * size * scale, size * scale), (255, 255, 255))
+                    )
+                if rows_needed * size * scale > images[key].height:
+                    grown = Image.new('RGB', (images[key].width, rows_needed * size * scale), (255, 255, 255))
+                    grown.paste(images[key], (0, 0))
+                    images[key] = grown
+                return images[key]
+
+            for clergy_id in sorted(clergy_ids):
+                clergy = clergy_by_id.get(clergy_id)
+                if clergy is None or clergy.is_deleted:
+                    slots.pop(clergy_id, None)
+                    continue
+                if clergy_id not in tiles[1]:
+                    slots[clergy_id] = 0  # Placeholder
+                    continue
+                slot = slots.get(clergy_id) or None
+                if slot is None or slot in used_slots:
+                    slot = next(i for i in range(1, len(used_slots) + 2) if i not in used_slots)
+                used_slots.add(slot)
+                slots[clergy_id] = slot
+                x, y, shard_index = self._slot_position(slot, per_row, size, capacity)
+                for scale in scales:
+                    shard_image(shard_index, scale, (slot % capacity) // per_row + 1).paste(
+                        self._scaled_tile(tiles, clergy_id, scale, size), (x * scale, y * scale)
+                    )
+            root.position_slots = self._pack_position_slots(slots)
+
+            tiles_per_shard = {0: 1}  # The placeholder occupies slot 0
+            for slot in used_slots:
+                tiles_per_shard[slot // capacity] = tiles_per_shard.get(slot // capacity, 0) + 1
+
+            for (shard_index, scale), sprite in sorted(images.items()):
+                object_key, sprite_url, encoded_bytes = self._publish_sprite(sprite, image_format, shard_index, scale)
+                sheet = sheets.get((shard_index, scale))
+                if sheet is None:
+                    sheet = sheets[(shard_index, scale)] = SpriteSheet(
+                        atlas_id=root.id,
+                        shard_index=shard_index,
+                        scale=scale,
+                        image_format=image_format,
+                        shard_capacity=capacity,
+                        thumbnail_size=size,
+                        images_per_row=per_row,
+                        is_current=True
+                    )
+                    db.session.add(sheet)
                 else:
-                    clergy_with_images.append((clergy.id, thumbnail_url))
+                    # Keep the replaced image for clients with cached atlas JSON until it is pruned
+                    db.session.add(SpriteSheet(
+                        url=sheet.url,
+                        object_key=sheet.object_key,
+                        thumbnail_size=sheet.thumbnail_size,
+                        images_per_row=sheet.images_per_row,
+                        sprite_width=sheet.sprite_width,
+                        sprite_height=sheet.sprite_height,
+                        num_images=sheet.num_images,
+                        shard_index=sheet.shard_index,
+                        scale=sheet.scale,
+                        image_format=sheet.image_format,
+                        shard_capacity=sheet.shard_capacity,
+                        is_current=False,
+                        retired_at=datetime.utcnow()
+                    ))
+                sheet.url = sprite_url
+                sheet.object_key = object_key
+                sheet.sprite_width = sprite.width
+                sheet.sprite_height = sprite.height
+                current_app.logger.info(
+                    f"Patched sprite shard {shard_index} at {scale}x: {sprite_url} ({encoded_bytes} bytes)"
+                )
+            for (shard_index, _), sheet in sheets.items():
+                sheet.num_images = tiles_per_shard.get(shard_index, 0)
+            db.session.commit()
+
+            result = self.describe_sprite_atlas(root)
+            result['incremental'] = True
+            return result
+
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Failed to update sprite sheet for clergy {sorted(clergy_ids)}: {e}")
+            import traceback
+            current_app.logger.error(f"Traceback: {traceback.format_exc()}")
+            return {
+                'success': False,
+                'error': str(e)
+            }
+
+    def create_sprite_sheet(self, clergy_list, images_per_row=16, thumbnail_size=48):
+        """
+        Create a sharded sprite atlas from clergy thumbnail images
+
+        Tiles are laid out in pages of ``sprite_shard_tiles`` (SPRITE_SHARD_TILES)
+        so clients only download the shards they display, and every shard is
+        published at each of ``sprite_scales`` (SPRITE_SCALES) for high-DPI
+        screens, encoded as ``sprite_format`` (SPRITE_FORMAT). Slot 0 of
+        shard 0 holds the placeholder silhouette.
+
+        Args:
+            clergy_list: List of Clergy objects with image_data or image_url
+            images_per_row (int): Number of thumbnails per row in each shard
+            thumbnail_size (int): Size of each thumbnail in pixels at 1x
+
+        Returns:
+            dict: Contains 'success', 'url', 'error', 'mapping', 'shards' keys
+                  (see describe_sprite_atlas); mapping is a dict of
+                  {clergy_id: (x, y, shard)} positions, stored as one
+                  position_slots blob on the atlas root row
+        """
+        try:
+            if not self.storage_configured:
+                return {
+                    'success': False,
+                    'error': 'Image storage not configured'
+                }
 
             if not clergy_list:
                 return {
@@ -754,111 +1094,79 @@ class ImageUploadService:
                     'error': 'No clergy found to create sprite sheet'
                 }
 
-            placeholder_img = self._create_placeholder_silhouette(thumbnail_size)
-            placeholder_position = (0, 0)
-            position_mapping = {}
-            placeholder_count = len(clergy_without_images)
-            successfully_processed_images = []
+            capacity = self.sprite_shard_tiles
+            scales = self.sprite_scales
+            image_format = self.sprite_format
 
-            for clergy_id, thumbnail_url in clergy_with_images:
-                try:
-                    response = requests.get(thumbnail_url, timeout=10)
-                    response.raise_for_status()
-                    img = Image.open(BytesIO(response.content))
-                    if img.size != (thumbnail_size, thumbnail_size):
-                        img = img.resize((thumbnail_size, thumbnail_size), Image.Resampling.LANCZOS)
-                    if img.mode != 'RGB':
-                        img = img.convert('RGB')
-                    successfully_processed_images.append((clergy_id, img))
-                except Exception as e:
-                    current_app.logger.warning(f"Failed to process thumbnail for clergy {clergy_id} ({thumbnail_url}): {e}")
-                    clergy_without_images.append(clergy_id)
-                    placeholder_count += 1
-
-            num_images_in_sprite = len(successfully_processed_images) + 1
-            rows = (num_images_in_sprite + images_per_row - 1) // images_per_row
-            sprite_width = images_per_row * thumbnail_size
-            sprite_height = rows * thumbnail_size
-            sprite = Image.new('RGB', (sprite_width, sprite_height), (255, 255, 255))
-            sprite.paste(placeholder_img, placeholder_position)
-
-            for idx, (clergy_id, img) in enumerate(successfully_processed_images):
-                sprite_idx = idx + 1
-                x = (sprite_idx % images_per_row) * thumbnail_size
-                y = (sprite_idx // images_per_row) * thumbnail_size
-                sprite.paste(img, (x, y))
-                position_mapping[clergy_id] = (x, y)
-
-            for clergy_id in clergy_without_images:
-                position_mapping[clergy_id] = placeholder_position
-
-            num_images = len(clergy_list)
-            sprite = sprite.filter(ImageFilter.SMOOTH)
-            sprite = sprite.convert('P', palette=Image.ADAPTIVE, colors=128)
-            sprite = sprite.convert('RGB')
-            output = BytesIO()
-            sprite.save(
-                output,
-                'JPEG',
-                quality=90,  # Higher quality to avoid pixelation
-                optimize=True,
-                progressive=True,
-                subsampling='4:4:4'  # No chroma subsampling for best quality
-            )
-            sprite_data = output.getvalue()
-            object_key = f"sprites/clergy_sprite_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jpg"
-            
-            self.s3_client.put_object(
-                Bucket=self.bucket_name,
-                Key=object_key,
-                Body=sprite_data,
-                ContentType='image/jpeg'
+            fetch_started = datetime.now()
+            tiles, failures, fetch_stats = self._fetch_sprite_tiles(clergy_list, thumbnail_size, scales)
+            current_app.logger.info(
+                f"Fetched {len(tiles[1])} thumbnails ({len(failures)} failed, {fetch_stats}) at {len(scales)} scale(s) in {(datetime.now() - fetch_started).total_seconds():.1f}s"
             )
-            sprite_url = self.config.get_public_url(object_key)
-            num_actual_in_sprite = len(clergy_with_images) - (placeholder_count - len(clergy_without_images))
-            current_app.logger.info(f"Created optimized sprite sheet: {sprite_url} ({len(sprite_data)} bytes, {num_images_in_sprite} tiles in sprite [{num_actual_in_sprite} images + 1 placeholder], {num_images} total clergy, {placeholder_count} using placeholder)")
-
-            from models import SpriteSheet, ClergySpritePosition, db
-            SpriteSheet.query.update({SpriteSheet.is_current: False})
-            sprite_sheet = SpriteSheet(
-                url=sprite_url,
-                object_key=object_key,
-                thumbnail_size=thumbnail_size,
-                images_per_row=images_per_row,
-                sprite_width=sprite_width,
-                sprite_height=sprite_height,
-                num_images=num_images,  # Total clergy entries (for tracking)
-                is_current=True
+            for clergy_id, error in failures.items():
+                current_app.logger.warning(f"Failed to process thumbnail for clergy {clergy_id}: {error}")
+
+            # Slot 0 is the placeholder; every clergy member without a tile points at it
+            slotted = [None] + [clergy.id for clergy in clergy_list if clergy.id in tiles[1]]
+            slots = {clergy.id: 0 for clergy in clergy_list}
+            slots.update((clergy_id, slot) for slot, clergy_id in enumerate(slotted) if clergy_id is not None)
+            shards = []  # [(shard_index, scale, object_key, url, width, height, num_tiles)]
+            total_bytes = 0
+            for shard_index in range((len(slotted) + capacity - 1) // capacity):
+                shard_slots = slotted[shard_index * capacity:(shard_index + 1) * capacity]
+                rows = (len(shard_slots) + images_per_row - 1) // images_per_row
+                for scale in scales:
+                    tile_size = thumbnail_size * scale
+                    sprite = Image.new('RGB', (images_per_row * tile_size, rows * tile_size), (255, 255, 255))
+                    for local_slot, clergy_id in enumerate(shard_slots):
+                        tile = (
+                            self._create_placeholder_silhouette(tile_size) if clergy_id is None
+                            else self._scaled_tile(tiles, clergy_id, scale, thumbnail_size)
+                        )
+                        sprite.paste(tile, ((local_slot % images_per_row) * tile_size, (local_slot // images_per_row) * tile_size))
+                    object_key, sprite_url, encoded_bytes = self._publish_sprite(sprite, image_format, shard_index, scale)
+                    total_bytes += encoded_bytes
+                    shards.append((shard_index, scale, object_key, sprite_url, sprite.width, sprite.height, len(shard_slots)))
+
+            placeholder_count = len(clergy_list) - (len(slotted) - 1)
+            current_app.logger.info(
+                f"Created sprite atlas: {len(slotted)} tiles in {len(shards) // len(scales)} shard(s) x {len(scales)} scale(s), "
+                f"{image_format}, {total_bytes} bytes; {len(clergy_list)} total clergy, {placeholder_count} using placeholder"
             )
-            db.session.add(sprite_sheet)
-            db.session.flush()
 
-            for clergy_id, (x, y) in position_mapping.items():
-                position = ClergySpritePosition(
-                    clergy_id=clergy_id,
-                    sprite_sheet_id=sprite_sheet.id,
-                    x_position=x,
-                    y_position=y
+            from models import SpriteSheet, db
+            SpriteSheet.query.filter_by(is_current=True).update(
+                {SpriteSheet.is_current: False, SpriteSheet.retired_at: datetime.utcnow()}
+            )
+            sheets = []
+            for shard_index, scale, object_key, sprite_url, width, height, num_tiles in shards:
+                sheet = SpriteSheet(
+                    url=sprite_url,
+                    object_key=object_key,
+                    thumbnail_size=thumbnail_size,
+                    images_per_row=images_per_row,
+                    sprite_width=width,
+                    sprite_height=height,
+                    num_images=num_tiles,
+                    is_current=True,
+                    shard_index=shard_index,
+                    scale=scale,
+                    image_format=image_format,
+                    shard_capacity=capacity
                 )
-                db.session.add(position)
-            
+                db.session.add(sheet)
+                sheets.append(sheet)
+            db.session.flush()
+            root = sheets[0]  # Shard 0 at 1x
+            for sheet in sheets:
+                sheet.atlas_id = root.id
+            root.position_slots = self._pack_position_slots(slots)
             db.session.commit()
-            
-            current_app.logger.info(f"Saved sprite sheet {sprite_sheet.id} with {len(position_mapping)} positions to database")
-            
-            return {
-                'success': True,
-                'url': sprite_url,
-                'mapping': position_mapping,
-                'object_key': object_key,
-                'sprite_width': sprite_width,
-                'sprite_height': sprite_height,
-                'thumbnail_size': thumbnail_size,
-                'images_per_row': images_per_row,
-                'num_images': num_images,
-                'sprite_sheet_id': sprite_sheet.id
-            }
-            
+
+            current_app.logger.info(f"Saved sprite atlas {root.id} with {len(slots)} positions to database")
+
+            return self.describe_sprite_atlas(root)
+
         except Exception as e:
             current_app.logger.error(f"Failed to create sprite sheet: {e}")
             import traceback
@@ -868,6 +1176,66 @@ class ImageUploadService:
                 'error': str(e)
             }
 
+    def prune_sprite_sheets(self, grace_seconds=None):
+        """
+        Delete retired sprite sheets and their stored objects after a grace period
+
+        Sheets stop being current when a new atlas is built; clients holding
+        the old atlas JSON keep loading its images for a while, so rows are
+        only removed once retired for SPRITE_RETENTION_HOURS (default 24).
+        Legacy per-clergy position rows of pruned sheets go with them.
+
+        Returns:
+            dict: Contains 'success', 'sheets' (rows deleted) and 'objects'
+                  (stored objects deleted) keys
+        """
+        from models import SpriteSheet, SpriteSheetJob, ClergySpritePosition, db
+        if grace_seconds is None:
+            grace_seconds = float(os.getenv('SPRITE_RETENTION_HOURS', '24')) * 3600
+        cutoff = datetime.utcnow() - timedelta(seconds=grace_seconds)
+        try:
+            expired = db.session.query(SpriteSheet.id, SpriteSheet.object_key).filter(
+                SpriteSheet.is_current != True,
+                db.or_(
+                    SpriteSheet.retired_at < cutoff,
+                    db.and_(SpriteSheet.retired_at.is_(None), SpriteSheet.created_at < cutoff),
+                ),
+            ).all()
+            if not expired:
+                return {'success': True, 'sheets': 0, 'objects': 0}
+            sheet_ids = [sheet_id for sheet_id, _ in expired]
+            object_keys = [object_key for _, object_key in expired]
+
+            deleted_objects = 0
+            if self.storage_configured:
+                deleted_objects = self._delete_objects(object_keys)
+            for object_key in object_keys:
+                try:
+                    os.remove(self._sprite_cache_path(object_key))
+                except OSError:
+                    pass
+
+            for start in range(0, len(sheet_ids), 1000):
+                batch = sheet_ids[start:start + 1000]
+                db.session.query(SpriteSheetJob).filter(SpriteSheetJob.sprite_sheet_id.in_(batch)).update(
+                    {SpriteSheetJob.sprite_sheet_id: None}, synchronize_session=False
+                )
+                db.session.query(ClergySpritePosition).filter(ClergySpritePosition.sprite_sheet_id.in_(batch)).delete(
+                    synchronize_session=False
+                )
+                db.session.query(SpriteSheet).filter(SpriteSheet.id.in_(batch)).delete(synchronize_session=False)
+            db.session.commit()
+            current_app.logger.info(f"Pruned {len(sheet_ids)} retired sprite sheets ({deleted_objects} stored objects)")
+            return {'success': True, 'sheets': len(sheet_ids), 'objects': deleted_objects}
+
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Failed to prune sprite sheets: {e}")
+            return {
+                'success': False,
+                'error': str(e)
+            }
+
 
 # Global instance
 image_upload_service = None
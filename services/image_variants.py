@@ -0,0 +1,131 @@
+"""
+Resized image variants (lineage / detail) rendered off the request thread.
+
+render_variant() is a plain function so it can run in a process pool: each
+variant decodes the upload independently, shrinking as early as possible
+(JPEG draft mode decodes at 1/2, 1/4 or 1/8 scale; Image.reduce box-filters
+to within 2x of the target) so LANCZOS only runs on a small image.
+
+submit_variant() uses a per-process pool of IMAGE_VARIANT_WORKERS processes
+(default 2, one per variant). init_image_variants() forks them at app
+startup, while the process has no other threads: forking later, from a
+worker that is already running upload, sprite or thumbnail threads, could
+copy a lock some thread holds and deadlock the child. Workers only run
+Pillow code; spawn/forkserver would re-import the __main__ script (app.py
+under the dev server) in every worker. The pool is never re-created after
+startup: with 0 workers, no pool in this process (e.g. a fork of the process
+that started it) or a broken pool, variants render inline.
+"""
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_pid = None  # Process that forked the workers; its forks must not reuse them
+_pool_lock = threading.Lock()
+
+
+def _flatten(image):
+    """RGB copy of the image, compositing transparency onto white"""
+    if image.mode in ('RGBA', 'LA', 'P'):
+        if image.mode == 'P':
+            image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.split()[-1] if image.mode in ('RGBA', 'LA') else None)
+        return background
+    if image.mode != 'RGB':
+        return image.convert('RGB')
+    return image
+
+
+def _encode_jpeg(image, quality):
+    output = BytesIO()
+    image.save(output, format='JPEG', quality=quality, optimize=True, progressive=True)
+    return output.getvalue()
+
+
+def render_variant(image_bytes, target_size, quality, max_bytes, min_quality=60):
+    """
+    Resize an encoded image to target_size and encode it as progressive JPEG
+
+    Re-encodes once at lower quality (never below min_quality) when the
+    result exceeds max_bytes.
+
+    Returns:
+        tuple: (JPEG bytes, quality used)
+    """
+    image = Image.open(BytesIO(image_bytes))
+    if image.format == 'JPEG':
+        image.draft('RGB', target_size)
+    image = _flatten(image)
+    factor = min(image.width // target_size[0], image.height // target_size[1]) // 2
+    if factor > 1:
+        image = image.reduce(factor)
+    if image.size != tuple(target_size):
+        image = image.resize(target_size, Image.Resampling.LANCZOS)
+
+    data = _encode_jpeg(image, quality)
+    if len(data) > max_bytes and quality > min_quality:
+        quality = max(min_quality, quality - 15)
+        data = _encode_jpeg(image, quality)
+    return data, quality
+
+
+def init_image_variants():
+    """Fork the variant worker pool now; call once at app startup, before any threads start"""
+    global _pool, _pool_pid
+    workers = int(os.getenv('IMAGE_VARIANT_WORKERS', '2'))
+    if workers <= 0:
+        return
+    with _pool_lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            return
+        methods = multiprocessing.get_all_start_methods()
+        method = 'fork' if 'fork' in methods else 'spawn'
+        if method == 'fork' and threading.active_count() > 1:
+            logger.warning("Not forking image variant workers: %d threads running; variants render inline",
+                           threading.active_count())
+            return
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method))
+        # The first task starts every worker (fork pools never add workers later), before the
+        # executor's own manager thread exists
+        pool.submit(int).result()
+        _pool, _pool_pid = pool, os.getpid()
+
+
+def _get_pool():
+    with _pool_lock:
+        return _pool if _pool_pid == os.getpid() else None
+
+
+def _reset_pool(pool):
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    logger.warning("Image variant pool broken; variants render inline until restart")
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def submit_variant(image_bytes, target_size, quality, max_bytes):
+    """Start rendering a variant; returns a Future of render_variant()'s result"""
+    pool = _get_pool()
+    if pool is not None:
+        try:
+            return pool.submit(render_variant, image_bytes, target_size, quality, max_bytes)
+        except (BrokenProcessPool, RuntimeError):
+            _reset_pool(pool)
+    future = Future()
+    try:
+        future.set_result(render_variant(image_bytes, target_size, quality, max_bytes))
+    except Exception as e:
+        future.set_exception(e)
+    return future
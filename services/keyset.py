@@ -0,0 +1,34 @@
+"""
+Opaque cursors for keyset pagination.
+
+A cursor is the sort key of the last row on a page, JSON-encoded in URL-safe
+base64. The next page filters on rows strictly after that key instead of
+using OFFSET, so every page costs the same no matter how deep it is.
+"""
+import base64
+import json
+from datetime import datetime
+
+
+def encode_cursor(*values):
+    """Cursor for a sort key; datetimes are stored as ISO strings"""
+    key = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(key).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, *types):
+    """
+    Sort key from encode_cursor, with each value converted by the matching
+    type (int, str or datetime). Raises ValueError for a malformed cursor.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError('Wrong cursor length')
+        return tuple(
+            datetime.fromisoformat(value) if kind is datetime else kind(value)
+            for kind, value in zip(types, values)
+        )
+    except (TypeError, ValueError, UnicodeDecodeError) as e:
+        raise ValueError('Invalid cursor') from e
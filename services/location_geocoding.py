@@ -0,0 +1,246 @@
+"""
+Batch geocoding of locations that have no coordinates.
+
+Locations without latitude/longitude are left off the chapel map, so
+``flask geocode-locations`` (or the background job started from
+/api/locations/geocode-missing) fills them in from their full address.
+Active locations are read in id order, BATCH_SIZE at a time. Answers already
+in geocode_cache come back from one query; the rest are geocoded by a small
+thread pool behind a shared rate limit (local backends such as the gazetteer
+are not limited), and the batch's cache rows and coordinates are written in
+bulk before the next batch starts.
+
+Progress is kept per batch: a crash or Ctrl-C loses at most the batch in
+flight, and a rerun only sees locations that still lack coordinates (the
+ones that were not found are answered by their cached miss). Country-level
+answers are not saved: the location stays uncoded, and since such answers
+are cached for a day only, a later run or a more precise backend can place
+it. Backend errors are not cached, so those locations are retried on the
+next run. Coordinates typed in by hand while the job runs are never
+overwritten. Worker threads only call the geocoding backends; all database
+work stays on the calling thread.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import bindparam, func, or_, update
+from sqlalchemy.orm import load_only
+
+from models import db, Location
+from .geocoding import COARSE_CONFIDENCE, GeocodingError, cached_results, forward_key, geocoding_service, store_results
+
+BATCH_SIZE = 100
+DEFAULT_WORKERS = 4
+DEFAULT_RATE = 1.0  # Requests per second to remote backends (OpenCage free tier)
+
+_job_lock = threading.Lock()
+_job_thread = None
+_job_status = {'state': 'idle'}
+
+
+class RateLimiter:
+    """Spaces acquire() calls at least 1/rate seconds apart across threads; rate <= 0 means unlimited"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def acquire(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+def _missing_coordinates():
+    return Location.query.filter(
+        Location.is_active == True,  # noqa: E712
+        Location.deleted == False,  # noqa: E712
+        or_(Location.latitude.is_(None), Location.longitude.is_(None)),
+    )
+
+
+def count_missing_locations():
+    """Active locations the chapel map leaves out for lack of coordinates"""
+    return _missing_coordinates().with_entities(func.count(Location.id)).scalar()
+
+
+def _next_batch(after_id, size):
+    return (
+        _missing_coordinates()
+        .options(load_only(
+            Location.id, Location.address, Location.city, Location.state_province,
+            Location.postal_code, Location.country,
+        ))
+        .filter(Location.id > after_id)
+        .order_by(Location.id)
+        .limit(size)
+        .all()
+    )
+
+
+def _forward(address, limiter):
+    def call(backend):
+        if getattr(backend, 'rate_limited', True):
+            limiter.acquire()
+        return backend.geocode(address)
+    return call
+
+
+def _save_coordinates(updates):
+    """Bulk UPDATE of (id, latitude, longitude), skipping locations that got coordinates meanwhile"""
+    if not updates:
+        return
+    table = Location.__table__
+    db.session.execute(
+        update(table)
+        .where(
+            table.c.id == bindparam('location_id'),
+            or_(table.c.latitude.is_(None), table.c.longitude.is_(None)),
+        )
+        .values(latitude=bindparam('lat'), longitude=bindparam('lng'), updated_at=datetime.utcnow()),
+        updates,
+    )
+    db.session.commit()
+
+
+def _geocode_batch(service, locations, executor, limiter, stats):
+    keys, addresses = {}, {}
+    for location in locations:
+        address = location.get_full_address()
+        if not address.strip():
+            stats['no_address'] += 1
+            continue
+        keys[location.id] = key = forward_key(address)
+        addresses.setdefault(key, address)  # Locations sharing an address are looked up once
+
+    answers = cached_results('forward', set(keys.values()))
+    stats['cached'] += sum(1 for key in keys.values() if key in answers)
+    pending = {key: address for key, address in addresses.items() if key not in answers}
+
+    futures = {
+        executor.submit(service.query_backends, _forward(address, limiter)): key
+        for key, address in pending.items()
+    }
+    entries, failed_keys = [], set()
+    for future in as_completed(futures):
+        key = futures[future]
+        try:
+            result, answered_by, failed = future.result()
+        except Exception as e:
+            current_app.logger.error(f"Geocoding {pending[key]!r} failed: {e}")
+            result, answered_by, failed = None, None, True
+        stats['looked_up'] += 1
+        if answered_by is None:
+            failed_keys.add(key)
+            continue
+        answers[key] = result
+        entry = service.cache_entry(key, result, answered_by, failed)
+        if entry:
+            entries.append(entry)
+    store_results('forward', entries)
+
+    updates = []
+    for location_id, key in keys.items():
+        if key in failed_keys:
+            stats['failed'] += 1
+            continue
+        result = answers.get(key)
+        if not result or result.get('latitude') is None or result.get('longitude') is None:
+            stats['not_found'] += 1
+        elif result.get('confidence', 0) <= COARSE_CONFIDENCE:
+            # A country centroid would pin the chapel to a shared point and drop it from later runs
+            stats['coarse'] += 1
+        else:
+            updates.append({'location_id': location_id, 'lat': result['latitude'], 'lng': result['longitude']})
+            stats['geocoded'] += 1
+    _save_coordinates(updates)
+    stats['processed'] += len(locations)
+
+
+def geocode_missing_locations(service=None, batch_size=BATCH_SIZE, workers=DEFAULT_WORKERS, rate=None,
+                              limit=None, progress=None):
+    """
+    Geocode active locations without coordinates from their full address.
+
+    Args:
+        service: GeocodingService to use (default: the configured global one)
+        rate: remote requests per second (default GEOCODING_BATCH_RATE, <= 0 for no limit)
+        limit: stop after this many locations
+        progress: optional callback(stats) after each batch
+
+    Returns:
+        dict: counts of processed, geocoded, not_found, coarse (only a
+              country-level answer; left uncoded and retried once the cached
+              answer expires), failed (backend errors, retried next run) and
+              no_address locations, plus cached and looked_up answers
+    """
+    service = service or geocoding_service
+    if not service.is_configured():
+        raise GeocodingError('No geocoding backend configured')
+    if rate is None:
+        rate = float(os.getenv('GEOCODING_BATCH_RATE', DEFAULT_RATE))
+    limiter = RateLimiter(rate)
+    stats = dict.fromkeys(
+        ('processed', 'geocoded', 'not_found', 'coarse', 'failed', 'no_address', 'cached', 'looked_up'), 0
+    )
+    after_id = 0
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        while limit is None or stats['processed'] < limit:
+            size = batch_size if limit is None else min(batch_size, limit - stats['processed'])
+            locations = _next_batch(after_id, size)
+            if not locations:
+                break
+            after_id = locations[-1].id
+            _geocode_batch(service, locations, executor, limiter, stats)
+            if progress:
+                progress(dict(stats))
+    return stats
+
+
+def _set_status(**values):
+    with _job_lock:
+        _job_status.update(values)
+
+
+def get_job_status():
+    """State of this process's background job: idle, running, completed or error, with its counts"""
+    with _job_lock:
+        return dict(_job_status)
+
+
+def _run_job(app, options):
+    with app.app_context():
+        try:
+            stats = geocode_missing_locations(progress=lambda s: _set_status(stats=s), **options)
+            _set_status(state='completed', stats=stats, finished_at=datetime.utcnow().isoformat())
+            app.logger.info(f"Location geocoding finished: {stats}")
+        except Exception as e:
+            db.session.rollback()
+            app.logger.exception("Location geocoding job failed")
+            _set_status(state='error', error=str(e), finished_at=datetime.utcnow().isoformat())
+        finally:
+            db.session.remove()
+
+
+def start_background_job(**options):
+    """Run geocode_missing_locations in a daemon thread; False if one is already running in this process"""
+    global _job_thread
+    app = current_app._get_current_object()
+    with _job_lock:
+        if _job_thread is not None and _job_thread.is_alive():
+            return False
+        _job_status.clear()
+        _job_status.update(state='running', started_at=datetime.utcnow().isoformat(), stats=None)
+        _job_thread = threading.Thread(target=_run_job, args=(app, options), name='location-geocoding', daemon=True)
+        _job_thread.start()
+    return True
@@ -0,0 +1,84 @@
+"""
+Sprite atlas encoding.
+
+Composed atlases are encoded once per shard and scale in one of
+SPRITE_FORMATS. Lossy formats take a quality setting (per-format defaults
+in DEFAULT_QUALITY); PNG is lossless unless ``png_colors`` asks for
+palette quantization. AVIF is offered only when Pillow can write it
+(Pillow >= 11.3, or the pillow-avif-plugin package).
+"""
+from io import BytesIO
+
+from PIL import Image
+
+try:
+    import pillow_avif  # noqa: F401  (registers the AVIF plugin on older Pillow)
+except ImportError:
+    pass
+
+# format -> (Pillow format name, file extension, content type)
+SPRITE_FORMATS = {
+    'jpeg': ('JPEG', 'jpg', 'image/jpeg'),
+    'webp': ('WEBP', 'webp', 'image/webp'),
+    'avif': ('AVIF', 'avif', 'image/avif'),
+    'png': ('PNG', 'png', 'image/png'),
+}
+
+DEFAULT_QUALITY = {
+    'jpeg': 90,
+    'webp': 85,
+    'avif': 60,
+}
+
+
+def is_format_available(image_format):
+    """True when Pillow in this environment can write the sprite format"""
+    if image_format not in SPRITE_FORMATS:
+        return False
+    Image.init()
+    return SPRITE_FORMATS[image_format][0] in Image.SAVE
+
+
+def available_formats():
+    return [image_format for image_format in SPRITE_FORMATS if is_format_available(image_format)]
+
+
+def encode_sprite(sprite, image_format='webp', quality=None, png_colors=0):
+    """
+    Encode an RGB sprite atlas
+
+    Args:
+        sprite (PIL.Image): Composed atlas
+        image_format (str): One of SPRITE_FORMATS
+        quality (int): Lossy quality; None uses DEFAULT_QUALITY for the format
+        png_colors (int): Quantize PNG output to this many colors (0 = lossless)
+
+    Returns:
+        bytes: Encoded image
+    """
+    if not is_format_available(image_format):
+        raise ValueError(f'Sprite format {image_format!r} is not supported by this Pillow build')
+    if quality is None:
+        quality = DEFAULT_QUALITY.get(image_format)
+    if sprite.mode != 'RGB':
+        sprite = sprite.convert('RGB')
+
+    output = BytesIO()
+    if image_format == 'jpeg':
+        sprite.save(
+            output,
+            'JPEG',
+            quality=quality,
+            optimize=True,
+            progressive=True,
+            subsampling='4:4:4'  # No chroma subsampling: small faces smear otherwise
+        )
+    elif image_format == 'webp':
+        sprite.save(output, 'WEBP', quality=quality, method=4)
+    elif image_format == 'avif':
+        sprite.save(output, 'AVIF', quality=quality, speed=6)
+    else:
+        if png_colors:
+            sprite = sprite.quantize(colors=png_colors, method=Image.Quantize.FASTOCTREE)
+        sprite.save(output, 'PNG', optimize=True)
+    return output.getvalue()
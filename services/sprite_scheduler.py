@@ -0,0 +1,217 @@
+"""
+Single-flight, debounced sprite sheet regeneration shared by all workers.
+
+Saves call request_regeneration(), which only records a SpriteSheetRequest
+row and pushes the job's debounce deadline back. One runner thread per worker
+process wakes up, waits until edits have been quiet for the debounce window
+(or the oldest request has waited SPRITE_REGEN_MAX_DELAY_SECONDS), then
+claims the lease on the single SpriteSheetJob row with a compare-and-set
+UPDATE. Only the lease holder rebuilds; every request queued up to that
+point is coalesced into one incremental patch (or one full rebuild). Requests
+are deleted only after success, so a worker that dies mid-build leaves them
+for the next lease holder once the lease expires.
+
+Status lives on the job row, so every worker reports the same state.
+"""
+import os
+import socket
+import threading
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import func, or_, update
+from sqlalchemy.exc import IntegrityError
+
+from models import db, Clergy, SpriteSheet, SpriteSheetJob, SpriteSheetRequest
+from .image_upload import get_image_upload_service
+
+JOB_ID = 1
+# Above this many distinct clergy in one batch a full rebuild is cheaper than patching
+FULL_REBUILD_THRESHOLD = 200
+
+_owner = f'{socket.gethostname()}:{os.getpid()}'
+_runner = None
+_runner_lock = threading.Lock()
+_wakeup = threading.Event()
+
+
+def _seconds(name, default):
+    return float(os.getenv(name, default))
+
+
+def _get_or_create_job():
+    job = db.session.get(SpriteSheetJob, JOB_ID)
+    if job is None:
+        try:
+            db.session.add(SpriteSheetJob(id=JOB_ID, status='idle'))
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()  # Another worker created it first
+        job = db.session.get(SpriteSheetJob, JOB_ID)
+    return job
+
+
+def request_regeneration(clergy_id=None):
+    """Queue a sprite update for one clergy member (None = full rebuild) and wake the runner"""
+    _get_or_create_job()
+    now = datetime.utcnow()
+    db.session.add(SpriteSheetRequest(clergy_id=clergy_id, requested_at=now))
+    db.session.execute(
+        update(SpriteSheetJob)
+        .where(SpriteSheetJob.id == JOB_ID)
+        .values(
+            debounce_until=now + timedelta(seconds=_seconds('SPRITE_REGEN_DEBOUNCE_SECONDS', '5')),
+            status=db.case((SpriteSheetJob.status == 'in_progress', SpriteSheetJob.status), else_='pending'),
+        )
+    )
+    db.session.commit()
+    _ensure_runner(current_app._get_current_object())
+    _wakeup.set()
+    return True
+
+
+def _ensure_runner(app):
+    global _runner
+    with _runner_lock:
+        if _runner is None or not _runner.is_alive():
+            _runner = threading.Thread(target=_run_loop, args=(app,), name='sprite-scheduler', daemon=True)
+            _runner.start()
+
+
+def _run_loop(app):
+    poll_seconds = _seconds('SPRITE_REGEN_POLL_SECONDS', '30')
+    while True:
+        wait_seconds = poll_seconds
+        with app.app_context():
+            try:
+                next_check = _run_once()
+                if next_check is not None:
+                    wait_seconds = max(0.5, min(poll_seconds, next_check))
+            except Exception:
+                db.session.rollback()
+                current_app.logger.exception("Sprite scheduler iteration failed")
+            finally:
+                db.session.remove()
+        _wakeup.wait(timeout=wait_seconds)
+        _wakeup.clear()
+
+
+def _run_once():
+    """Claim and run one coalesced batch if due. Returns seconds until the next check, or None if idle"""
+    now = datetime.utcnow()
+    job = db.session.get(SpriteSheetJob, JOB_ID)
+    oldest = db.session.query(func.min(SpriteSheetRequest.requested_at)).scalar()
+    if job is None or oldest is None:
+        return None
+
+    if job.lease_owner and job.lease_expires_at and job.lease_expires_at > now:
+        return (job.lease_expires_at - now).total_seconds()
+
+    ready_at = min(job.debounce_until or now, oldest + timedelta(seconds=_seconds('SPRITE_REGEN_MAX_DELAY_SECONDS', '60')))
+    if job.status == 'error' and job.completed_at:
+        ready_at = max(ready_at, job.completed_at + timedelta(seconds=_seconds('SPRITE_REGEN_RETRY_SECONDS', '60')))
+    if ready_at > now:
+        return (ready_at - now).total_seconds()
+
+    image_upload_service = get_image_upload_service()
+    if not image_upload_service.storage_configured:
+        SpriteSheetRequest.query.delete()
+        job.status = 'error'
+        job.error = 'Image storage not configured'
+        job.completed_at = now
+        db.session.commit()
+        return None
+
+    upto = db.session.query(func.max(SpriteSheetRequest.id)).scalar()
+    claimed = db.session.execute(
+        update(SpriteSheetJob)
+        .where(
+            SpriteSheetJob.id == JOB_ID,
+            or_(SpriteSheetJob.lease_owner.is_(None), SpriteSheetJob.lease_expires_at < now),
+        )
+        .values(
+            lease_owner=_owner,
+            lease_expires_at=now + timedelta(seconds=_seconds('SPRITE_REGEN_LEASE_SECONDS', '600')),
+            claimed_request_id=upto,
+            status='in_progress',
+            started_at=now,
+            error=None,
+        )
+    ).rowcount
+    db.session.commit()
+    if not claimed:
+        return 1.0  # Lost the race; the winner's lease is visible on the next check
+
+    clergy_ids = {
+        row[0] for row in
+        db.session.query(SpriteSheetRequest.clergy_id).filter(SpriteSheetRequest.id <= upto).distinct()
+    }
+    result = None
+    try:
+        has_sheet = SpriteSheet.query.filter_by(is_current=True).first() is not None
+        if None in clergy_ids or len(clergy_ids) > FULL_REBUILD_THRESHOLD or not has_sheet:
+            current_app.logger.info("Sprite scheduler: full rebuild for %d queued request(s)", upto)
+            all_clergy = Clergy.query.filter(Clergy.is_deleted != True).all()
+            if all_clergy:
+                result = image_upload_service.create_sprite_sheet(all_clergy)
+            else:
+                result = {'success': False, 'error': 'No clergy found'}
+        else:
+            current_app.logger.info("Sprite scheduler: patching %d clergy tile(s)", len(clergy_ids))
+            result = image_upload_service.update_sprite_sheet(clergy_ids)
+        if result.get('success'):
+            image_upload_service.prune_sprite_sheets()
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.exception("Error in sprite sheet regeneration")
+        result = {'success': False, 'error': str(e)}
+    finally:
+        _finish(upto, result or {'success': False, 'error': 'Interrupted'})
+    return 0.0
+
+
+def _finish(upto, result):
+    """Release the lease; drop processed requests on success (failed ones are retried)"""
+    db.session.rollback()
+    if result.get('success'):
+        SpriteSheetRequest.query.filter(SpriteSheetRequest.id <= upto).delete(synchronize_session=False)
+        current_app.logger.info("Sprite sheet regenerated: %s", result.get('url'))
+    else:
+        current_app.logger.warning("Failed to regenerate sprite sheet: %s", result.get('error', 'Unknown error'))
+    db.session.execute(
+        update(SpriteSheetJob)
+        .where(SpriteSheetJob.id == JOB_ID, SpriteSheetJob.lease_owner == _owner)
+        .values(
+            lease_owner=None,
+            lease_expires_at=None,
+            claimed_request_id=None,
+            status='completed' if result.get('success') else 'error',
+            completed_at=datetime.utcnow(),
+            sprite_sheet_id=result.get('sprite_sheet_id') or SpriteSheetJob.sprite_sheet_id,
+            error=None if result.get('success') else result.get('error', 'Unknown error'),
+        )
+    )
+    db.session.commit()
+
+
+def get_status():
+    """Regeneration status as seen by every worker"""
+    job = db.session.get(SpriteSheetJob, JOB_ID)
+    pending = SpriteSheetRequest.query.count()
+    if job is None:
+        return {'status': 'idle', 'pending_requests': pending}
+    status = job.status
+    if pending and status in ('completed', 'idle'):
+        status = 'pending'
+    sprite_sheet = db.session.get(SpriteSheet, job.sprite_sheet_id) if job.sprite_sheet_id else None
+    return {
+        'status': status,
+        'pending_requests': pending,
+        'lease_owner': job.lease_owner,
+        'lease_expires_at': job.lease_expires_at.isoformat() if job.lease_expires_at else None,
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'completed_at': job.completed_at.isoformat() if job.completed_at else None,
+        'sprite_sheet_id': job.sprite_sheet_id,
+        'url': sprite_sheet.url if sprite_sheet else None,
+        'error': job.error,
+    }
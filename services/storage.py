@@ -0,0 +1,199 @@
+"""
+Object storage backends for uploaded images and sprite sheets
+
+ImageUploadService stores objects through one of these drivers instead of
+calling boto3 directly:
+
+- ``backblaze`` (default): the Backblaze B2 bucket from backblaze_config,
+  through its S3-compatible API
+- ``local``: files under STORAGE_LOCAL_ROOT, served by the storage blueprint
+  with send_file, or handed to the front-end server via X-Sendfile /
+  X-Accel-Redirect
+
+Select the driver with STORAGE_BACKEND. Object keys and the image_data
+layout are the same for both, so rows only differ in their public URLs.
+"""
+
+import mimetypes
+import os
+import uuid
+
+from flask import Response, current_app, send_file
+from werkzeug.security import safe_join
+
+DELETE_BATCH_SIZE = 1000  # S3 DeleteObjects limit
+
+# Object keys are unique per upload, so served files never change
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+
+class S3Storage:
+    """Objects in the Backblaze B2 bucket"""
+
+    name = 'backblaze'
+    serves_locally = False
+
+    def __init__(self, config):
+        self.config = config
+        self.client = config.s3_client
+        self.bucket_name = config.bucket_name
+
+    def put(self, object_key, body, content_type):
+        self.client.put_object(
+            Bucket=self.bucket_name,
+            Key=object_key,
+            Body=body,
+            ContentType=content_type
+        )
+
+    def read(self, object_key):
+        response = self.client.get_object(Bucket=self.bucket_name, Key=object_key)
+        return response['Body'].read()
+
+    def delete(self, object_key):
+        self.client.delete_object(Bucket=self.bucket_name, Key=object_key)
+
+    def delete_many(self, object_keys):
+        """Delete keys in DeleteObjects batches; returns [(key, message)] for failures"""
+        object_keys = list(object_keys)
+        errors = []
+        for start in range(0, len(object_keys), DELETE_BATCH_SIZE):
+            batch = object_keys[start:start + DELETE_BATCH_SIZE]
+            response = self.client.delete_objects(
+                Bucket=self.bucket_name,
+                Delete={'Objects': [{'Key': key} for key in batch], 'Quiet': True}
+            )
+            errors.extend((error.get('Key'), error.get('Message')) for error in response.get('Errors', []))
+        return errors
+
+    def public_url(self, object_key):
+        return self.config.get_public_url(object_key)
+
+    def url_prefix(self):
+        endpoint_domain = self.config.endpoint_url.replace('https://', '').replace('http://', '')
+        return f"https://{self.bucket_name}.{endpoint_domain}/"
+
+
+class LocalStorage:
+    """Objects as files under a local directory"""
+
+    name = 'local'
+    serves_locally = True
+
+    def __init__(self, root, base_url='/storage', accel_redirect_prefix=None):
+        self.root = os.path.abspath(root)
+        self.base_url = base_url.rstrip('/')
+        self.accel_redirect_prefix = accel_redirect_prefix.rstrip('/') if accel_redirect_prefix else None
+        os.makedirs(self.root, exist_ok=True)
+
+    def path(self, object_key):
+        """Filesystem path of an object key, or None if it would escape the root"""
+        return safe_join(self.root, object_key)
+
+    def put(self, object_key, body, content_type):
+        path = self.path(object_key)
+        if path is None:
+            raise ValueError(f"Invalid object key: {object_key}")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(body)
+        os.replace(tmp_path, path)
+
+    def read(self, object_key):
+        path = self.path(object_key)
+        if path is None:
+            raise FileNotFoundError(object_key)
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def delete(self, object_key):
+        path = self.path(object_key)
+        if path is None:
+            raise ValueError(f"Invalid object key: {object_key}")
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass  # Same as deleting a missing S3 key
+
+    def delete_many(self, object_keys):
+        """Delete keys; returns [(key, message)] for failures"""
+        errors = []
+        for object_key in object_keys:
+            try:
+                self.delete(object_key)
+            except (OSError, ValueError) as e:
+                errors.append((object_key, str(e)))
+        return errors
+
+    def public_url(self, object_key):
+        if not object_key:
+            return None
+        return f"{self.url_prefix()}{object_key}"
+
+    def url_prefix(self):
+        return f"{self.base_url}/"
+
+    def send(self, object_key):
+        """Response serving an object, or None if it does not exist"""
+        path = self.path(object_key)
+        if path is None or not os.path.isfile(path):
+            return None
+        if self.accel_redirect_prefix:
+            # nginx serves the file from an internal location mapped to the storage root
+            response = Response(mimetype=mimetypes.guess_type(path)[0] or 'application/octet-stream')
+            response.headers['X-Accel-Redirect'] = f"{self.accel_redirect_prefix}/{object_key}"
+        else:
+            # Honours USE_X_SENDFILE for Apache / lighttpd
+            response = send_file(path, conditional=True, max_age=IMMUTABLE_MAX_AGE)
+        response.headers['Cache-Control'] = f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+        return response
+
+    def read_url(self, url):
+        """Bytes behind one of this storage's public URLs, or None for other URLs"""
+        if not url or not url.startswith(self.url_prefix()):
+            return None
+        try:
+            return self.read(url[len(self.url_prefix()):])
+        except OSError:
+            return None
+
+
+def create_storage():
+    """Build the storage driver selected by STORAGE_BACKEND"""
+    backend = os.getenv('STORAGE_BACKEND', 'backblaze').lower()
+    if backend == 'local':
+        default_root = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'instance', 'storage')
+        return LocalStorage(
+            os.getenv('STORAGE_LOCAL_ROOT', default_root),
+            base_url=os.getenv('STORAGE_LOCAL_URL', '/storage'),
+            accel_redirect_prefix=os.getenv('STORAGE_ACCEL_REDIRECT_PREFIX'),
+        )
+    if backend in ('backblaze', 's3'):
+        from .backblaze_config import get_backblaze_config
+        return S3Storage(get_backblaze_config())
+    raise ValueError(f"Unknown STORAGE_BACKEND: {backend}")
+
+
+# Global instance
+storage = None
+
+
+def get_storage():
+    """Get the global storage driver instance"""
+    global storage
+    if storage is None:
+        storage = create_storage()
+    return storage
+
+
+def init_storage():
+    """Initialize the storage driver (call this in app startup)"""
+    try:
+        global storage
+        storage = create_storage()
+        current_app.logger.info(f"Storage backend: {storage.name}")
+        return True
+    except Exception as e:
+        current_app.logger.error(f"Failed to initialize storage: {e}")
+        return False
@@ -0,0 +1,387 @@
+"""
+Synthetic lineage datasets for benchmarks and load tests.
+
+Generates a reproducible (seeded) clergy graph with a realistic shape:
+preferential-attachment fan-out (a few bishops ordain/consecrate most clergy),
+bishops with multiple consecrations, sub conditione re-ordinations,
+co-consecrators, doubtful/invalid events, organizations inherited down the
+line, user tags, chapel locations, interlinked wiki articles, mixed date
+precision and a handful of deliberate consecration cycles (bad data the
+lineage code must tolerate).
+
+Rows are inserted with PostgreSQL COPY when available, otherwise Core
+executemany; never one ORM object per row. Used by ``flask gen-lineage``,
+benchmarks/bench_lineage.py and benchmarks/load_test.py.
+"""
+import csv
+import io
+import random
+from datetime import date
+
+from sqlalchemy import func
+
+from models import (
+    db, Clergy, Rank, Organization, Tag, Ordination, Consecration,
+    Location, WikiPage, co_consecrators, clergy_tags,
+)
+
+SYNTHETIC_RANKS = (
+    {'name': 'Priest', 'color': '#34495e', 'is_bishop': False},
+    {'name': 'Bishop', 'color': '#0b9f2f', 'is_bishop': True},
+    {'name': 'Archbishop', 'color': '#8e44ad', 'is_bishop': True},
+)
+
+_FIRST_NAMES = (
+    'John', 'Peter', 'Paul', 'James', 'Thomas', 'Francis', 'Joseph', 'Michael',
+    'Anthony', 'Pius', 'Gregory', 'Leo', 'Louis', 'Marcel', 'Pierre', 'Carlos',
+    'Mark', 'Donald', 'Richard', 'Daniel', 'Martin', 'Clement', 'Robert', 'Luis',
+)
+_LAST_NAMES = (
+    'Thuc', 'Lefebvre', 'Sanborn', 'Carmona', 'Zamora', 'Musey', 'Vezelis',
+    'Pivarunas', 'McKenna', 'Guerard', 'Des Lauriers', 'Slupski', 'Dolan',
+    'Kelly', 'Fellay', 'Williamson', 'Tissier', 'Galarreta', 'Mayer', 'Neville',
+)
+
+SYNTHETIC_ORGANIZATIONS = (
+    {'name': 'Synthetic Society of St. Pius V', 'abbreviation': 'SYN-SSPV', 'color': '#27ae60'},
+    {'name': 'Synthetic Roman Catholic Institute', 'abbreviation': 'SYN-RCI', 'color': '#2980b9'},
+    {'name': 'Synthetic Congregation of Mary Immaculate', 'abbreviation': 'SYN-CMRI', 'color': '#c0392b'},
+    {'name': 'Synthetic Independent Chapels', 'abbreviation': 'SYN-IND', 'color': '#7f8c8d'},
+    {'name': 'Synthetic Old Roman Catholic Church', 'abbreviation': 'SYN-ORCC', 'color': '#d35400'},
+)
+
+# User (non-system) tags; system validity tags are computed by validation_cascade.
+SYNTHETIC_TAGS = (
+    {'name': 'synthetic-author', 'label': 'Author', 'color_hex': '#16a085'},
+    {'name': 'synthetic-missionary', 'label': 'Missionary', 'color_hex': '#8e44ad'},
+    {'name': 'synthetic-rector', 'label': 'Seminary Rector', 'color_hex': '#2c3e50'},
+)
+
+SYNTHETIC_LOCATION_TYPES = ('church', 'chapel', 'chapel', 'chapel', 'seminary', 'monastery', 'cathedral')
+
+INSERT_CHUNK_SIZE = 5000
+
+
+def _event_when(rng, year):
+    """Return (date, year, details_unknown) with mixed precision."""
+    roll = rng.random()
+    if roll < 0.7:
+        return date(year, rng.randint(1, 12), rng.randint(1, 28)), year, False
+    if roll < 0.9:
+        return None, year, False
+    return None, None, True
+
+
+def _validity_flags(rng):
+    """Mostly-valid event flags with a realistic share of doubtful/invalid events."""
+    roll = rng.random()
+    return {
+        'is_doubtful_event': roll < 0.03,
+        'is_doubtfully_valid': 0.03 <= roll < 0.05,
+        'is_invalid': 0.05 <= roll < 0.06,
+    }
+
+
+def build_lineage_dataset(num_clergy, seed=0, start_id=1, consecration_start_id=1,
+                          bishop_ratio=0.15, multi_consecration_ratio=0.1, co_consecrator_ratio=0.3,
+                          num_cycles=None):
+    """Build dataset rows in memory. Returns dict of row lists keyed by table.
+
+    Clergy and consecration IDs are assigned explicitly (co-consecrator rows
+    reference them) starting from ``start_id`` / ``consecration_start_id`` so
+    datasets can be appended to a database that already has data.
+    """
+    rng = random.Random(seed)
+    num_roots = max(3, num_clergy // 5000)
+    if num_cycles is None:
+        num_cycles = max(1, num_clergy // 10000)
+
+    clergy_rows, ordination_rows, consecration_rows, co_rows, tag_rows = [], [], [], [], []
+    org_names = [o['name'] for o in SYNTHETIC_ORGANIZATIONS]
+    tag_names = [t['name'] for t in SYNTHETIC_TAGS]
+    org_by_clergy = {}
+    # Preferential attachment: each bishop appears once plus once per child.
+    bishop_lottery = []
+    bishop_ids = []
+    next_consecration_id = consecration_start_id
+
+    for i in range(num_clergy):
+        cid = start_id + i
+        is_root = i < num_roots
+        is_bishop = is_root or rng.random() < bishop_ratio
+        ordination_year = 1850 + int(170 * i / max(num_clergy, 1)) + rng.randint(0, 3)
+        rank = 'Priest'
+        if is_bishop:
+            rank = 'Archbishop' if rng.random() < 0.1 else 'Bishop'
+        birth_year = ordination_year - rng.randint(24, 35)
+        ordainer = rng.choice(bishop_lottery) if (not is_root and bishop_lottery) else None
+        # Clergy usually stay in their ordaining bishop's organization.
+        if ordainer is not None and rng.random() < 0.8:
+            organization = org_by_clergy[ordainer]
+        else:
+            organization = rng.choice(org_names)
+        org_by_clergy[cid] = organization
+        if rng.random() < 0.1:
+            tag_rows.append({'clergy_id': cid, 'tag_name': rng.choice(tag_names)})
+        clergy_rows.append({
+            'id': cid,
+            'name': f'{rng.choice(_FIRST_NAMES)} {rng.choice(_LAST_NAMES)} {cid}',
+            'rank': rank,
+            'organization': organization,
+            'date_of_birth': date(birth_year, rng.randint(1, 12), rng.randint(1, 28)),
+            'date_of_death': (
+                date(birth_year + rng.randint(60, 95), rng.randint(1, 12), rng.randint(1, 28))
+                if birth_year < 1940 else None
+            ),
+            'is_deleted': False,
+            'exclude_from_visualization': False,
+        })
+
+        if ordainer is not None:
+            when, year, unknown = _event_when(rng, ordination_year)
+            ordination_rows.append({
+                'clergy_id': cid,
+                'ordaining_bishop_id': ordainer,
+                'date': when,
+                'year': year,
+                'details_unknown': unknown,
+                'is_sub_conditione': False,
+                **_validity_flags(rng),
+            })
+            bishop_lottery.append(ordainer)
+            if rng.random() < 0.03:
+                # Conditional re-ordination by another bishop a few years later.
+                when, year, unknown = _event_when(rng, ordination_year + rng.randint(1, 8))
+                ordination_rows.append({
+                    'clergy_id': cid,
+                    'ordaining_bishop_id': rng.choice(bishop_lottery),
+                    'date': when,
+                    'year': year,
+                    'details_unknown': unknown,
+                    'is_sub_conditione': True,
+                    'is_doubtful_event': False,
+                    'is_doubtfully_valid': False,
+                    'is_invalid': False,
+                })
+
+        if is_bishop and not is_root and bishop_lottery:
+            consecration_year = ordination_year + rng.randint(5, 25)
+            num_consecrations = 2 if rng.random() < multi_consecration_ratio else 1
+            for n in range(num_consecrations):
+                consecrator = rng.choice(bishop_lottery)
+                when, year, unknown = _event_when(rng, consecration_year + n * rng.randint(1, 10))
+                consecration_rows.append({
+                    'id': next_consecration_id,
+                    'clergy_id': cid,
+                    'consecrator_id': consecrator,
+                    'date': when,
+                    'year': year,
+                    'details_unknown': unknown,
+                    'is_sub_conditione': n > 0,
+                    **_validity_flags(rng),
+                })
+                if rng.random() < co_consecrator_ratio and len(bishop_ids) > 2:
+                    co_ids = {rng.choice(bishop_ids) for _ in range(rng.randint(1, 2))}
+                    co_ids.discard(consecrator)
+                    for co_id in co_ids:
+                        co_rows.append({
+                            'consecration_id': next_consecration_id,
+                            'co_consecrator_id': co_id,
+                        })
+                bishop_lottery.append(consecrator)
+                next_consecration_id += 1
+
+        if is_bishop:
+            bishop_ids.append(cid)
+            bishop_lottery.append(cid)
+
+    # Cycles: an older bishop "consecrated" by one of the newest bishops.
+    for _ in range(num_cycles if len(bishop_ids) > 10 else 0):
+        older = rng.choice(bishop_ids[: len(bishop_ids) // 10])
+        newer = rng.choice(bishop_ids[-(len(bishop_ids) // 10):])
+        if older == newer:
+            continue
+        consecration_rows.append({
+            'id': next_consecration_id,
+            'clergy_id': older,
+            'consecrator_id': newer,
+            'date': None,
+            'year': None,
+            'details_unknown': True,
+            'is_sub_conditione': True,
+            'is_doubtful_event': True,
+            'is_doubtfully_valid': False,
+            'is_invalid': False,
+        })
+        next_consecration_id += 1
+
+    names = {row['id']: row['name'] for row in clergy_rows}
+    consecrator_by_clergy = {
+        row['clergy_id']: row['consecrator_id']
+        for row in consecration_rows if not row['is_sub_conditione']
+    }
+
+    location_rows = []
+    for n in range(max(5, num_clergy // 25)):
+        location_rows.append({
+            'name': f'Synthetic Chapel {start_id + n}',
+            'city': f'Synthetic City {rng.randint(1, 500)}',
+            'country': rng.choice(('United States', 'Mexico', 'France', 'Germany', 'Argentina', 'Philippines')),
+            'latitude': round(rng.uniform(-45, 60), 5),
+            'longitude': round(rng.uniform(-125, 150), 5),
+            'location_type': rng.choice(SYNTHETIC_LOCATION_TYPES),
+            'pastor_name': rng.choice(clergy_rows)['name'] if clergy_rows else None,
+            'organization': rng.choice(org_names),
+            'is_active': True,
+            'deleted': False,
+        })
+
+    # Wiki articles for ~5% of clergy (bishops first), linking to the consecrator's article.
+    wiki_rows, titles = [], set()
+    wiki_candidates = bishop_ids + [row['id'] for row in clergy_rows if row['rank'] == 'Priest']
+    for cid in wiki_candidates[: max(1, num_clergy // 20)]:
+        title = names[cid]
+        if title in titles:
+            continue
+        titles.add(title)
+        markdown = f'# {title}\n\n{title} ({cid}) is a synthetic clergy member used for load testing.\n'
+        consecrator = consecrator_by_clergy.get(cid)
+        if consecrator in names:
+            markdown += f'\nConsecrated by [[{names[consecrator]}]].\n'
+        wiki_rows.append({
+            'title': title,
+            'clergy_id': cid,
+            'markdown': markdown,
+            'edit_count': 1,
+            'is_visible': True,
+            'is_deleted': False,
+            'category': 'Synthetic',
+        })
+
+    return {
+        'ranks': [dict(r) for r in SYNTHETIC_RANKS],
+        'organizations': [dict(o) for o in SYNTHETIC_ORGANIZATIONS],
+        'tags': [dict(t) for t in SYNTHETIC_TAGS],
+        'clergy': clergy_rows,
+        'ordinations': ordination_rows,
+        'consecrations': consecration_rows,
+        'co_consecrators': co_rows,
+        'clergy_tags': tag_rows,
+        'locations': location_rows,
+        'wiki_pages': wiki_rows,
+    }
+
+
+def _with_column_defaults(table, rows):
+    """Fill scalar/callable Python-side column defaults (COPY bypasses them)."""
+    defaults = {}
+    for column in table.columns:
+        default = column.default
+        if default is None or column.primary_key:
+            continue
+        if default.is_scalar:
+            defaults[column.name] = default.arg
+        elif default.is_callable:
+            defaults[column.name] = default.arg(None)
+    return [{**defaults, **row} for row in rows]
+
+
+def _copy_rows(table, rows):
+    """Stream rows into PostgreSQL with COPY ... FROM STDIN (CSV)."""
+    columns = list(rows[0].keys())
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for row in rows:
+        # Unquoted empty field is NULL in CSV COPY format.
+        writer.writerow(['' if row[c] is None else row[c] for c in columns])
+    buf.seek(0)
+    column_sql = ', '.join(f'"{c}"' for c in columns)
+    dbapi_conn = db.session.connection().connection.dbapi_connection
+    with dbapi_conn.cursor() as cursor:
+        cursor.copy_expert(f'COPY "{table.name}" ({column_sql}) FROM STDIN WITH (FORMAT csv)', buf)
+
+
+def _bulk_insert(table, rows, use_copy):
+    if not rows:
+        return
+    rows = _with_column_defaults(table, rows)
+    if use_copy:
+        _copy_rows(table, rows)
+        return
+    for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+        db.session.execute(table.insert(), rows[start:start + INSERT_CHUNK_SIZE])
+
+
+def _reset_postgres_sequences():
+    """Explicit IDs bypass SERIAL sequences; move them past the inserted rows."""
+    if db.engine.dialect.name != 'postgresql':
+        return
+    for table in ('clergy', 'ordination', 'consecration'):
+        db.session.execute(db.text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+            f"COALESCE((SELECT MAX(id) FROM {table}), 1))"
+        ))
+
+
+def _ensure_named_rows(model, rows):
+    """Insert lookup rows (ranks/orgs/tags) whose name is missing; return {name: id}."""
+    existing = {obj.name: obj.id for obj in model.query.all()}
+    missing = [r for r in rows if r['name'] not in existing]
+    if missing:
+        _bulk_insert(model.__table__, missing, use_copy=False)
+        existing = {obj.name: obj.id for obj in model.query.all()}
+    return existing
+
+
+def insert_lineage_dataset(dataset, use_copy=None):
+    """Insert rows from build_lineage_dataset() and commit. Returns row counts.
+
+    ``use_copy`` defaults to True on PostgreSQL (psycopg2 COPY), False elsewhere.
+    """
+    if use_copy is None:
+        use_copy = db.engine.dialect.name == 'postgresql'
+
+    _ensure_named_rows(Rank, dataset['ranks'])
+    org_ids = _ensure_named_rows(Organization, dataset['organizations'])
+    tag_ids = _ensure_named_rows(Tag, dataset['tags'])
+
+    event_defaults = {
+        'is_sub_conditione': False,
+        'is_doubtfully_valid': False,
+        'is_doubtful_event': False,
+        'is_invalid': False,
+        'is_inherited': False,
+        'is_other': False,
+    }
+    _bulk_insert(Clergy.__table__, dataset['clergy'], use_copy)
+    _bulk_insert(
+        Ordination.__table__, [{**event_defaults, **r} for r in dataset['ordinations']], use_copy
+    )
+    _bulk_insert(
+        Consecration.__table__, [{**event_defaults, **r} for r in dataset['consecrations']], use_copy
+    )
+    _bulk_insert(co_consecrators, dataset['co_consecrators'], use_copy)
+    _bulk_insert(
+        clergy_tags,
+        [{'clergy_id': r['clergy_id'], 'tag_id': tag_ids[r['tag_name']]} for r in dataset['clergy_tags']],
+        use_copy,
+    )
+    _bulk_insert(
+        Location.__table__,
+        [{**r, 'organization_id': org_ids.get(r['organization'])} for r in dataset['locations']],
+        use_copy,
+    )
+    _bulk_insert(WikiPage.__table__, dataset['wiki_pages'], use_copy)
+    _reset_postgres_sequences()
+    db.session.commit()
+    return {key: len(rows) for key, rows in dataset.items()}
+
+
+def generate_lineage(num_clergy, seed=0, use_copy=None):
+    """Build and insert a dataset after any existing clergy. Returns row counts."""
+    start_id = (db.session.query(func.max(Clergy.id)).scalar() or 0) + 1
+    consecration_start_id = (db.session.query(func.max(Consecration.id)).scalar() or 0) + 1
+    dataset = build_lineage_dataset(
+        num_clergy, seed=seed, start_id=start_id, consecration_start_id=consecration_start_id
+    )
+    return insert_lineage_dataset(dataset, use_copy=use_copy)
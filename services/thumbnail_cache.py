@@ -0,0 +1,171 @@
+"""
+Local content-addressed cache of resized sprite thumbnails.
+
+Tiles are stored already resized to ``thumbnail_size`` as raw RGB bytes in a
+fixed-record file (``tiles_<size>.bin``, slot N at offset N * size * size * 3)
+that is read through mmap. A SQLite index beside it maps source URL ->
+content hash (plus ETag / Last-Modified validators) and content hash -> slot,
+so identical images under different URLs share one tile. SQLite transactions
+serialize slot allocation across gunicorn workers. When the store reaches
+its byte budget the least recently used tile's slot is reused.
+"""
+import mmap
+import os
+import sqlite3
+import threading
+import time
+
+from PIL import Image
+
+
+class ThumbnailCache:
+    """Disk tile store keyed by content hash, with a URL index and LRU eviction"""
+
+    def __init__(self, directory, thumbnail_size, max_bytes=256 * 1024 * 1024):
+        self.thumbnail_size = thumbnail_size
+        self.tile_bytes = thumbnail_size * thumbnail_size * 3
+        self.max_slots = max(1, max_bytes // self.tile_bytes)
+        os.makedirs(directory, exist_ok=True)
+        self.store_path = os.path.join(directory, f'tiles_{thumbnail_size}.bin')
+        self.index_path = os.path.join(directory, f'index_{thumbnail_size}.sqlite')
+
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._mmap = None
+        self._mmap_size = 0
+        open(self.store_path, 'ab').close()
+        with self._connection() as conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS tiles (
+                    content_hash TEXT PRIMARY KEY,
+                    slot INTEGER NOT NULL UNIQUE,
+                    last_used REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS ix_tiles_last_used ON tiles (last_used);
+                CREATE TABLE IF NOT EXISTS urls (
+                    url TEXT PRIMARY KEY,
+                    content_hash TEXT NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT
+                );
+                """
+            )
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.index_path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _read_slot(self, slot):
+        offset = slot * self.tile_bytes
+        with self._lock:
+            if self._mmap is None or offset + self.tile_bytes > self._mmap_size:
+                size = os.path.getsize(self.store_path)
+                if offset + self.tile_bytes > size:
+                    return None
+                if self._mmap is not None:
+                    self._mmap.close()
+                with open(self.store_path, 'rb') as f:
+                    self._mmap = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+                self._mmap_size = size
+            data = self._mmap[offset:offset + self.tile_bytes]
+        return Image.frombytes('RGB', (self.thumbnail_size, self.thumbnail_size), data)
+
+    def lookup(self, url):
+        """Return (tile or None, validators) for a source URL.
+
+        validators is {'etag', 'last_modified'} for conditional requests, or
+        None when the URL has never been seen.
+        """
+        row = self._connection().execute(
+            """
+            SELECT u.etag, u.last_modified, t.slot, t.content_hash
+            FROM urls u LEFT JOIN tiles t ON t.content_hash = u.content_hash
+            WHERE u.url = ?
+            """,
+            (url,),
+        ).fetchone()
+        if row is None:
+            return None, None
+        etag, last_modified, slot, content_hash = row
+        tile = self._read_slot(slot) if slot is not None else None
+        if tile is None:
+            return None, None
+        self._touch(content_hash)
+        return tile, {'etag': etag, 'last_modified': last_modified}
+
+    def lookup_content(self, content_hash):
+        """Tile already stored for this content hash (another URL, same bytes), or None"""
+        row = self._connection().execute(
+            'SELECT slot FROM tiles WHERE content_hash = ?', (content_hash,)
+        ).fetchone()
+        if row is None:
+            return None
+        tile = self._read_slot(row[0])
+        if tile is not None:
+            self._touch(content_hash)
+        return tile
+
+    def _touch(self, content_hash):
+        self._connection().execute(
+            'UPDATE tiles SET last_used = ? WHERE content_hash = ?', (time.time(), content_hash)
+        )
+
+    def store_many(self, entries):
+        """Store (url, content_hash, etag, last_modified, tile) entries in one transaction"""
+        if not entries:
+            return
+        conn = self._connection()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            with open(self.store_path, 'r+b') as store:
+                for url, content_hash, etag, last_modified, tile in entries:
+                    exists = conn.execute(
+                        'SELECT 1 FROM tiles WHERE content_hash = ?', (content_hash,)
+                    ).fetchone()
+                    if not exists:
+                        slot = self._allocate_slot(conn)
+                        store.seek(slot * self.tile_bytes)
+                        store.write(tile.convert('RGB').tobytes())
+                        conn.execute(
+                            'INSERT INTO tiles (content_hash, slot, last_used) VALUES (?, ?, ?)',
+                            (content_hash, slot, now),
+                        )
+                    conn.execute(
+                        'INSERT OR REPLACE INTO urls (url, content_hash, etag, last_modified) VALUES (?, ?, ?, ?)',
+                        (url, content_hash, etag, last_modified),
+                    )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def _allocate_slot(self, conn):
+        """Next unused slot, or the least recently used tile's slot once the budget is reached"""
+        (count,) = conn.execute('SELECT COUNT(*) FROM tiles').fetchone()
+        if count < self.max_slots:
+            (max_slot,) = conn.execute('SELECT MAX(slot) FROM tiles').fetchone()
+            return 0 if max_slot is None else max_slot + 1
+        content_hash, slot = conn.execute(
+            'SELECT content_hash, slot FROM tiles ORDER BY last_used LIMIT 1'
+        ).fetchone()
+        conn.execute('DELETE FROM tiles WHERE content_hash = ?', (content_hash,))
+        conn.execute('DELETE FROM urls WHERE content_hash = ?', (content_hash,))
+        return slot
+
+    def stats(self):
+        conn = self._connection()
+        (tiles,) = conn.execute('SELECT COUNT(*) FROM tiles').fetchone()
+        (urls,) = conn.execute('SELECT COUNT(*) FROM urls').fetchone()
+        return {
+            'tiles': tiles,
+            'urls': urls,
+            'bytes': tiles * self.tile_bytes,
+            'max_bytes': self.max_slots * self.tile_bytes,
+        }
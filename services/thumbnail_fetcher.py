@@ -0,0 +1,214 @@
+"""
+Concurrent thumbnail downloads for sprite sheet builds.
+
+A bounded thread pool fetches thumbnails over one pooled requests.Session
+(keep-alive, no handshake per image), limits in-flight requests per host,
+retries transient failures with exponential backoff and enforces a deadline
+for the whole build. Decoding and resizing run in the worker threads too, so
+they overlap with other downloads. Workers never touch the Flask app; callers
+log the returned failures.
+
+With a ThumbnailCache directory configured, already-resized tiles are reused:
+URLs under ``immutable_prefixes`` (uploads get unique keys, so their bytes
+never change) are served without any request, other URLs are revalidated
+with If-None-Match / If-Modified-Since, and downloads whose content hash is
+already cached skip decoding.
+
+A ``local_reader`` (url -> bytes or None) lets files on local storage be read
+from disk instead of over HTTP.
+"""
+import hashlib
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from io import BytesIO
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from PIL import Image
+
+from .thumbnail_cache import ThumbnailCache
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class ThumbnailFetchError(Exception):
+    """A thumbnail could not be downloaded or decoded."""
+
+
+class ThumbnailFetcher:
+    """Fetch and resize thumbnails concurrently with per-host limits and retries"""
+
+    def __init__(self, max_workers=16, per_host_limit=8, retries=3, backoff_seconds=0.5,
+                 request_timeout=10, deadline_seconds=120, cache_dir=None,
+                 cache_max_bytes=256 * 1024 * 1024, immutable_prefixes=(), local_reader=None):
+        self.max_workers = max_workers
+        self.per_host_limit = per_host_limit
+        self.retries = retries
+        self.backoff_seconds = backoff_seconds
+        self.request_timeout = request_timeout
+        self.deadline_seconds = deadline_seconds
+        self.local_reader = local_reader
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._host_limits = {}
+        self._host_limits_lock = threading.Lock()
+
+        self.cache_dir = cache_dir
+        self.cache_max_bytes = cache_max_bytes
+        self.immutable_prefixes = tuple(p for p in immutable_prefixes if p)
+        self._caches = {}
+        self._caches_lock = threading.Lock()
+
+    def _cache_for(self, thumbnail_size):
+        if not self.cache_dir:
+            return None
+        with self._caches_lock:
+            cache = self._caches.get(thumbnail_size)
+            if cache is None:
+                cache = self._caches[thumbnail_size] = ThumbnailCache(
+                    self.cache_dir, thumbnail_size, self.cache_max_bytes
+                )
+            return cache
+
+    def _host_semaphore(self, url):
+        host = urlparse(url).netloc
+        with self._host_limits_lock:
+            semaphore = self._host_limits.get(host)
+            if semaphore is None:
+                semaphore = self._host_limits[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return semaphore
+
+    def _download(self, url, deadline, headers=None):
+        """GET with retry/backoff on connection errors and retryable statuses; 304 is returned as-is"""
+        last_error = None
+        for attempt in range(self.retries + 1):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise ThumbnailFetchError('build deadline exceeded')
+            try:
+                with self._host_semaphore(url):
+                    response = self.session.get(url, headers=headers, timeout=min(self.request_timeout, remaining))
+                if response.status_code not in RETRY_STATUS_CODES:
+                    response.raise_for_status()
+                    return response
+                last_error = ThumbnailFetchError(f'HTTP {response.status_code}')
+            except (requests.ConnectionError, requests.Timeout) as e:
+                last_error = e
+            except requests.HTTPError as e:
+                raise ThumbnailFetchError(str(e)) from e
+            if attempt < self.retries:
+                delay = self.backoff_seconds * (2 ** attempt) * (0.5 + random.random())
+                time.sleep(max(0.0, min(delay, deadline - time.monotonic())))
+        raise ThumbnailFetchError(f'failed after {self.retries + 1} attempts: {last_error}')
+
+    def fetch_one(self, url, thumbnail_size, deadline=None, pending_entries=None, stats=None):
+        """Download (or reuse from cache) one thumbnail; return a thumbnail_size square RGB image
+
+        New cache entries are appended to ``pending_entries`` for a batched
+        store when given, otherwise stored immediately.
+        """
+        if deadline is None:
+            deadline = time.monotonic() + self.deadline_seconds
+        cache = self._cache_for(thumbnail_size)
+        cached_tile, validators = (None, None)
+        if cache is not None:
+            cached_tile, validators = cache.lookup(url)
+            if cached_tile is not None and self.immutable_prefixes and url.startswith(self.immutable_prefixes):
+                _count(stats, 'cached')
+                return cached_tile
+
+        content = self.local_reader(url) if self.local_reader else None
+        etag = last_modified = None
+        if content is None:
+            headers = {}
+            if cached_tile is not None and validators:
+                if validators.get('etag'):
+                    headers['If-None-Match'] = validators['etag']
+                if validators.get('last_modified'):
+                    headers['If-Modified-Since'] = validators['last_modified']
+            response = self._download(url, deadline, headers or None)
+            if response.status_code == 304 and cached_tile is not None:
+                _count(stats, 'revalidated')
+                return cached_tile
+            content = response.content
+            etag, last_modified = response.headers.get('ETag'), response.headers.get('Last-Modified')
+        content_hash = hashlib.sha256(content).hexdigest()
+        img = cache.lookup_content(content_hash) if cache is not None else None
+        if img is None:
+            try:
+                img = Image.open(BytesIO(content))
+                img.draft('RGB', (thumbnail_size, thumbnail_size))
+                if img.size != (thumbnail_size, thumbnail_size):
+                    img = img.resize((thumbnail_size, thumbnail_size), Image.Resampling.LANCZOS)
+                if img.mode != 'RGB':
+                    img = img.convert('RGB')
+            except Exception as e:
+                raise ThumbnailFetchError(f'could not decode image: {e}') from e
+        _count(stats, 'downloaded')
+
+        if cache is not None:
+            entry = (url, content_hash, etag, last_modified, img)
+            if pending_entries is not None:
+                pending_entries.append(entry)
+            else:
+                cache.store_many([entry])
+        return img
+
+    def fetch_many(self, items, thumbnail_size):
+        """
+        Fetch thumbnails for (key, url) pairs.
+
+        Returns:
+            tuple: ({key: PIL.Image}, {key: error message}, stats). Items
+                   still pending at the deadline are reported as failures;
+                   stats counts 'cached', 'revalidated' and 'downloaded'.
+        """
+        images, failures = {}, {}
+        stats = {'cached': 0, 'revalidated': 0, 'downloaded': 0}
+        if not items:
+            return images, failures, stats
+        deadline = time.monotonic() + self.deadline_seconds
+        pending_entries = []
+        executor = ThreadPoolExecutor(max_workers=min(self.max_workers, len(items)))
+        try:
+            futures = {
+                executor.submit(self.fetch_one, url, thumbnail_size, deadline, pending_entries, stats): key
+                for key, url in items
+            }
+            pending = set(futures)
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                for future in done:
+                    key = futures[future]
+                    try:
+                        images[key] = future.result()
+                    except Exception as e:
+                        failures[key] = str(e)
+            for future in pending:
+                future.cancel()
+                failures[futures[future]] = 'build deadline exceeded'
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        cache = self._cache_for(thumbnail_size)
+        if cache is not None:
+            cache.store_many(list(pending_entries))
+        return images, failures, stats
+
+
+_stats_lock = threading.Lock()
+
+
+def _count(stats, key):
+    if stats is not None:
+        with _stats_lock:
+            stats[key] += 1
@@ -0,0 +1,128 @@
+"""
+Ancestor chains for wiki lineage charts.
+
+A clergy's wiki lineage subset is their primary ordination (priests only)
+followed by the chain of primary consecrations up to the earliest known
+consecrator. The chain is walked in one recursive CTE instead of one query
+per generation, and each clergy's (node ids, links) are cached in-process
+for the current wiki graph version, which every clergy, ordination and
+consecration change bumps (see services.wiki_render).
+"""
+from sqlalchemy import func, select
+
+from constants import GREEN_COLOR, BLACK_COLOR
+from models import db, Clergy, Ordination, Consecration
+from services.wiki_render import GraphVersionCache, get_graph_version
+
+CACHE_MAX_ENTRIES = 2048
+
+_cache = GraphVersionCache(CACHE_MAX_ENTRIES)  # (clergy_id, is_bishop) -> (node_ids, links)
+
+
+def _visible_clergy(clergy_id_column):
+    """Clergy the chain may pass through: not deleted or excluded from visualization"""
+    return (
+        select(Clergy.id)
+        .where(
+            Clergy.id == clergy_id_column,
+            Clergy.is_deleted == False,  # noqa: E712
+            Clergy.exclude_from_visualization != True,  # noqa: E712
+        )
+        .exists()
+    )
+
+
+def _primary_id(model, clergy_id_column):
+    """Correlated id of a clergy's primary (first valid, non sub conditione) ordination or consecration"""
+    alias = db.aliased(model)
+    return (
+        select(func.min(alias.id))
+        .where(
+            alias.clergy_id == clergy_id_column,
+            alias.is_sub_conditione == False,  # noqa: E712
+            alias.is_invalid == False,  # noqa: E712
+        )
+        .scalar_subquery()
+    )
+
+
+def _consecration_chain(start_id):
+    """Primary consecrations from start_id upward, as {consecrated clergy id: Consecration}"""
+    anchor = (
+        select(Consecration.id, Consecration.consecrator_id)
+        .where(
+            Consecration.id == _primary_id(Consecration, start_id),
+            Consecration.consecrator_id.isnot(None),
+            _visible_clergy(start_id),
+        )
+    )
+    chain = anchor.cte('consecration_chain', recursive=True)
+    parent = db.aliased(Consecration)
+    # UNION (not UNION ALL) drops repeated rows, so a cycle in the data ends the walk
+    chain = chain.union(
+        select(parent.id, parent.consecrator_id)
+        .join(chain, parent.clergy_id == chain.c.consecrator_id)
+        .where(
+            parent.id == _primary_id(Consecration, chain.c.consecrator_id),
+            parent.consecrator_id.isnot(None),
+            _visible_clergy(chain.c.consecrator_id),
+        )
+    )
+    consecrations = Consecration.query.join(chain, Consecration.id == chain.c.id).all()
+    return {c.clergy_id: c for c in consecrations}
+
+
+def _primary_ordination(clergy_id):
+    return (
+        Ordination.query
+        .filter(Ordination.id == _primary_id(Ordination, clergy_id))
+        .first()
+    )
+
+
+def _walk(clergy_id, is_bishop):
+    node_ids = {clergy_id}
+    links = []
+    start_id = clergy_id
+    if not is_bishop:
+        # Priest: ordaining bishop first, then that bishop's consecration chain
+        po = _primary_ordination(clergy_id)
+        if not po or not po.ordaining_bishop_id:
+            return node_ids, links
+        start_id = po.ordaining_bishop_id
+        node_ids.add(start_id)
+        links.append({
+            'source': start_id, 'target': clergy_id, 'type': 'ordination',
+            'date': po.display_date, 'color': BLACK_COLOR,
+        })
+
+    by_clergy = _consecration_chain(start_id)
+    current, visited = start_id, set()
+    while current in by_clergy and current not in visited:
+        visited.add(current)
+        pc = by_clergy[current]
+        node_ids.add(pc.consecrator_id)
+        links.append({
+            'source': pc.consecrator_id, 'target': current, 'type': 'consecration',
+            'date': pc.display_date, 'color': GREEN_COLOR,
+        })
+        current = pc.consecrator_id
+    return node_ids, links
+
+
+def get_ancestor_subset(clergy_id, is_bishop):
+    """
+    Ancestor subset of a clergy's lineage.
+
+    Returns:
+        tuple: (node_ids set, links list) where links have
+               source/target/type/date/color, ordered from the clergy upward
+    """
+    graph_version = get_graph_version()
+    key = (clergy_id, is_bishop)
+    cached = _cache.get(key, graph_version)
+    if cached is GraphVersionCache.MISSING:
+        node_ids, links = _walk(clergy_id, is_bishop)
+        cached = (frozenset(node_ids), tuple(links))
+        _cache.set(key, graph_version, cached)
+    return set(cached[0]), [dict(link) for link in cached[1]]
@@ -0,0 +1,132 @@
+"""
+Wiki link graph: [[target]] / [[target|label]] links parsed out of page bodies.
+
+save_page keeps each page's rows in ``wiki_links`` in sync, so backlinks,
+orphan pages and most-linked reports are index lookups rather than scans
+over every page's markdown. Existing pages are indexed with
+``flask wiki-backfill-links``.
+"""
+import re
+
+from sqlalchemy import func
+
+from models import db, WikiPage, WikiLink
+
+# Same link syntax as static/js/wiki-renderer.js: no newlines, label after the first '|'
+WIKI_LINK_RE = re.compile(r'\[\[(.*?)\]\]')
+MAX_SLUG_LENGTH = 200  # WikiPage.title
+
+
+def parse_wiki_links(markdown):
+    """Set of page slugs linked from a markdown body"""
+    targets = set()
+    for raw in WIKI_LINK_RE.findall(markdown or ''):
+        target = raw.split('|', 1)[0]
+        if target and len(target) <= MAX_SLUG_LENGTH:
+            targets.add(target)
+    return targets
+
+
+def sync_page_links(page):
+    """Update the page's outgoing link rows to match its markdown; caller commits"""
+    targets = parse_wiki_links(page.markdown)
+    for link in list(page.outgoing_links):
+        if link.target_slug in targets:
+            targets.discard(link.target_slug)
+        else:
+            page.outgoing_links.remove(link)
+    for target in sorted(targets):
+        page.outgoing_links.append(WikiLink(target_slug=target))
+
+
+def backfill_wiki_links(batch_size=500):
+    """Rebuild wiki_links from every page body; returns (pages, links) indexed"""
+    db.session.query(WikiLink).delete(synchronize_session=False)
+    pages = links = 0
+    last_id = 0
+    while True:
+        batch = (
+            db.session.query(WikiPage.id, WikiPage.markdown)
+            .filter(WikiPage.id > last_id)
+            .order_by(WikiPage.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not batch:
+            break
+        rows = [
+            {'source_page_id': page_id, 'target_slug': target}
+            for page_id, markdown in batch
+            for target in parse_wiki_links(markdown)
+        ]
+        if rows:
+            db.session.execute(WikiLink.__table__.insert(), rows)
+        pages += len(batch)
+        links += len(rows)
+        last_id = batch[-1].id
+    db.session.commit()
+    return pages, links
+
+
+def _source_pages(include_hidden):
+    """Pages whose links count: not deleted, and visible unless include_hidden"""
+    query = WikiPage.query.filter(WikiPage.is_deleted == False)  # noqa: E712
+    if not include_hidden:
+        query = query.filter(WikiPage.is_visible == True)  # noqa: E712
+    return query
+
+
+def get_backlink_pages(slug, include_hidden=False):
+    """Pages linking to slug"""
+    return (
+        _source_pages(include_hidden)
+        .join(WikiLink, WikiLink.source_page_id == WikiPage.id)
+        .filter(WikiLink.target_slug == slug)
+        .order_by(WikiPage.title)
+        .all()
+    )
+
+
+def get_orphan_pages(include_hidden=False):
+    """Pages no other page links to"""
+    source = db.aliased(WikiPage)
+    linked = (
+        db.session.query(WikiLink.target_slug)
+        .join(source, source.id == WikiLink.source_page_id)
+        .filter(source.title != WikiLink.target_slug)  # Self-links don't count
+        .filter(source.is_deleted == False)  # noqa: E712
+    )
+    if not include_hidden:
+        linked = linked.filter(source.is_visible == True)  # noqa: E712
+    return (
+        _source_pages(include_hidden)
+        .filter(WikiPage.title.isnot(None), ~WikiPage.title.in_(linked))
+        .order_by(WikiPage.title)
+        .all()
+    )
+
+
+def get_most_linked(limit=50, include_hidden=False):
+    """[(slug, linking page count, page exists)] for the most linked-to slugs"""
+    source = db.aliased(WikiPage)
+    target = db.aliased(WikiPage)
+    target_visible = target.is_deleted == False  # noqa: E712
+    if not include_hidden:
+        target_visible = db.and_(target_visible, target.is_visible == True)  # noqa: E712
+    link_count = func.count(func.distinct(source.id))
+    query = (
+        db.session.query(WikiLink.target_slug, link_count, func.max(target.id))
+        .join(source, source.id == WikiLink.source_page_id)
+        .outerjoin(target, db.and_(target.title == WikiLink.target_slug, target_visible))
+        .filter(source.title != WikiLink.target_slug)
+        .filter(source.is_deleted == False)  # noqa: E712
+    )
+    if not include_hidden:
+        query = query.filter(source.is_visible == True)  # noqa: E712
+    rows = (
+        query.group_by(WikiLink.target_slug)
+        .order_by(link_count.desc(), WikiLink.target_slug)
+        .limit(limit)
+        .all()
+    )
+    return [(slug, count, target_id is not None) for slug, count, target_id in rows]
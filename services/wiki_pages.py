@@ -0,0 +1,66 @@
+"""
+Wiki page listings for the sidebar API and the editor dashboard.
+
+Listings never load markdown bodies (or the search vector): only the columns
+they show are selected, newest edits first by (updated_at, id) on
+ix_wiki_page_updated_at, one keyset page at a time. updated_at is NOT NULL,
+so every page has a position in that order and a valid cursor.
+"""
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import joinedload, load_only
+
+from models import db, WikiPage, User
+from services.keyset import encode_cursor, decode_cursor
+
+_LISTING_ORDER = (WikiPage.updated_at.desc(), WikiPage.id.desc())
+
+
+def _after(updated_at, page_id):
+    return or_(
+        WikiPage.updated_at < updated_at,
+        and_(WikiPage.updated_at == updated_at, WikiPage.id < page_id),
+    )
+
+
+def _paginate(query, limit, cursor):
+    """(rows, next cursor or None); every row needs updated_at and id"""
+    if cursor:
+        query = query.filter(_after(*decode_cursor(cursor, datetime, int)))
+    query = query.order_by(*_LISTING_ORDER)
+    if limit is None:
+        return query.all(), None
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    last = rows[limit - 1]
+    return rows[:limit], encode_cursor(last.updated_at, last.id)
+
+
+def list_page_summaries(include_hidden, limit=None, cursor=None):
+    """
+    (id, title, is_visible, is_deleted, updated_at) rows, newest first.
+
+    Without include_hidden only visible, non-deleted pages are listed. Without
+    a limit every matching page is returned in one go.
+    """
+    query = db.session.query(
+        WikiPage.id, WikiPage.title, WikiPage.is_visible, WikiPage.is_deleted, WikiPage.updated_at,
+    )
+    if not include_hidden:
+        query = query.filter(WikiPage.is_visible == True, WikiPage.is_deleted == False)  # noqa: E712
+    return _paginate(query, limit, cursor)
+
+
+def list_dashboard_pages(limit, cursor=None):
+    """WikiPage rows for the dashboard with only listed columns and author/editor usernames loaded"""
+    query = WikiPage.query.options(
+        load_only(
+            WikiPage.id, WikiPage.title, WikiPage.updated_at, WikiPage.is_visible, WikiPage.is_deleted,
+            WikiPage.author_id, WikiPage.last_editor_id,
+        ),
+        joinedload(WikiPage.author).load_only(User.username),
+        joinedload(WikiPage.last_editor).load_only(User.username),
+    )
+    return _paginate(query, limit, cursor)
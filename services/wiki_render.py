@@ -0,0 +1,508 @@
+"""
+Server-side wiki rendering with a per-page HTML cache.
+
+render_markdown() is a port of static/js/wiki-renderer.js and must produce
+the same markup, so prerendered pages and client-rendered previews look
+identical. Link existence and {{clergy:...}} shortcodes are resolved with one
+batched query each; {{lineage:...}} charts stay placeholders that the client
+hydrates.
+
+Rendered HTML is stored in ``wiki_rendered_pages`` keyed by (page, audience)
+and is valid for the page's edit_count and the wiki graph version. The graph
+version is a single-row counter bumped in the same transaction as any change
+that can alter another page's render: pages created, deleted, renamed or
+hidden, and clergy / ordination / consecration / rank / tag edits. Other
+derived wiki data (clergy summaries, lineage subsets) is cached in-process
+with GraphVersionCache against the same counter.
+"""
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import event, func, inspect, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload
+
+from models import db, WikiPage, WikiRenderedPage, Clergy, Ordination, Consecration, Rank, Tag
+from services.wiki_links import parse_wiki_links
+
+# Audiences differ in which pages count as existing for link styling
+AUDIENCE_PUBLIC = 'public'
+AUDIENCE_EDITOR = 'editor'
+
+_GRAPH_MODELS = (Clergy, Ordination, Consecration, Rank, Tag)
+_WIKI_GRAPH_ATTRS = ('title', 'is_visible', 'is_deleted', 'clergy_id')
+
+SUMMARY_CACHE_MAX_ENTRIES = 10000
+SUMMARY_QUERY_CHUNK = 500  # ids per IN (...) when loading summaries
+
+_listeners_installed = False
+
+EMPTY_STATE_HTML = '<div class="wiki-empty-state">Page does not exist yet. Click "Edit" to create it.</div>'
+
+_LINEAGE_RE = re.compile(r'\{\{lineage:([^}]+)\}\}')
+_CLERGY_RE = re.compile(r'\{\{clergy:(\d+)(?::(\w+))?\}\}', re.ASCII)
+_INLINE_RE = re.compile(
+    r'(\[\[.*?\]\])|(\*{2}.*?\*{2})|(\*[^*]+?\*)|(\[\^\d+\])|(!\[[^\]]*\]\([^)]+\))'
+    r'|(\[[^\]]+\]\([^)]+\))|(~~.+?~~)|(`[^`]+`)',
+    re.ASCII,
+)
+_CITE_RE = re.compile(r'^\[\^\d+\]$', re.ASCII)
+_IMAGE_RE = re.compile(r'^!\[([^\]]*)\]\(([^)]+)\)$')
+_IMAGE_TITLE_RE = re.compile(r'^([^"]+?)\s+"([^"]*)"\s*$')
+_EXT_LINK_RE = re.compile(r'^\[([^\]]+)\]\(([^)]+)\)$')
+_DEF_FIRST_RE = re.compile(r'^\[\^(\d+)\]:\s*(.*)', re.ASCII)
+_DEF_LINE_RE = re.compile(r'^\[\^(\d+)\]:', re.ASCII)
+_CONTINUATION_RE = re.compile(r'^(    |\t)(.*)$')
+_CODE_FENCE_RE = re.compile(r'^```(\w*)\s*$', re.ASCII)
+_ORDERED_ITEM_RE = re.compile(r'^\d+\.\s+', re.ASCII)
+_HR_RE = re.compile(r'^-{3,}\s*$')
+_IMG_BLOCK_RE = re.compile(r'^\s*!\[[^\]]*\]\([^)]+\)\s*$')
+_LINEAGE_BLOCK_RE = re.compile(
+    r'^\s*<div class="wiki-lineage-chart-wrapper"><div class="wiki-lineage-chart" '
+    r'data-lineage-(?:id|name)="[^"]*"></div></div>\s*$'
+)
+_HEADINGS = ('###### ', '##### ', '#### ', '### ', '## ', '# ')
+
+
+def _esc(value):
+    return (
+        str('' if value is None else value)
+        .replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;').replace('"', '&quot;')
+    )
+
+
+def _js_key_order(definitions):
+    """Keys in JavaScript object iteration order: array-index keys ascending, then insertion order"""
+    def is_index(key):
+        return key.isdigit() and (key == '0' or not key.startswith('0')) and int(key) < 2 ** 32 - 1
+    index_keys = sorted((k for k in definitions if is_index(k)), key=int)
+    return index_keys + [k for k in definitions if not is_index(k)]
+
+
+def expand_shortcodes(markdown, clergy_summaries):
+    """Expand {{clergy:id[:suffix]}} and {{lineage:id_or_name}} shortcodes"""
+    def lineage(match):
+        ident = match.group(1).strip()
+        attr = 'data-lineage-id' if re.fullmatch(r'\d+', ident, re.ASCII) else 'data-lineage-name'
+        return f'<div class="wiki-lineage-chart-wrapper"><div class="wiki-lineage-chart" {attr}="{_esc(ident)}"></div></div>'
+
+    def clergy(match):
+        clergy_id, suffix = match.group(1), match.group(2)
+        s = clergy_summaries.get(int(clergy_id))
+        if not s:
+            return (
+                f'<span class="wiki-clergy-unknown" title="Clergy #{clergy_id} not found">'
+                f'[clergy:{clergy_id}{":" + suffix if suffix else ""}]</span>'
+            )
+        if suffix == 'ordinations':
+            if not s['ordinations']:
+                return f'<span class="wiki-clergy-list">{_esc(s["name"])}: no ordinations</span>'
+            items = ''.join(
+                f'<li>{_esc(o["display_date"])} — {_esc(o["ordaining_bishop_name"] or "Unknown")}</li>'
+                for o in s['ordinations']
+            )
+            return f'<span class="wiki-clergy-list"><strong>{_esc(s["name"])}</strong> <ul class="wiki-clergy-sublist">{items}</ul></span>'
+        if suffix == 'consecrations':
+            if not s['consecrations']:
+                return f'<span class="wiki-clergy-list">{_esc(s["name"])}: no consecrations</span>'
+            items = ''.join(
+                f'<li>{_esc(c["display_date"])} — {_esc(c["consecrator_name"] or "Unknown")}</li>'
+                for c in s['consecrations']
+            )
+            return f'<span class="wiki-clergy-list"><strong>{_esc(s["name"])}</strong> <ul class="wiki-clergy-sublist">{items}</ul></span>'
+        parts = [_esc(s['name'])]
+        if s['rank']:
+            parts.append(_esc(s['rank']))
+        if s['organization']:
+            parts.append(_esc(s['organization']))
+        dates = '–'.join(d.split('-')[0] for d in (s['date_of_birth'], s['date_of_death']) if d)
+        if dates:
+            parts.append(f'({dates})')
+        title = _esc(s['rank']) + (', ' + _esc(s['organization']) if s['organization'] else '')
+        return f'<span class="wiki-clergy-summary" title="{title}">{", ".join(parts)}</span>'
+
+    out = _LINEAGE_RE.sub(lineage, markdown)
+    return _CLERGY_RE.sub(clergy, out)
+
+
+def _parse_wiki_text(text):
+    """Split footnote definitions ([^1]: ...) from content lines"""
+    lines = text.split('\n')
+    definitions = {}
+    content_lines = []
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        def_match = _DEF_FIRST_RE.match(line)
+        if def_match:
+            if def_match.group(1) not in definitions:  # first-wins for duplicate defs
+                content = def_match.group(2) or ''
+                j = i + 1
+                while j < len(lines) and _CONTINUATION_RE.match(lines[j]) and not _DEF_LINE_RE.match(lines[j]):
+                    content += '\n' + lines[j]
+                    j += 1
+                definitions[def_match.group(1)] = content
+            k = i + 1
+            while k < len(lines) and _CONTINUATION_RE.match(lines[k]) and not _DEF_LINE_RE.match(lines[k]):
+                k += 1
+            i = k
+        else:
+            content_lines.append(line)
+            i += 1
+    return content_lines, definitions
+
+
+def _render_image(alt, url, title):
+    if title:
+        return (
+            f'<figure class="wiki-figure"><img src="{_esc(url)}" alt="{_esc(alt)}" title="{_esc(title)}" />'
+            f'<figcaption>{_esc(title)}</figcaption></figure>'
+        )
+    return f'<figure class="wiki-figure"><img src="{_esc(url)}" alt="{_esc(alt)}" /></figure>'
+
+
+def _process_text(text, pages, cite_occurrence):
+    out = []
+    for part in _INLINE_RE.split(text):
+        if not part:
+            continue
+        if part.startswith('[[') and part.endswith(']]'):
+            pieces = part[2:-2].split('|')
+            target = pieces[0]
+            label = (pieces[1] if len(pieces) > 1 else '') or target
+            exists = target in pages
+            class_name = 'wiki-link exists' if exists else 'wiki-link'
+            title = f'Go to {target}' if exists else 'Page does not exist yet'
+            out.append(f'<button class="{class_name}" data-target="{_esc(target)}" title="{_esc(title)}">{_esc(label)}</button>')
+        elif part.startswith('**') and part.endswith('**'):
+            out.append(f'<strong>{_process_text(part[2:-2], pages, cite_occurrence)}</strong>')
+        elif part.startswith('*') and part.endswith('*') and len(part) > 1:
+            out.append(f'<em>{_process_text(part[1:-1], pages, cite_occurrence)}</em>')
+        elif part.startswith('~~') and part.endswith('~~'):
+            out.append(f'<del>{_esc(part[2:-2])}</del>')
+        elif part.startswith('`') and part.endswith('`') and len(part) > 1:
+            out.append(f'<code>{_esc(part[1:-1])}</code>')
+        elif _CITE_RE.match(part):
+            cite = part[2:-1]
+            occurrence = cite_occurrence.get(cite, 0)
+            cite_occurrence[cite] = occurrence + 1
+            out.append(
+                f'<sup class="wiki-cit-sup"><a href="#ref-{_esc(cite)}" id="cite-{_esc(cite)}-{occurrence}" '
+                f'title="Jump to reference">[{_esc(cite)}]</a></sup>'
+            )
+        else:
+            image = _IMAGE_RE.match(part)
+            if image:
+                inner = image.group(2)
+                titled = _IMAGE_TITLE_RE.match(inner)
+                url = titled.group(1).strip() if titled else inner.strip()
+                out.append(_render_image(image.group(1), url, titled.group(2) if titled else None))
+                continue
+            ext_link = _EXT_LINK_RE.match(part)
+            if ext_link:
+                out.append(
+                    f'<a href="{_esc(ext_link.group(2))}" target="_blank" rel="noopener noreferrer">'
+                    f'{_process_text(ext_link.group(1), pages, cite_occurrence)}</a>'
+                )
+                continue
+            out.append(part)
+    return ''.join(out)
+
+
+def _process_lines(content_lines, definitions, pages):
+    cite_occurrence = {}
+    out = []
+    in_code_block = False
+    code_lang = ''
+    code_lines = []
+    for line in content_lines:
+        fence = _CODE_FENCE_RE.match(line)
+        if fence:
+            if not in_code_block:
+                in_code_block = True
+                code_lang = fence.group(1) or ''
+                code_lines = []
+            else:
+                lang_attr = f' class="language-{code_lang}"' if code_lang else ''
+                out.append(f'<pre class="wiki-code-block"><code{lang_attr}>{_esc(chr(10).join(code_lines))}</code></pre>')
+                in_code_block = False
+            continue
+        if in_code_block:
+            code_lines.append(line)
+            continue
+
+        heading = next((prefix for prefix in _HEADINGS if line.startswith(prefix)), None)
+        if heading:
+            level = len(heading) - 1
+            out.append(f'<h{level}>{_process_text(line[len(heading):], pages, cite_occurrence)}</h{level}>')
+        elif line.startswith('- ') or line.startswith('* '):
+            out.append(f'<li>{_process_text(line[2:], pages, cite_occurrence)}</li>')
+        elif _ORDERED_ITEM_RE.match(line):
+            out.append(f'<li>{_process_text(_ORDERED_ITEM_RE.sub("", line, count=1), pages, cite_occurrence)}</li>')
+        elif line.strip() == '':
+            out.append('<div style="height: 1rem;"></div>')
+        elif _HR_RE.match(line.strip()):
+            out.append('<hr class="wiki-hr" />')
+        elif line.startswith('> '):
+            out.append(f'<blockquote class="wiki-blockquote">{_process_text(line[2:], pages, cite_occurrence)}</blockquote>')
+        elif _IMG_BLOCK_RE.match(line):
+            out.append(_process_text(line.strip(), pages, cite_occurrence))
+        elif _LINEAGE_BLOCK_RE.match(line):
+            out.append(line.strip())
+        else:
+            out.append(f'<p>{_process_text(line, pages, cite_occurrence)}</p>')
+    if in_code_block:
+        out.append(f'<pre class="wiki-code-block"><code>{_esc(chr(10).join(code_lines))}</code></pre>')
+
+    html = ''.join(out)
+    if definitions:
+        items = []
+        for cite in _js_key_order(definitions):
+            back_link = (
+                f' <a href="#cite-{_esc(cite)}-0" class="wiki-cite-back" title="Back to citation">↩</a>'
+                if cite_occurrence.get(cite, 0) > 0 else ''
+            )
+            items.append(f'<li id="ref-{_esc(cite)}">{_process_text(definitions[cite], pages, {})}{back_link}</li>')
+        html += (
+            '<div class="wiki-references"><h3><i class="fas fa-book-open"></i> References</h3>'
+            f'<ol>{"".join(items)}</ol></div>'
+        )
+    return html
+
+
+def render_markdown(markdown, pages=frozenset(), clergy_summaries=None):
+    """
+    Render wiki markdown to HTML, as WikiRenderer.render does in the browser
+
+    Args:
+        markdown (str): Raw page markdown
+        pages (set): Titles of pages that exist, for link styling
+        clergy_summaries (dict): {clergy_id: summary} for {{clergy:...}} shortcodes
+    """
+    if not markdown:
+        return EMPTY_STATE_HTML
+    expanded = expand_shortcodes(markdown, clergy_summaries or {})
+    content_lines, definitions = _parse_wiki_text(expanded)
+    return _process_lines(content_lines, definitions, pages)
+
+
+def clergy_summary(clergy):
+    """Summary used by {{clergy:...}} shortcodes and /api/wiki/clergy/.../summary"""
+    ords = [o for o in clergy.ordinations if not o.is_invalid]
+    cons = [c for c in clergy.consecrations if not c.is_invalid]
+    return {
+        'id': clergy.id,
+        'name': clergy.name,
+        'rank': clergy.rank or '',
+        'organization': clergy.organization or '',
+        'date_of_birth': clergy.date_of_birth.isoformat() if clergy.date_of_birth else None,
+        'date_of_death': clergy.date_of_death.isoformat() if clergy.date_of_death else None,
+        'ordinations': [{'display_date': o.display_date, 'ordaining_bishop_name': o.ordaining_bishop.name if o.ordaining_bishop else ''} for o in ords],
+        'consecrations': [{'display_date': c.display_date, 'consecrator_name': c.consecrator.name if c.consecrator else ''} for c in cons],
+    }
+
+
+def load_clergy_summaries(ids, graph_version=None):
+    """
+    {clergy_id: summary} for non-deleted clergy among ids.
+
+    Summaries are cached per clergy for the current graph version; misses are
+    loaded in batches of SUMMARY_QUERY_CHUNK ids. Missing or deleted clergy
+    are cached too and left out of the result.
+    """
+    ids = set(ids)
+    if not ids:
+        return {}
+    if graph_version is None:
+        graph_version = get_graph_version()
+    summaries = {}
+    misses = []
+    for clergy_id in ids:
+        cached = _summary_cache.get(clergy_id, graph_version)
+        if cached is GraphVersionCache.MISSING:
+            misses.append(clergy_id)
+        elif cached is not None:
+            summaries[clergy_id] = cached
+    misses.sort()
+    for start in range(0, len(misses), SUMMARY_QUERY_CHUNK):
+        chunk = misses[start:start + SUMMARY_QUERY_CHUNK]
+        clergy_list = Clergy.query.options(
+            joinedload(Clergy.ordinations).joinedload(Ordination.ordaining_bishop),
+            joinedload(Clergy.consecrations).joinedload(Consecration.consecrator),
+        ).filter(Clergy.id.in_(chunk), Clergy.is_deleted == False).all()  # noqa: E712
+        loaded = {c.id: clergy_summary(c) for c in clergy_list}
+        summaries.update(loaded)
+        for clergy_id in chunk:
+            _summary_cache.set(clergy_id, graph_version, loaded.get(clergy_id))
+    return summaries
+
+
+def find_clergy_id_by_name(name, graph_version=None):
+    """Id of the first non-deleted clergy whose name matches case-insensitively (ix_clergy_name_lower)"""
+    key = name.lower()
+    if graph_version is None:
+        graph_version = get_graph_version()
+    clergy_id = _name_cache.get(key, graph_version)
+    if clergy_id is GraphVersionCache.MISSING:
+        clergy_id = (
+            db.session.query(Clergy.id)
+            .filter(func.lower(Clergy.name) == func.lower(name), Clergy.is_deleted == False)  # noqa: E712
+            .order_by(Clergy.id)
+            .limit(1)
+            .scalar()
+        )
+        _name_cache.set(key, graph_version, clergy_id)
+    return clergy_id
+
+
+def _existing_pages(targets, audience):
+    """Titles among targets that the audience's page list would contain"""
+    if not targets:
+        return set()
+    query = db.session.query(WikiPage.title).filter(WikiPage.title.in_(targets))
+    if audience == AUDIENCE_PUBLIC:
+        query = query.filter(WikiPage.is_visible == True, WikiPage.is_deleted == False)  # noqa: E712
+    return {title for title, in query}
+
+
+def render_page(page, audience=AUDIENCE_PUBLIC):
+    """Render a page's markdown with batched link-existence and clergy lookups"""
+    markdown = page.markdown or ''
+    clergy_ids = {int(clergy_id) for clergy_id, _ in _CLERGY_RE.findall(markdown)}
+    clergy_summaries = load_clergy_summaries(clergy_ids)
+    expanded = expand_shortcodes(markdown, clergy_summaries)
+    pages = _existing_pages(parse_wiki_links(expanded), audience)
+    return render_markdown(markdown, pages, clergy_summaries)
+
+
+def get_graph_version():
+    """Current wiki graph version, or None when the counter row is missing (caching disabled)"""
+    return db.session.execute(text('SELECT version FROM wiki_graph_version WHERE id = 1')).scalar()
+
+
+class GraphVersionCache:
+    """
+    Bounded in-process LRU whose entries are only valid for the graph version
+    they were stored under. A None graph version (no counter row) disables it.
+    Cached values are shared between requests and must not be mutated.
+    """
+
+    MISSING = object()
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (graph_version, value)
+        self._lock = threading.Lock()
+
+    def get(self, key, graph_version):
+        """Cached value, or GraphVersionCache.MISSING when absent or stale"""
+        if graph_version is None:
+            return self.MISSING
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != graph_version:
+                return self.MISSING
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, graph_version, value):
+        if graph_version is None:
+            return
+        with self._lock:
+            self._entries[key] = (graph_version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_summary_cache = GraphVersionCache(SUMMARY_CACHE_MAX_ENTRIES)
+_name_cache = GraphVersionCache(SUMMARY_CACHE_MAX_ENTRIES)
+
+
+def get_rendered_html(page, audience=AUDIENCE_PUBLIC):
+    """Cached rendered HTML for a page, rendering and storing it on a miss"""
+    graph_version = get_graph_version()
+    edit_count = page.edit_count or 0
+    if graph_version is not None:
+        cached = db.session.get(WikiRenderedPage, (page.id, audience))
+        if cached and cached.edit_count == edit_count and cached.graph_version == graph_version:
+            return cached.html
+
+    html = render_page(page, audience)
+    if graph_version is None:
+        return html
+    try:
+        # Stored under the version read before rendering, so a concurrent bump only costs a re-render
+        cached = db.session.get(WikiRenderedPage, (page.id, audience))
+        if cached is None:
+            cached = WikiRenderedPage(page_id=page.id, audience=audience)
+            db.session.add(cached)
+        cached.edit_count = edit_count
+        cached.graph_version = graph_version
+        cached.html = html
+        cached.rendered_at = datetime.utcnow()
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()  # Another request stored the same render first
+    return html
+
+
+def bump_graph_version(connection):
+    connection.execute(text('UPDATE wiki_graph_version SET version = version + 1 WHERE id = 1'))
+
+
+def _changes_graph(obj):
+    if isinstance(obj, _GRAPH_MODELS):
+        return True
+    if isinstance(obj, WikiPage):
+        state = inspect(obj)
+        return any(state.attrs[attr].history.has_changes() for attr in _WIKI_GRAPH_ATTRS)
+    return False
+
+
+def _after_flush(session, flush_context):
+    """Bump the graph version when a flush touches pages' existence or clergy data."""
+    created_or_deleted = list(session.new) + list(session.deleted)
+    if any(isinstance(obj, (WikiPage,) + _GRAPH_MODELS) for obj in created_or_deleted) \
+            or any(_changes_graph(obj) for obj in session.dirty):
+        bump_graph_version(session.connection())
+
+
+def _after_bulk(context):
+    mapper = getattr(context, 'mapper', None)
+    if mapper is None or issubclass(mapper.class_, (WikiPage,) + _GRAPH_MODELS):
+        bump_graph_version(context.session.connection())
+
+
+def ensure_graph_version_row():
+    """Create the graph version counter row if it is missing"""
+    if get_graph_version() is None:
+        try:
+            db.session.execute(text('INSERT INTO wiki_graph_version (id, version) VALUES (1, 0)'))
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+
+
+def init_wiki_render(app):
+    """Install graph-version listeners and seed the counter row (call once at app startup)."""
+    global _listeners_installed
+    with app.app_context():
+        try:
+            ensure_graph_version_row()
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.warning("Wiki render cache disabled, no graph version row: %s", e)
+    if _listeners_installed:
+        return
+    event.listen(Session, 'after_flush', _after_flush)
+    event.listen(Session, 'after_bulk_update', _after_bulk)
+    event.listen(Session, 'after_bulk_delete', _after_bulk)
+    _listeners_installed = True
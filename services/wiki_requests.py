@@ -0,0 +1,89 @@
+"""
+Queue of pending wiki article requests.
+
+Pending requests are ordered by demand, then recency, then id (so ties have
+a stable order), which is the column order of ix_wiki_article_requests_queue.
+A request's queue position is one COUNT(*) over the rows ahead of it, and
+the editor list pages with an opaque keyset cursor instead of OFFSET.
+"""
+from datetime import datetime
+
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import contains_eager
+
+from models import db, Clergy, WikiArticleRequest
+from services.keyset import encode_cursor, decode_cursor
+
+_QUEUE_ORDER = (
+    WikiArticleRequest.request_count.desc(),
+    WikiArticleRequest.last_requested_at.desc(),
+    WikiArticleRequest.id.desc(),
+)
+
+
+def _pending(query):
+    return (
+        query
+        .join(Clergy, WikiArticleRequest.clergy_id == Clergy.id)
+        .filter(
+            WikiArticleRequest.is_handled == False,  # noqa: E712
+            Clergy.is_deleted == False,  # noqa: E712
+        )
+    )
+
+
+def _after(request_count, last_requested_at, request_id):
+    """Rows that come after the given sort key in queue order"""
+    return or_(
+        WikiArticleRequest.request_count < request_count,
+        and_(
+            WikiArticleRequest.request_count == request_count,
+            WikiArticleRequest.last_requested_at < last_requested_at,
+        ),
+        and_(
+            WikiArticleRequest.request_count == request_count,
+            WikiArticleRequest.last_requested_at == last_requested_at,
+            WikiArticleRequest.id < request_id,
+        ),
+    )
+
+
+def _ahead_of(req):
+    """Rows that come before req in queue order"""
+    return or_(
+        WikiArticleRequest.request_count > req.request_count,
+        and_(
+            WikiArticleRequest.request_count == req.request_count,
+            WikiArticleRequest.last_requested_at > req.last_requested_at,
+        ),
+        and_(
+            WikiArticleRequest.request_count == req.request_count,
+            WikiArticleRequest.last_requested_at == req.last_requested_at,
+            WikiArticleRequest.id > req.id,
+        ),
+    )
+
+
+def queue_position(req):
+    """1-based position of a pending request in the queue"""
+    ahead = _pending(db.session.query(func.count(WikiArticleRequest.id))).filter(_ahead_of(req)).scalar()
+    return ahead + 1
+
+
+def _cursor(req):
+    return encode_cursor(req.request_count, req.last_requested_at, req.id)
+
+
+def list_pending_requests(limit, cursor=None):
+    """
+    One page of pending requests in queue order.
+
+    Returns:
+        tuple: (requests with clergy loaded, cursor for the next page or None)
+    """
+    query = _pending(WikiArticleRequest.query).options(contains_eager(WikiArticleRequest.clergy))
+    if cursor:
+        query = query.filter(_after(*decode_cursor(cursor, int, datetime, int)))
+    rows = query.order_by(*_QUEUE_ORDER).limit(limit + 1).all()
+    next_cursor = _cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
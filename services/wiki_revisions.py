@@ -0,0 +1,182 @@
+"""
+Wiki page revision history stored as compressed line deltas.
+
+Each save that changes a page's markdown appends a row to ``wiki_revisions``.
+Most rows hold a zlib-compressed delta against the previous revision: a JSON
+list of ["c", start, end] (copy those lines of the previous text) and
+["i", [lines]] (insert new lines) ops. A full compressed snapshot is written
+for a page's first revision, every SNAPSHOT_INTERVAL revisions, whenever a
+delta would not be smaller, and whenever the previous revision's content hash
+does not match the page's previous markdown (an edit that bypassed the save
+paths). Rebuilding any revision therefore reads at most SNAPSHOT_INTERVAL
+rows: its base snapshot and the deltas after it.
+"""
+import difflib
+import hashlib
+import json
+import zlib
+from datetime import datetime
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import defer
+
+from models import db, WikiRevision
+
+SNAPSHOT_INTERVAL = 20
+
+
+def _hash(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def _compress(value):
+    return zlib.compress(value.encode('utf-8'), 9)
+
+
+def encode_delta(old, new):
+    """Compressed delta turning old into new (both str)"""
+    old_lines = old.splitlines(keepends=True)
+    new_lines = new.splitlines(keepends=True)
+    ops = []
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            ops.append(['c', i1, i2])
+        elif j2 > j1:
+            ops.append(['i', new_lines[j1:j2]])
+    return _compress(json.dumps(ops, ensure_ascii=False, separators=(',', ':')))
+
+
+def apply_delta(old, data):
+    old_lines = old.splitlines(keepends=True)
+    parts = []
+    for op in json.loads(zlib.decompress(data).decode('utf-8')):
+        if op[0] == 'c':
+            parts.extend(old_lines[op[1]:op[2]])
+        else:
+            parts.extend(op[1])
+    return ''.join(parts)
+
+
+def _previous_value(page, attr):
+    """Attribute value before the pending change (the current value if unchanged)"""
+    history = inspect(page).attrs[attr].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(page, attr)
+
+
+def record_revision(page, editor_id=None):
+    """
+    Append a revision for the page's pending markdown change; caller commits.
+
+    Call after assigning page.markdown and before flushing. Does nothing when
+    an existing page's markdown is unchanged. Load an existing page with
+    with_for_update() so concurrent saves take revision numbers in turn
+    instead of colliding on uq_wiki_revision_page_number.
+    """
+    state = inspect(page)
+    is_new = state.transient or state.pending
+    markdown = page.markdown or ''
+    if not is_new and not state.attrs.markdown.history.has_changes():
+        return None
+    previous = None if is_new else (_previous_value(page, 'markdown') or '')
+    previous_editor_id = None if is_new else _previous_value(page, 'last_editor_id')
+    previous_updated_at = None if is_new else _previous_value(page, 'updated_at')
+
+    last = None
+    if not is_new:
+        last = (
+            WikiRevision.query
+            .options(defer(WikiRevision.data))
+            .filter_by(page_id=page.id)
+            .order_by(WikiRevision.revision_number.desc())
+            .first()
+        )
+        if last is None and previous:
+            # First revision of a page that predates revision history: keep its old text as the base
+            last = WikiRevision(
+                page=page,
+                revision_number=1,
+                base_revision=1,
+                title=page.title,
+                data=_compress(previous),
+                content_hash=_hash(previous),
+                content_length=len(previous),
+                editor_id=previous_editor_id,
+                created_at=previous_updated_at or datetime.utcnow(),
+            )
+            db.session.add(last)
+
+    number = last.revision_number + 1 if last else 1
+    revision = WikiRevision(
+        page=page,
+        revision_number=number,
+        title=page.title,
+        content_hash=_hash(markdown),
+        content_length=len(markdown),
+        editor_id=editor_id,
+    )
+    snapshot = _compress(markdown)
+    chain_ok = last is not None and last.content_hash == _hash(previous)
+    if chain_ok and number - last.base_revision < SNAPSHOT_INTERVAL:
+        delta = encode_delta(previous, markdown)
+        if len(delta) < len(snapshot):
+            revision.data = delta
+            revision.base_revision = last.base_revision
+    if revision.data is None:
+        revision.data = snapshot
+        revision.base_revision = number
+    db.session.add(revision)
+    return revision
+
+
+def get_revision_content(page_id, revision_number):
+    """(WikiRevision, markdown) for a revision, or (None, None) if it does not exist"""
+    target = (
+        WikiRevision.query
+        .options(defer(WikiRevision.data))
+        .filter_by(page_id=page_id, revision_number=revision_number)
+        .first()
+    )
+    if target is None:
+        return None, None
+    chain = (
+        db.session.query(WikiRevision.revision_number, WikiRevision.base_revision, WikiRevision.data)
+        .filter(
+            WikiRevision.page_id == page_id,
+            WikiRevision.revision_number >= target.base_revision,
+            WikiRevision.revision_number <= revision_number,
+        )
+        .order_by(WikiRevision.revision_number)
+        .all()
+    )
+    text = ''
+    for number, base, data in chain:
+        if number == base:
+            text = zlib.decompress(data).decode('utf-8')
+        else:
+            text = apply_delta(text, data)
+    return target, text
+
+
+def _diff_lines(text):
+    """Lines for unified_diff; a missing final newline would glue the last line to the next one"""
+    lines = text.splitlines(keepends=True)
+    if lines and not lines[-1].endswith(('\n', '\r')):
+        lines[-1] += '\n'
+    return lines
+
+
+def diff_revisions(page_id, from_number, to_number):
+    """Unified diff between two revisions, or None if either does not exist"""
+    from_revision, old = get_revision_content(page_id, from_number)
+    to_revision, new = get_revision_content(page_id, to_number)
+    if from_revision is None or to_revision is None:
+        return None
+    return ''.join(difflib.unified_diff(
+        _diff_lines(old),
+        _diff_lines(new),
+        fromfile=f'r{from_number}',
+        tofile=f'r{to_number}',
+    ))
@@ -0,0 +1,228 @@
+"""
+Full-text search over wiki pages.
+
+On PostgreSQL, WikiPage.search_vector holds a weighted tsvector (title A,
+markdown B) behind a GIN index. It is refreshed in the same transaction
+whenever a flush creates a page or changes its title or markdown, so every
+save path stays indexed. Queries use websearch_to_tsquery, ts_rank_cd and
+ts_headline, and only the returned page of hits gets a headline.
+
+Other dialects (SQLite for local development and benchmarks) use a pure
+Python inverted index per process. It is rebuilt when the page table's
+signature (count, max updated_at, total edit_count, visible and deleted
+counts) changes.
+"""
+import math
+import re
+import threading
+from collections import defaultdict
+
+from sqlalchemy import event, func, inspect, text
+from sqlalchemy.orm import Session
+
+from models import db, WikiPage
+
+SEARCH_CONFIG = 'english'
+SNIPPET_CHARS = 160
+TITLE_WEIGHT = 3  # Title hits count this many times a body hit (tsvector weight A vs B)
+
+# Highlight markers that cannot occur in page text; replaced after HTML escaping
+_MARK_START = '\x02'
+_MARK_END = '\x03'
+
+_HEADLINE_OPTIONS = (
+    f'StartSel={_MARK_START}, StopSel={_MARK_END}, '
+    'MaxWords=30, MinWords=12, MaxFragments=2, FragmentDelimiter=" … "'
+)
+
+_TOKEN_RE = re.compile(r'\w+')
+
+_UPDATE_VECTOR_SQL = text(
+    "UPDATE wiki_page SET search_vector = "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(markdown, '')), 'B') "
+    "WHERE id = ANY(:ids)"
+)
+
+_listeners_installed = False
+_local_index = {'signature': None, 'index': None}
+_local_index_lock = threading.Lock()
+
+
+def _escape(value):
+    return (
+        str(value or '')
+        .replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;').replace('"', '&quot;')
+    )
+
+
+def _highlight(fragment):
+    """HTML-escape a snippet and turn highlight markers into <mark> tags"""
+    return _escape(fragment).replace(_MARK_START, '<mark>').replace(_MARK_END, '</mark>')
+
+
+def search_pages(query, page=1, per_page=20, include_hidden=False):
+    """
+    Ranked full-text search over non-deleted wiki pages
+
+    Returns:
+        dict: 'total' matches and 'results' for the requested page, each with
+              'title', 'rank' and an HTML 'snippet' (<mark> around hits)
+    """
+    query = (query or '').strip()
+    if not query:
+        return {'total': 0, 'results': []}
+    offset = (page - 1) * per_page
+    if db.engine.dialect.name == 'postgresql':
+        return _search_postgres(query, offset, per_page, include_hidden)
+    return _get_local_index().search(query, offset, per_page, include_hidden)
+
+
+def _search_postgres(query, offset, limit, include_hidden):
+    where = "p.search_vector @@ q.tsq AND p.is_deleted = false"
+    if not include_hidden:
+        where += " AND p.is_visible = true"
+    tsquery = f"WITH q AS (SELECT websearch_to_tsquery('{SEARCH_CONFIG}', :q) AS tsq) "
+    params = {'q': query, 'limit': limit, 'offset': offset, 'headline_options': _HEADLINE_OPTIONS}
+    total = db.session.execute(
+        text(f"{tsquery}SELECT count(*) FROM wiki_page p, q WHERE {where}"), params
+    ).scalar()
+    if not total:
+        return {'total': 0, 'results': []}
+    rows = db.session.execute(text(
+        f"{tsquery}, hits AS ("
+        f"  SELECT p.title, p.markdown, ts_rank_cd(p.search_vector, q.tsq) AS rank"
+        f"  FROM wiki_page p, q WHERE {where}"
+        f"  ORDER BY rank DESC, p.title LIMIT :limit OFFSET :offset"
+        f") "
+        # Headlines only for the returned page of hits
+        f"SELECT hits.title, hits.rank, "
+        f"  ts_headline('{SEARCH_CONFIG}', coalesce(hits.markdown, ''), q.tsq, :headline_options) "
+        f"FROM hits, q ORDER BY hits.rank DESC, hits.title"
+    ), params).fetchall()
+    return {
+        'total': total,
+        'results': [
+            {'title': title, 'rank': round(float(rank), 4), 'snippet': _highlight(headline)}
+            for title, rank, headline in rows
+        ],
+    }
+
+
+def _tokens(value):
+    return _TOKEN_RE.findall((value or '').lower())
+
+
+class LocalSearchIndex:
+    """In-memory inverted index: token -> {page_id: weighted term frequency}"""
+
+    def __init__(self, pages):
+        self.pages = {}
+        self.postings = defaultdict(dict)
+        for page_id, title, markdown, is_visible, is_deleted in pages:
+            self.pages[page_id] = (title, markdown or '', is_visible, is_deleted)
+            for weight, field in ((TITLE_WEIGHT, title), (1, markdown)):
+                for token in _tokens(field):
+                    postings = self.postings[token]
+                    postings[page_id] = postings.get(page_id, 0) + weight
+
+    def _matching_tokens(self, term, is_last):
+        """Exact term, plus prefix matches for the last term (search-as-you-type)"""
+        if not is_last:
+            return [term] if term in self.postings else []
+        return [token for token in self.postings if token.startswith(term)]
+
+    def search(self, query, offset, limit, include_hidden):
+        terms = _tokens(query)
+        if not terms:
+            return {'total': 0, 'results': []}
+        scores = None
+        for i, term in enumerate(terms):
+            term_scores = defaultdict(float)
+            for token in self._matching_tokens(term, i == len(terms) - 1):
+                postings = self.postings[token]
+                idf = math.log(1 + len(self.pages) / len(postings))
+                for page_id, tf in postings.items():
+                    term_scores[page_id] += (1 + math.log(tf)) * idf
+            # Every term must match, like websearch_to_tsquery's implicit AND
+            scores = dict(term_scores) if scores is None else {
+                page_id: score + term_scores[page_id] for page_id, score in scores.items() if page_id in term_scores
+            }
+            if not scores:
+                return {'total': 0, 'results': []}
+        hits = [
+            (score, page_id) for page_id, score in scores.items()
+            if not self.pages[page_id][3] and (include_hidden or self.pages[page_id][2])
+        ]
+        hits.sort(key=lambda hit: (-hit[0], self.pages[hit[1]][0] or ''))
+        results = []
+        for score, page_id in hits[offset:offset + limit]:
+            title, markdown = self.pages[page_id][:2]
+            results.append({'title': title, 'rank': round(score, 4), 'snippet': _highlight(_snippet(markdown, terms))})
+        return {'total': len(hits), 'results': results}
+
+
+def _snippet(markdown, terms):
+    """Text around the first hit with every query term (or prefix of the last one) marked"""
+    alternatives = [re.escape(term) + r'\b' for term in terms[:-1]] + [re.escape(terms[-1]) + r'\w*']
+    pattern = re.compile(r'\b(?:' + '|'.join(alternatives) + ')', re.IGNORECASE)
+    text_value = ' '.join(markdown.split())
+    first = pattern.search(text_value)
+    start = max(0, (first.start() if first else 0) - SNIPPET_CHARS // 3)
+    fragment = text_value[start:start + SNIPPET_CHARS]
+    fragment = pattern.sub(lambda m: f'{_MARK_START}{m.group(0)}{_MARK_END}', fragment)
+    return ('… ' if start else '') + fragment + (' …' if start + SNIPPET_CHARS < len(text_value) else '')
+
+
+def _get_local_index():
+    signature = db.session.query(
+        func.count(WikiPage.id), func.max(WikiPage.updated_at), func.sum(WikiPage.edit_count),
+        func.count(WikiPage.id).filter(WikiPage.is_visible == True),  # noqa: E712
+        func.count(WikiPage.id).filter(WikiPage.is_deleted == True),  # noqa: E712
+    ).one()
+    signature = tuple(signature)
+    with _local_index_lock:
+        if _local_index['signature'] == signature and _local_index['index'] is not None:
+            return _local_index['index']
+    pages = db.session.query(
+        WikiPage.id, WikiPage.title, WikiPage.markdown, WikiPage.is_visible, WikiPage.is_deleted
+    ).all()
+    index = LocalSearchIndex(pages)
+    with _local_index_lock:
+        _local_index['signature'] = signature
+        _local_index['index'] = index
+    return index
+
+
+def _after_flush(session, flush_context):
+    """Refresh search_vector for pages whose title or markdown changed in this flush (PostgreSQL only)."""
+    if session.get_bind().dialect.name != 'postgresql':
+        return
+    ids = [obj.id for obj in session.new if isinstance(obj, WikiPage)]
+    for obj in session.dirty:
+        if isinstance(obj, WikiPage):
+            state = inspect(obj)
+            if state.attrs.title.history.has_changes() or state.attrs.markdown.history.has_changes():
+                ids.append(obj.id)
+    if ids:
+        session.connection().execute(_UPDATE_VECTOR_SQL, {'ids': ids})
+
+
+def backfill_search_vectors():
+    """Recompute search_vector for every page; returns the number of pages updated (PostgreSQL only)"""
+    if db.engine.dialect.name != 'postgresql':
+        return 0
+    ids = [page_id for page_id, in db.session.query(WikiPage.id)]
+    if ids:
+        db.session.execute(_UPDATE_VECTOR_SQL, {'ids': ids})
+    db.session.commit()
+    return len(ids)
+
+
+def init_wiki_search(app):
+    """Install the search_vector refresh listener (call once at app startup)."""
+    global _listeners_installed
+    if _listeners_installed:
+        return
+    event.listen(Session, 'after_flush', _after_flush)
+    _listeners_installed = True
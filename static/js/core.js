@@ -372,7 +372,7 @@ export async function initializeVisualization() {
         // Try both string and number keys since JSON might convert keys
         const position = mapping[d.id] || mapping[String(d.id)] || mapping[Number(d.id)];
         
-        if (position && Array.isArray(position) && position.length === 2) {
+        if (position && Array.isArray(position) && position.length >= 2) {
           // Create a clipPath for the node image (square for pre-1968 consecrations)
           const clipId = `clip-avatar-${d.id}`;
           const clipPath = defs.append('clipPath')
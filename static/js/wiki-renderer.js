@@ -5,6 +5,9 @@
  * Usage:
  *   const html = (window.wikiRenderer || new WikiRenderer()).render(markdown, { pages: {} });
  * Override: window.wikiRenderer = new CustomRenderer();
+ *
+ * services/wiki_render.py prerenders pages with a Python port of this class;
+ * keep the two in sync.
  */
 class WikiRenderer {
     /**
@@ -114,6 +114,8 @@ class WikiApp {
         this.currentSlug = initialSlug;
         this.isEditing = false;
         this.searchQuery = '';
+        this.searchResults = null; // Full-text hits for searchQuery, null when not searching
+        this.searchTimer = null;
         this.isSidebarOpen = true;
         this.isLoading = false;
         this.isLoading = false;
@@ -206,7 +208,13 @@ class WikiApp {
 
         this.els.searchInput.addEventListener('input', (e) => {
             this.searchQuery = e.target.value;
-            this.renderSidebarList();
+            clearTimeout(this.searchTimer);
+            if (this.searchQuery.trim().length < 2) {
+                this.searchResults = null;
+                this.renderSidebarList();
+                return;
+            }
+            this.searchTimer = setTimeout(() => this.runSearch(this.searchQuery), 200);
         });
 
         // Clergy Autocomplete on Title Input
@@ -302,6 +310,8 @@ class WikiApp {
                     this.openRequestedClergy(clergyId, clergyName);
                 } else if (action === 'mark-handled' && clergyId) {
                     this.markRequestHandled(clergyId);
+                } else if (action === 'more' && this.requestCursor) {
+                    this.fetchArticleRequests(this.requestCursor);
                 }
             });
         }
@@ -932,18 +942,32 @@ class WikiApp {
             return {};
         }
         try {
-            const res = await fetch(`/api/wiki/clergy/summaries?ids=${ids.join(',')}`);
+            // Short lists stay GET so the browser can revalidate them by ETag; long ones would overflow the URL
+            const sorted = [...ids].sort((a, b) => a - b);
+            const res = sorted.length <= 100
+                ? await fetch(`/api/wiki/clergy/summaries?ids=${sorted.join(',')}`)
+                : await fetch('/api/wiki/clergy/summaries', {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: JSON.stringify({ ids: sorted }),
+                });
             if (res.ok) return await res.json();
         } catch (e) { /* ignore */ }
         return {};
     }
 
     async renderViewContent(slugForRender, content) {
-        const ids = this.extractClergyShortcodeIds(content);
-        const clergySummaries = await this.fetchClergySummaries(ids);
-        if (slugForRender !== this.currentSlug || this.isEditing) return;
-        const renderer = window.wikiRenderer || new WikiRenderer();
-        this.els.viewContainer.innerHTML = renderer.render(content, { pages: this.pages, clergySummaries });
+        // Prerendered by the server (links and clergy shortcodes already expanded)
+        const page = this.pages[slugForRender];
+        if (page && page.html && page.content === content) {
+            this.els.viewContainer.innerHTML = page.html;
+        } else {
+            const ids = this.extractClergyShortcodeIds(content);
+            const clergySummaries = await this.fetchClergySummaries(ids);
+            if (slugForRender !== this.currentSlug || this.isEditing) return;
+            const renderer = window.wikiRenderer || new WikiRenderer();
+            this.els.viewContainer.innerHTML = renderer.render(content, { pages: this.pages, clergySummaries });
+        }
         this.els.viewContainer.querySelectorAll('.wiki-link').forEach(btn => {
             btn.addEventListener('click', (e) => {
                 const target = btn.dataset.target;
@@ -1140,13 +1164,14 @@ class WikiApp {
         }
     }
 
-    async fetchArticleRequests() {
+    async fetchArticleRequests(cursor = null) {
         if (!this.els.requestPanel || !this.els.requestTable) return;
         try {
-            if (this.els.requestStatus) {
+            if (this.els.requestStatus && !cursor) {
                 this.els.requestStatus.textContent = 'Loading...';
             }
-            const res = await fetch('/api/wiki/requests');
+            const url = cursor ? `/api/wiki/requests?cursor=${encodeURIComponent(cursor)}` : '/api/wiki/requests';
+            const res = await fetch(url);
             if (res.status === 401) {
                 this.els.requestPanel.style.display = 'none';
                 return;
@@ -1155,15 +1180,19 @@ class WikiApp {
                 throw new Error('Failed to load requests');
             }
             const rows = await res.json();
-            this.renderRequestTable(rows);
+            this.requestRows = cursor ? [...(this.requestRows || []), ...rows] : rows;
+            this.requestCursor = res.headers.get('X-Next-Cursor');
+            this.renderRequestTable(this.requestRows);
             if (this.els.requestStatus) {
-                this.els.requestStatus.textContent = rows.length ? '' : 'No pending requests.';
+                this.els.requestStatus.textContent = this.requestRows.length ? '' : 'No pending requests.';
             }
         } catch (err) {
             console.error('Failed to fetch wiki article requests', err);
             if (this.els.requestStatus) {
                 this.els.requestStatus.textContent = 'Could not load requests.';
             }
+            this.requestRows = [];
+            this.requestCursor = null;
             this.renderRequestTable([]);
         }
     }
@@ -1210,6 +1239,11 @@ class WikiApp {
                     `).join('')}
                 </tbody>
             </table>
+            ${this.requestCursor ? `
+                <button type="button" class="wiki-request-btn wiki-request-more" data-action="more">
+                    Show more
+                </button>
+            ` : ''}
         `;
     }
 
@@ -1310,7 +1344,41 @@ class WikiApp {
         this.els.authorSelect.value = currentVal; // Restore if any (though render usually overwrites)
     }
 
+    async runSearch(query) {
+        try {
+            const res = await fetch(`/api/wiki/search?q=${encodeURIComponent(query)}&per_page=50`);
+            if (!res.ok) return;
+            const data = await res.json();
+            if (query !== this.searchQuery) return; // Stale response
+            this.searchResults = data.results;
+            this.renderSidebarList();
+        } catch (err) {
+            console.error('Wiki search failed', err);
+        }
+    }
+
+    renderSearchResults() {
+        const esc = s => String(s || '').replace(/&/g, '&amp;').replace(/</g, '&lt;').replace(/>/g, '&gt;').replace(/"/g, '&quot;');
+        if (this.searchResults.length === 0) {
+            this.els.pagesList.innerHTML = '<span class="wiki-search-empty">No matching pages</span>';
+            return;
+        }
+        // Snippets are HTML-escaped server-side with <mark> around matched terms
+        this.els.pagesList.innerHTML = this.searchResults.map(hit => {
+            const active = this.currentSlug === hit.slug ? 'active' : '';
+            return `<button class="wiki-page-link wiki-search-result ${active}" data-slug="${esc(hit.slug)}">
+                <span class="truncate-text" style="pointer-events: none;">${esc(hit.title)}</span>
+                <span class="wiki-search-snippet" style="pointer-events: none;">${hit.snippet}</span>
+            </button>`;
+        }).join('');
+    }
+
     renderSidebarList() {
+        if (this.searchResults) {
+            this.renderSearchResults();
+            return;
+        }
+
         // Check if logged in by presence of auth-only elements (e.g. New Page button or Edit button)
         // newBtn is good proxy as it's for auth users
         const isLoggedIn = !!this.els.newBtn;
@@ -10,6 +10,7 @@ const DEFAULT_INNER_RADIUS = 1; // rank indicator ring
 const DEFAULT_IMAGE_SIZE = 48;
 const DEFAULT_STROKE_WIDTH = 3;
 const DEFAULT_LABEL_DY = 35;
+const XLINK_NS = 'http://www.w3.org/1999/xlink';
 
 /**
  * Read node/label dimensions from CSS variables on document root.
@@ -34,6 +35,49 @@ export function getNodeDimensions() {
   };
 }
 
+/**
+ * Resolve the atlas shard holding a sprite position ([x, y, shard]).
+ * Picks the 2x image on high-DPI screens; sheet width/height are always 1x,
+ * so the browser scales the 2x image down into the same coordinates.
+ * Responses without shards describe a single sheet via url/sprite_width/sprite_height.
+ * @returns {{ url: string, width: number, height: number }}
+ */
+function getSpriteShard(spriteSheetData, pos) {
+  const shardIndex = pos[2] ?? 0;
+  const shard = (spriteSheetData.shards || []).find((s) => s.shard === shardIndex);
+  if (!shard) {
+    return { url: spriteSheetData.url, width: spriteSheetData.sprite_width, height: spriteSheetData.sprite_height };
+  }
+  const urls = shard.urls || {};
+  const url = (window.devicePixelRatio || 1) > 1 && urls['2'] ? urls['2'] : urls['1'];
+  return { url, width: shard.width, height: shard.height };
+}
+
+let spriteObserver = null;
+
+/**
+ * Set a sprite image's href once it comes near the viewport (pan/zoom included),
+ * so only the atlas shards for the visible part of the graph are downloaded.
+ * Falls back to setting it immediately without IntersectionObserver.
+ */
+function lazySpriteHref(element, url) {
+  if (typeof IntersectionObserver === 'undefined') {
+    element.setAttributeNS(XLINK_NS, 'xlink:href', url);
+    return;
+  }
+  if (!spriteObserver) {
+    spriteObserver = new IntersectionObserver((entries) => {
+      entries.forEach((entry) => {
+        if (!entry.isIntersecting) return;
+        entry.target.setAttributeNS(XLINK_NS, 'xlink:href', entry.target.dataset.spriteHref);
+        spriteObserver.unobserve(entry.target);
+      });
+    }, { rootMargin: '200px' });
+  }
+  element.dataset.spriteHref = url;
+  spriteObserver.observe(element);
+}
+
 /**
  * Create the node group structure on a D3 selection of g.viz-node elements.
  * Appends: outer ring (circle + rect), inner ring (circle + rect), image bg/border, image, label, title.
@@ -156,34 +200,36 @@ export function createNodeGroup(selection, options) {
 
   if (spriteSheetData && spriteSheetData.success && spriteSheetData.mapping) {
     const mapping = spriteSheetData.mapping;
-    const spriteUrl = spriteSheetData.url;
-    const sw = spriteSheetData.sprite_width;
-    const sh = spriteSheetData.sprite_height;
+    const hasSpritePosition = (d) => {
+      const pos = getSpritePosition(d, mapping);
+      return Boolean(pos && Array.isArray(pos) && pos.length >= 2);
+    };
+    const shardFor = (d) => getSpriteShard(spriteSheetData, getSpritePosition(d, mapping));
 
     selection.append('image')
-      .attr('xlink:href', (d) => (getSpritePosition(d, mapping) && Array.isArray(getSpritePosition(d, mapping)) && getSpritePosition(d, mapping).length >= 2 ? spriteUrl : ''))
+      .each(function (d) {
+        if (hasSpritePosition(d)) lazySpriteHref(this, shardFor(d).url);
+      })
       .attr('x', (d) => {
         const pos = getSpritePosition(d, mapping);
-        if (pos && Array.isArray(pos) && pos.length >= 2) return -pos[0] - imgSize / 2;
+        if (hasSpritePosition(d)) return -pos[0] - imgSize / 2;
         return 0;
       })
       .attr('y', (d) => {
         const pos = getSpritePosition(d, mapping);
-        if (pos && Array.isArray(pos) && pos.length >= 2) return -pos[1] - imgSize / 2;
+        if (hasSpritePosition(d)) return -pos[1] - imgSize / 2;
         return 0;
       })
-      .attr('width', sw)
-      .attr('height', sh)
+      .attr('width', (d) => (hasSpritePosition(d) ? shardFor(d).width : 0))
+      .attr('height', (d) => (hasSpritePosition(d) ? shardFor(d).height : 0))
       .attr('clip-path', (d) => {
-        const pos = getSpritePosition(d, mapping);
-        if (pos && Array.isArray(pos) && pos.length >= 2) return `url(#clip-avatar-${d.id})`;
+        if (hasSpritePosition(d)) return `url(#clip-avatar-${d.id})`;
         return 'none';
       })
       .attr('preserveAspectRatio', 'none')
       .style('pointer-events', 'none')
       .style('opacity', (d) => {
-        const pos = getSpritePosition(d, mapping);
-        if (pos && Array.isArray(pos) && pos.length >= 2) {
+        if (hasSpritePosition(d)) {
           selection.filter((n) => n.id === d.id).selectAll('.viz-node-image-bg').style('opacity', 1);
           selection.filter((n) => n.id === d.id).selectAll('.viz-node-image-border').style('opacity', 1);
           return 1;
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Batch location geocoding against a local stub geocoder.
+
+Runs ``geocode_missing_locations`` on an in-memory SQLite database with a
+stub backend (no network) and checks that:
+
+- locations without coordinates get them, in bulk, while ones that already
+  have coordinates, inactive ones and ones without an address are left alone;
+- a country-level (coarse) answer is not saved, so the location stays
+  uncoded instead of being pinned to a country centroid;
+- a backend error leaves the location uncoded and uncached, and a rerun
+  resumes with only that location, answering the rest from geocode_cache;
+- locations sharing an address cost one backend call.
+
+Run from project root:
+
+    python -m tests.test_geocode_locations_stub
+"""
+
+import os
+import sys
+import threading
+
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class StubBackend:
+    name = 'stub'
+    rate_limited = True
+
+    def __init__(self, fail_addresses=()):
+        self.fail_addresses = set(fail_addresses)
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def is_configured(self):
+        return True
+
+    def geocode(self, address):
+        from services.geocoding import GeocodingError
+
+        with self._lock:
+            self.calls.append(address)
+        if address in self.fail_addresses:
+            raise GeocodingError('stub timeout')
+        if 'Atlantis' in address:
+            return None
+        if 'Smalltown' in address:
+            # Country-level fallback, as the gazetteer or OpenCage give for unknown streets
+            return {'latitude': 39.76, 'longitude': -98.5, 'formatted_address': 'United States', 'confidence': 1}
+        return {'latitude': float(len(address)), 'longitude': 1.5, 'formatted_address': address, 'confidence': 9}
+
+    def reverse(self, latitude, longitude):
+        return None
+
+
+def main():
+    from flask import Flask
+    from models import db, Location, GeocodeCache
+    from services.geocoding import GeocodingService
+    from services.location_geocoding import count_missing_locations, geocode_missing_locations
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    failures = []
+
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            Location(name='A', city='Rome', country='Italy'),
+            Location(name='B', city='Rome', country='Italy'),  # Same address as A
+            Location(name='C', address='1 Main St', city='Springfield', country='USA'),
+            Location(name='D', city='Atlantis'),  # Not found
+            Location(name='E', city='Flaky'),  # Backend error on the first run
+            Location(name='F'),  # No address
+            Location(name='G', city='Paris', latitude=10.0, longitude=20.0),  # Already coded
+            Location(name='H', city='Lyon', is_active=False),  # Inactive
+            Location(name='I', address='2 Elm St', city='Smalltown', country='USA'),  # Country-level only
+        ])
+        db.session.commit()
+
+        stub = StubBackend(fail_addresses={'Flaky'})
+        service = GeocodingService([stub])
+        stats = geocode_missing_locations(service=service, batch_size=3, workers=3, rate=0)
+        by_name = {loc.name: loc for loc in Location.query.all()}
+
+        if not (by_name['A'].latitude and by_name['B'].latitude and by_name['C'].latitude):
+            failures.append('A, B and C should have been geocoded')
+        if sorted(stub.calls).count('Rome, Italy') != 1:
+            failures.append(f'shared address should be looked up once, calls={stub.calls}')
+        if by_name['D'].latitude is not None or by_name['E'].latitude is not None:
+            failures.append('D (not found) and E (backend error) should stay uncoded')
+        if by_name['I'].latitude is not None:
+            failures.append('I (country-level answer only) should stay uncoded')
+        if (by_name['G'].latitude, by_name['H'].latitude) != (10.0, None):
+            failures.append('coded and inactive locations must not be touched')
+        if GeocodeCache.query.filter_by(query_key='flaky').count():
+            failures.append('backend errors must not be cached')
+        expected = {'processed': 7, 'geocoded': 3, 'not_found': 1, 'coarse': 1, 'failed': 1, 'no_address': 1}
+        if {k: stats[k] for k in expected} != expected:
+            failures.append(f'first run stats {stats} != {expected}')
+
+        # Rerun: only D, E, F and I are still missing; D's miss and I's coarse answer come from the cache,
+        # E is retried
+        stub.fail_addresses.clear()
+        stub.calls.clear()
+        stats = geocode_missing_locations(service=service, batch_size=3, workers=3, rate=0)
+        if stub.calls != ['Flaky']:
+            failures.append(f'rerun should only call the backend for E, calls={stub.calls}')
+        if stats['processed'] != 4 or stats['geocoded'] != 1 or stats['coarse'] != 1 or stats['cached'] != 2:
+            failures.append(f'unexpected rerun stats {stats}')
+        if count_missing_locations() != 3:
+            failures.append(f'D, F and I should remain uncoded, missing={count_missing_locations()}')
+
+    if failures:
+        for f in failures:
+            print("FAIL:", f)
+        return 1
+
+    print("OK: batch geocoding codes missing locations in bulk, skips country-level answers, caches answers "
+          "and resumes after errors.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())